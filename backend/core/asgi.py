@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_asgi_application()
+
+# Flush the in-process buffers (view counts, analytics events) on schedule
+from core.background import start_periodic_tasks  # noqa: E402
+
+start_periodic_tasks()
@@ -0,0 +1,70 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+"""
+    Fire-and-forget work off the request path (cache refreshes, index rebuilds).
+
+    Runs in a daemon thread that closes its own DB connections when done. Set
+    BACKGROUND_TASKS_SYNC = True to run inline instead (tests, management commands).
+"""
+def run_in_background(func, *args, **kwargs):
+    if getattr(settings, 'BACKGROUND_TASKS_SYNC', False):
+        func(*args, **kwargs)
+        return None
+
+    def runner():
+        try:
+            func(*args, **kwargs)
+        except Exception:
+            logger.exception('Background task %s failed', getattr(func, '__qualname__', func))
+        finally:
+            connections.close_all()
+
+    thread = threading.Thread(target=runner, daemon=True)
+    thread.start()
+    return thread
+
+
+
+"""
+    Call func every `seconds` on one daemon thread for the life of the process, so
+    in-process buffers (view counts, analytics events) are flushed on schedule even
+    when no further request arrives. Not started when BACKGROUND_TASKS_SYNC is on.
+"""
+def run_periodically(func, seconds):
+    if getattr(settings, 'BACKGROUND_TASKS_SYNC', False):
+        return None
+
+    def ticker():
+        while True:
+            time.sleep(seconds)
+            try:
+                func()
+            except Exception:
+                logger.exception('Periodic task %s failed', getattr(func, '__qualname__', func))
+            finally:
+                connections.close_all()
+
+    thread = threading.Thread(target=ticker, daemon=True)
+    thread.start()
+    return thread
+
+
+_periodic_tasks = []
+
+
+# Register func for start_periodic_tasks(); modules call this at import time
+def register_periodic(func, seconds):
+    _periodic_tasks.append((func, seconds))
+
+
+# Start the registered periodic tasks. Only the serving processes call this (core/wsgi.py,
+# core/asgi.py); tests and management commands flush their buffers explicitly or at exit.
+def start_periodic_tasks():
+    return [run_periodically(func, seconds) for func, seconds in _periodic_tasks]
@@ -0,0 +1,41 @@
+import hashlib
+
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+"""
+    Conditional GET (ETag / Last-Modified) for API views.
+
+    A view builds its validators from cheap version queries (updated_at columns and
+    aggregates over related rows), calls not_modified() before running any serializer,
+    and returns that 304 if there is one; otherwise it tags the full response with
+    set_validators(). Responses are per user, so they vary on the credentials and are
+    marked private.
+"""
+
+
+# Strong ETag from the parts that make up a resource's version
+def make_etag(*parts):
+    raw = '|'.join('' if part is None else str(part) for part in parts)
+    return quote_etag(hashlib.sha1(raw.encode('utf-8')).hexdigest())
+
+
+def _timestamp(last_modified):
+    return int(last_modified.timestamp()) if last_modified else None
+
+
+# 304 (or 412 for a failed If-Match) when the client's copy is current, else None
+def not_modified(request, etag, last_modified=None):
+    response = get_conditional_response(request, etag=etag, last_modified=_timestamp(last_modified))
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(_timestamp(last_modified))
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Authorization', 'Cookie'))
+    return response
@@ -0,0 +1,203 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+"""
+    Keyset ("seek") pagination over whatever ordering the queryset already has.
+
+    The cursor holds the sort-key values of the last (or first) row on the page,
+    and the next page is fetched with a WHERE on those values instead of OFFSET.
+    Every page therefore costs the same, and no COUNT(*) is ever issued.
+"""
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class KeysetPagination(BasePagination):
+    page_size = 24
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+    # Unique key appended to every ordering so ties never skip or repeat rows
+    tie_breaker = 'id'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.model = queryset.model
+
+        position, reverse = self.decode_cursor(request)
+        ordering = [(name, not desc) for name, desc in self.ordering] if reverse else self.ordering
+
+        queryset = queryset.order_by(*[('-' if desc else '') + name for name, desc in ordering])
+        if position is not None:
+            queryset = queryset.filter(self._position_filter(ordering, position))
+
+        # One extra row tells us whether there is another page in this direction
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        self.has_next = has_more if not reverse else True
+        self.has_previous = has_more if reverse else position is not None
+        self.first_position = self._position_of(rows[0]) if rows else None
+        self.last_position = self._position_of(rows[-1]) if rows else None
+        # Stepping back from an empty forward page: resume just before where we were
+        if not rows and position is not None:
+            self.first_position = self.last_position = position
+            self.has_next, self.has_previous = (True, False) if reverse else (False, True)
+        return rows
+
+    # Page one of queryset without reading the request's cursor, for embedding a
+    # preview in another response; get_next_link() then points at base_url.
+    def first_page(self, queryset, request, base_url):
+        self.request = request
+        self.base_url = base_url
+        self.ordering = self.get_ordering(queryset)
+        self.model = queryset.model
+
+        queryset = queryset.order_by(*[('-' if desc else '') + name for name, desc in self.ordering])
+        rows = list(queryset[:self.page_size + 1])
+        self.has_next, self.has_previous = len(rows) > self.page_size, False
+        rows = rows[:self.page_size]
+        self.first_position = self._position_of(rows[0]) if rows else None
+        self.last_position = self._position_of(rows[-1]) if rows else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    # [(field_name, descending), ...] from the queryset (or Meta) ordering plus the tie-breaker
+    def get_ordering(self, queryset):
+        names = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        ordering = []
+        for name in names:
+            if not isinstance(name, str):
+                raise TypeError('KeysetPagination only supports ordering by field or annotation names.')
+            ordering.append((name.lstrip('-'), name.startswith('-')))
+
+        if not any(name in (self.tie_breaker, 'pk') for name, _ in ordering):
+            descending = ordering[0][1] if ordering else False
+            ordering.append((self.tie_breaker, descending))
+        return ordering
+
+    # (a, b, c) after (x, y, z) == a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+    def _position_filter(self, ordering, position):
+        condition = Q()
+        equal_so_far = Q()
+        for (name, desc), value in zip(ordering, position):
+            lookup = 'lt' if desc else 'gt'
+            condition |= equal_so_far & Q(**{f'{name}__{lookup}': value})
+            equal_so_far &= Q(**{name: value})
+        return condition
+
+    def _position_of(self, obj):
+        return [getattr(obj, name) for name, _ in self.ordering]
+
+    ''' CURSOR ENCODING '''
+    def encode_cursor(self, position, reverse):
+        payload = {'p': [_encode_value(value) for value in position]}
+        if reverse:
+            payload['r'] = 1
+        raw = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+            values = payload['p']
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError('cursor does not match ordering')
+            position = [self._to_python(name, value) for (name, _), value in zip(self.ordering, values)]
+        except (TypeError, ValueError, KeyError, UnicodeError, binascii.Error, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return position, bool(payload.get('r'))
+
+    # Model fields go through to_python(); annotations (e.g. search_rank) are used as-is
+    def _to_python(self, name, value):
+        try:
+            field = self.model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return value
+        return field.to_python(value)
+
+    ''' LINKS & RESPONSE '''
+    def get_next_link(self):
+        if not self.has_next or self.last_position is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.last_position, False))
+
+    def get_previous_link(self):
+        if not self.has_previous or self.first_position is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.first_position, True))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Opaque pagination cursor taken from a previous next/previous link.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': f'Number of results per page (max {self.max_page_size}).',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+
+class ReviewPagination(KeysetPagination):
+    page_size = 10
+    max_page_size = 50
@@ -7,6 +7,7 @@ from pathlib import Path
 from datetime import timedelta
 import os
 from dotenv import load_dotenv
+from corsheaders.defaults import default_headers
 
 load_dotenv()
 
@@ -110,6 +111,73 @@ else:
     }
 
 
+# --- Cache ---
+# In-process LocMem cache by default; set CACHE_URL (e.g. redis://host:6379/0) to share it across workers.
+CACHE_URL = os.getenv("CACHE_URL", "").strip()
+
+if CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "ecommerce-default",
+        }
+    }
+
+# How long /api/items/facets/ results are cached per filter set
+ITEM_FACETS_CACHE_SECONDS = int(os.getenv("ITEM_FACETS_CACHE_SECONDS", "60"))
+
+# Serialized carts are cached per cart version (Cart.version); this only bounds how long unused entries linger
+CART_CACHE_SECONDS = int(os.getenv("CART_CACHE_SECONDS", "300"))
+
+# Guest carts (orders/guest_carts.py) live only in this cache alias, expire this long after their
+# last change and hold at most this many distinct items
+GUEST_CART_CACHE = os.getenv("GUEST_CART_CACHE", "default")
+GUEST_CART_TTL_SECONDS = int(os.getenv("GUEST_CART_TTL_SECONDS", str(7 * 24 * 3600)))
+GUEST_CART_MAX_LINES = int(os.getenv("GUEST_CART_MAX_LINES", "100"))
+
+# Flash-sale mode: cart lines hold their stock for this long (orders/reservations.py);
+# run release_stock_reservations on a schedule to return expired holds
+STOCK_RESERVATIONS = os.getenv("STOCK_RESERVATIONS", "0") == "1"
+STOCK_RESERVATION_SECONDS = int(os.getenv("STOCK_RESERVATION_SECONDS", "900"))
+
+# How often each worker re-syncs its in-memory autocomplete index from the database
+AUTOCOMPLETE_RELOAD_SECONDS = int(os.getenv("AUTOCOMPLETE_RELOAD_SECONDS", "300"))
+
+# Age after which the cached homepage snapshot (trending + categories) is rebuilt in the background
+HOMEPAGE_SNAPSHOT_STALE_SECONDS = int(os.getenv("HOMEPAGE_SNAPSHOT_STALE_SECONDS", "60"))
+
+# Trending score: hourly view/purchase buckets from the last TRENDING_WINDOW_HOURS,
+# each weighted down by half every TRENDING_HALF_LIFE_HOURS of age
+TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", "24"))
+TRENDING_WINDOW_HOURS = int(os.getenv("TRENDING_WINDOW_HOURS", "168"))
+
+# Run core.background tasks inline instead of in threads (tests override this where a
+# second thread couldn't share the test transaction)
+BACKGROUND_TASKS_SYNC = os.getenv("BACKGROUND_TASKS_SYNC", "0") == "1"
+
+# Item page views are buffered in memory and written in one batch once the oldest is this old
+VIEW_COUNT_FLUSH_SECONDS = int(os.getenv("VIEW_COUNT_FLUSH_SECONDS", "10"))
+
+# Analytics events are buffered in memory and bulk-inserted once the oldest is this old
+# or the buffer is this long
+ANALYTICS_FLUSH_SECONDS = int(os.getenv("ANALYTICS_FLUSH_SECONDS", "5"))
+ANALYTICS_BUFFER_SIZE = int(os.getenv("ANALYTICS_BUFFER_SIZE", "500"))
+
+# How long a visitor's recently viewed list is kept after their last view
+RECENTLY_VIEWED_TTL_SECONDS = int(os.getenv("RECENTLY_VIEWED_TTL_SECONDS", str(60 * 60 * 24 * 30)))
+
+# Chunked review media uploads: largest file, and largest chunk accepted per request
+REVIEW_MEDIA_MAX_BYTES = int(os.getenv("REVIEW_MEDIA_MAX_BYTES", str(100 * 1024 * 1024)))
+MEDIA_UPLOAD_CHUNK_BYTES = int(os.getenv("MEDIA_UPLOAD_CHUNK_BYTES", str(5 * 1024 * 1024)))
+
+
 # --- Password validation ---
 AUTH_PASSWORD_VALIDATORS = [
     {"NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator"},
@@ -141,8 +209,8 @@ MEDIA_ROOT = BASE_DIR / "media"
 # --- CORS / CSRF ---
 CORS_ALLOW_ALL_ORIGINS = os.getenv("CORS_ALLOW_ALL_ORIGINS", "0") == "1"
 
-# Needed if you want browsers to include cookies (Django sessions) on cross-origin requests.
-# For this project, sessions are used for features like "recently viewed" items.
+# Needed if you want browsers to include cookies on cross-origin requests.
+# For this project, the anonymous visitor cookie behind "recently viewed" items.
 CORS_ALLOW_CREDENTIALS = os.getenv("CORS_ALLOW_CREDENTIALS", "0") == "1"
 
 if not CORS_ALLOW_ALL_ORIGINS:
@@ -155,6 +223,11 @@ if not CORS_ALLOW_ALL_ORIGINS:
         if o.strip()
     ]
 
+# Validators for conditional GETs (core/conditional.py): readable by frontend code,
+# and allowed back in If-None-Match / If-Modified-Since.
+CORS_EXPOSE_HEADERS = ["ETag", "Last-Modified", "X-Cart-Token"]
+CORS_ALLOW_HEADERS = (*default_headers, "if-none-match", "if-modified-since", "x-cart-token")
+
 CSRF_TRUSTED_ORIGINS = [
     o.strip()
     for o in os.getenv("CSRF_TRUSTED_ORIGINS", "").split(",")
@@ -1,12 +1,13 @@
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from rest_framework_simplejwt.views import TokenRefreshView
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 from django.conf import settings
 from django.conf.urls.static import static
 
 from users.views import RegisterView
 from items.views import HomepageView
+from orders.views import CartMergingTokenObtainPairView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -19,7 +20,7 @@ urlpatterns = [
     path("api/profile/", include("users.urls")),
     path("api/", include("orders.urls")),
     path("api/register/", RegisterView.as_view(), name="register"),
-    path("api/token/", TokenObtainPairView.as_view(), name="get_token"),
+    path("api/token/", CartMergingTokenObtainPairView.as_view(), name="get_token"),
     path("api/token/refresh/", TokenRefreshView.as_view(), name="refresh_token"),
     path("api-auth/", include("rest_framework.urls")),
 ]
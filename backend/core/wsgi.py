@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
 
 application = get_wsgi_application()
+
+# Flush the in-process buffers (view counts, analytics events) on schedule
+from core.background import start_periodic_tasks  # noqa: E402
+
+start_periodic_tasks()
@@ -2,8 +2,15 @@ from django.contrib import admin
 from .models import Item, Review, Promotion
 from .models.item import ItemImage
 
+class ItemAdmin(admin.ModelAdmin):
+    # Item.save doesn't write item_quantity; apply a stock edit as a change instead
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and 'item_quantity' in form.changed_data:
+            obj.adjust_stock(obj.item_quantity - form.initial['item_quantity'])
+
 # Register your models here.
 admin.site.register(ItemImage)
 admin.site.register(Promotion)
-admin.site.register(Item)
+admin.site.register(Item, ItemAdmin)
 admin.site.register(Review)
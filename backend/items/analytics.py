@@ -0,0 +1,277 @@
+import atexit
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from core.background import register_periodic, run_in_background
+
+'''
+    Write side and compaction of the analytics event log (items.models.analytics).
+
+    Request handlers call event_log.record(), which only appends to an in-memory
+    buffer. The buffer is written with one bulk INSERT once it is ANALYTICS_BUFFER_SIZE
+    events long, or, in serving processes, by a ticker thread
+    (core.background.start_periodic_tasks) once its oldest event is
+    ANALYTICS_FLUSH_SECONDS old; anything left is written at exit. compact_events()
+    (run by the compact_analytics command) rolls new events into ItemActivityBucket
+    (hourly, feeds trending), ItemDailyStats and SellerDailyStats, which the
+    dashboards read instead of the order tables.
+'''
+
+CHECKPOINT_NAME = 'rollups'
+
+
+class EventLog:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._buffered_since = None
+        self._flushing = False
+
+    # Buffer one event for item (anything with id and seller_id); pass user or user_id
+    def record(self, event_type, item, user=None, quantity=1, amount=None, user_id=None):
+        from items.models import AnalyticsEvent
+
+        event = AnalyticsEvent(
+            event_type=event_type,
+            item_id=item.id,
+            seller_id=item.seller_id,
+            user_id=user.pk if user is not None and user.is_authenticated else user_id,
+            quantity=quantity,
+            amount=amount,
+            created_at=timezone.now(),
+        )
+        max_size = getattr(settings, 'ANALYTICS_BUFFER_SIZE', 500)
+        with self._lock:
+            if self._buffered_since is None:
+                self._buffered_since = time.monotonic()
+            self._buffer.append(event)
+            due = not self._flushing and len(self._buffer) >= max_size
+            if due:
+                self._flushing = True
+        if due:
+            run_in_background(self.flush)
+
+    # Ticker entry point: flush once the oldest buffered event is due
+    def flush_if_due(self):
+        max_age = getattr(settings, 'ANALYTICS_FLUSH_SECONDS', 5)
+        with self._lock:
+            due = (
+                not self._flushing and self._buffered_since is not None
+                and time.monotonic() - self._buffered_since >= max_age
+            )
+            if due:
+                self._flushing = True
+        return self.flush() if due else 0
+
+    # Same as record(), but only once the surrounding transaction commits
+    def record_on_commit(self, event_type, item, user=None, quantity=1, amount=None, user_id=None):
+        transaction.on_commit(lambda: self.record(event_type, item, user, quantity, amount, user_id))
+
+    def flush(self):
+        from items.models import AnalyticsEvent
+
+        with self._lock:
+            events, self._buffer = self._buffer, []
+            self._buffered_since = None
+
+        try:
+            AnalyticsEvent.objects.bulk_create(events, batch_size=500)
+        except Exception:
+            # Keep the events for the next flush rather than dropping them
+            with self._lock:
+                self._buffer[:0] = events
+                self._buffered_since = self._buffered_since or time.monotonic()
+            raise
+        finally:
+            with self._lock:
+                self._flushing = False
+        return len(events)
+
+    def clear(self):
+        with self._lock:
+            self._buffer = []
+            self._buffered_since = None
+            self._flushing = False
+
+
+event_log = EventLog()
+register_periodic(event_log.flush_if_due, 1)
+
+
+def _flush_at_exit():
+    if event_log._buffer:
+        try:
+            event_log.flush()
+        except Exception:
+            pass
+
+
+atexit.register(_flush_at_exit)
+
+
+''' COMPACTION '''
+# Field increments one event contributes to the daily stats
+def _daily_increments(event):
+    amount = event.amount or Decimal('0.00')
+    if event.event_type == 'view':
+        return {'views': event.quantity}
+    if event.event_type == 'cart_add':
+        return {'cart_adds': event.quantity}
+    if event.event_type == 'cart_remove':
+        return {'cart_removes': event.quantity}
+    if event.event_type == 'purchase':
+        return {'orders': 1, 'units_sold': event.quantity, 'revenue': amount}
+    if event.event_type == 'cancel':
+        return {'units_cancelled': event.quantity, 'revenue': -amount}
+    return {}
+
+
+# Add increments to rollup rows keyed by (owner id, period), creating missing rows
+def _merge(model, owner_field, period_field, increments):
+    if not increments:
+        return
+    owner_ids = {owner_id for owner_id, _ in increments}
+    periods = {period for _, period in increments}
+    existing = {
+        (getattr(row, f'{owner_field}_id'), getattr(row, period_field)): row
+        for row in model.objects.filter(**{f'{owner_field}_id__in': owner_ids, f'{period_field}__in': periods})
+    }
+
+    created, updated, fields = [], [], set()
+    for key, counts in increments.items():
+        row = existing.get(key)
+        if row is None:
+            row = model(**{f'{owner_field}_id': key[0], period_field: key[1]})
+            created.append(row)
+        else:
+            updated.append(row)
+        for field, delta in counts.items():
+            setattr(row, field, getattr(row, field) + delta)
+            fields.add(field)
+
+    model.objects.bulk_create(created, batch_size=500)
+    if updated:
+        model.objects.bulk_update(updated, sorted(fields), batch_size=500)
+
+
+# Roll events newer than the checkpoint into the rollup tables, batch by batch.
+# Events inserted less than settle_seconds ago (and everything after them) are left
+# for the next run, so a batch insert still committing with lower ids can't be skipped.
+# Insert time, not created_at: a worker may flush events it buffered long before.
+def compact_events(batch_size=5000, settle_seconds=60, now=None):
+    from django.contrib.auth.models import User
+    from items.models import (
+        AnalyticsCheckpoint, AnalyticsEvent, Item, ItemActivityBucket, ItemDailyStats, SellerDailyStats,
+    )
+    from items.models.trending import hour_bucket
+
+    cutoff = (now or timezone.now()) - timedelta(seconds=settle_seconds)
+    compacted = 0
+    while True:
+        with transaction.atomic():
+            checkpoint, _ = AnalyticsCheckpoint.objects.select_for_update().get_or_create(name=CHECKPOINT_NAME)
+            events = list(
+                AnalyticsEvent.objects
+                .filter(id__gt=checkpoint.last_event_id)
+                .order_by('id')[:batch_size]
+            )
+            # Stop at the first recent insert: the checkpoint may only move past settled ids
+            for index, event in enumerate(events):
+                if event.inserted_at >= cutoff:
+                    events = events[:index]
+                    break
+            if not events:
+                return compacted
+
+            # Rows for deleted items/sellers are dropped rather than violating the FKs
+            live_items = set(Item.objects.filter(id__in={e.item_id for e in events}).values_list('id', flat=True))
+            live_sellers = set(User.objects.filter(id__in={e.seller_id for e in events}).values_list('id', flat=True))
+
+            hourly = defaultdict(Counter)
+            item_days = defaultdict(Counter)
+            seller_days = defaultdict(Counter)
+            for event in events:
+                increments = _daily_increments(event)
+                day = timezone.localdate(event.created_at)
+                if event.item_id in live_items:
+                    item_days[(event.item_id, day)].update(increments)
+                    if event.event_type in ('view', 'purchase'):
+                        field = 'views' if event.event_type == 'view' else 'purchases'
+                        hourly[(event.item_id, hour_bucket(event.created_at))][field] += event.quantity
+                if event.seller_id in live_sellers:
+                    seller_days[(event.seller_id, day)].update(increments)
+
+            _merge(ItemActivityBucket, 'item', 'hour', hourly)
+            _merge(ItemDailyStats, 'item', 'day', item_days)
+            _merge(SellerDailyStats, 'seller', 'day', seller_days)
+
+            checkpoint.last_event_id = events[-1].id
+            checkpoint.save(update_fields=['last_event_id', 'updated_at'])
+        compacted += len(events)
+
+
+# Delete events that have been compacted and are older than the retention window
+def prune_events(days, now=None):
+    from items.models import AnalyticsCheckpoint, AnalyticsEvent
+
+    checkpoint = AnalyticsCheckpoint.objects.filter(name=CHECKPOINT_NAME).first()
+    if checkpoint is None:
+        return 0
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    return AnalyticsEvent.objects.filter(id__lte=checkpoint.last_event_id, created_at__lt=cutoff).delete()[0]
+
+
+''' READ SIDE '''
+# Seller dashboard: totals, daily series, funnel and top items over the last `days` days
+def seller_summary(seller, days=30):
+    from items.models import ItemDailyStats, SellerDailyStats
+    from items.models.analytics import DailyStats
+
+    since = timezone.localdate() - timedelta(days=days - 1)
+    daily = list(
+        SellerDailyStats.objects.filter(seller=seller, day__gte=since)
+        .order_by('day')
+        .values('day', *DailyStats.COUNTER_FIELDS)
+    )
+    totals = {field: sum((row[field] for row in daily), 0) for field in DailyStats.COUNTER_FIELDS}
+
+    def rate(part, whole):
+        return round(part / whole * 100, 1) if whole else 0.0
+
+    top_items = list(
+        ItemDailyStats.objects.filter(item__seller=seller, day__gte=since)
+        .values('item_id', 'item__item_name')
+        .annotate(units_sold=Sum('units_sold'), revenue=Sum('revenue'), views=Sum('views'))
+        .order_by('-revenue', '-units_sold', 'item_id')[:10]
+    )
+    return {
+        'since': since,
+        'totals': totals,
+        'funnel': {
+            'views': totals['views'],
+            'cart_adds': totals['cart_adds'],
+            'orders': totals['orders'],
+            'view_to_cart_rate': rate(totals['cart_adds'], totals['views']),
+            'cart_to_order_rate': rate(totals['orders'], totals['cart_adds']),
+            'view_to_order_rate': rate(totals['orders'], totals['views']),
+        },
+        'daily': daily,
+        'top_items': [
+            {
+                'item_id': row['item_id'],
+                'item_name': row['item__item_name'],
+                'units_sold': row['units_sold'],
+                'revenue': row['revenue'],
+                'views': row['views'],
+            }
+            for row in top_items
+        ],
+    }
@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class ItemsConfig(AppConfig):
@@ -7,3 +8,14 @@ class ItemsConfig(AppConfig):
 
 	def ready(self):
 		import items.signals  # noqa: F401
+
+		connection_created.connect(register_sqlite_functions)
+
+
+# SQL functions the SQLite search backend relies on (items.search)
+def register_sqlite_functions(sender, connection, **kwargs):
+	if connection.vendor != 'sqlite':
+		return
+	from items.search import word_similarity
+
+	connection.connection.create_function('word_similarity', 2, word_similarity, deterministic=True)
@@ -0,0 +1,127 @@
+import bisect
+import heapq
+import threading
+import time
+
+from django.conf import settings
+
+from core.background import run_in_background
+
+'''
+    In-process prefix index over available item names for /api/items/autocomplete/.
+
+    Every word start of a name is a key in one sorted list, so a prefix lookup is two
+    bisects plus a scan of the matching keys and never touches the database. The index is loaded once
+    per process, kept current from Item save/delete signals, and re-synced in the
+    background every AUTOCOMPLETE_RELOAD_SECONDS to pick up other workers' writes.
+'''
+
+def normalize(text):
+    return ' '.join((text or '').lower().split())
+
+
+class AutocompleteIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys = []       # sorted [(key, item_id)], one per word start of each name
+        self._entries = {}    # item_id -> (item_name, popularity)
+        self._loaded_at = None
+        self._reloading = False
+
+    ''' LOADING '''
+    @property
+    def is_loaded(self):
+        return self._loaded_at is not None
+
+    # Replace the whole index from Item rows
+    def load(self, rows):
+        keys, entries = [], {}
+        for item_id, name, popularity in rows:
+            entries[item_id] = (name, popularity)
+            keys.extend((key, item_id) for key in self._keys_for(name))
+        keys.sort()
+        with self._lock:
+            self._keys, self._entries = keys, entries
+            self._loaded_at = time.monotonic()
+
+    def load_from_db(self):
+        from items.models import Item
+
+        rows = Item.objects.filter(is_available=True).values_list('id', 'item_name', 'view_count')
+        self.load(rows.iterator(chunk_size=2000))
+
+    # Background re-sync; a failed one is retried at the next stale lookup
+    def _reload(self):
+        try:
+            self.load_from_db()
+        finally:
+            with self._lock:
+                self._reloading = False
+
+    # First use loads inline; afterwards stale indexes are refreshed in the background
+    def ensure_loaded(self):
+        if not self.is_loaded:
+            self.load_from_db()
+            return
+
+        max_age = getattr(settings, 'AUTOCOMPLETE_RELOAD_SECONDS', 300)
+        with self._lock:
+            stale = not self._reloading and time.monotonic() - self._loaded_at > max_age
+            if stale:
+                self._reloading = True
+        if stale:
+            run_in_background(self._reload)
+
+    def clear(self):
+        with self._lock:
+            self._keys, self._entries = [], {}
+            self._loaded_at = None
+            self._reloading = False
+
+    ''' INCREMENTAL UPDATES '''
+    def add(self, item_id, name, popularity=0):
+        with self._lock:
+            self._remove_locked(item_id)
+            self._entries[item_id] = (name, popularity)
+            for key in self._keys_for(name):
+                bisect.insort(self._keys, (key, item_id))
+
+    def remove(self, item_id):
+        with self._lock:
+            self._remove_locked(item_id)
+
+    def _remove_locked(self, item_id):
+        entry = self._entries.pop(item_id, None)
+        if entry is None:
+            return
+        for key in self._keys_for(entry[0]):
+            index = bisect.bisect_left(self._keys, (key, item_id))
+            if index < len(self._keys) and self._keys[index] == (key, item_id):
+                del self._keys[index]
+
+    # "Smart Phone Case" -> "smart phone case", "phone case", "case"
+    def _keys_for(self, name):
+        words = normalize(name).split(' ')
+        return {' '.join(words[i:]) for i in range(len(words)) if words[i]}
+
+    ''' LOOKUP '''
+    # Names containing a word that starts with prefix; name-prefix matches first, then popularity
+    def suggest(self, prefix, limit=8):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+
+        with self._lock:
+            start = bisect.bisect_left(self._keys, (prefix,))
+            end = bisect.bisect_left(self._keys, (prefix + '\U0010ffff',), start)
+            # Every matching key is ranked, not just the first few in key order
+            matches = {item_id: self._entries[item_id] for _, item_id in self._keys[start:end]}
+
+        ranked = heapq.nsmallest(
+            limit, matches.items(),
+            key=lambda entry: (not normalize(entry[1][0]).startswith(prefix), -entry[1][1], entry[1][0].lower()),
+        )
+        return [{'id': item_id, 'item_name': name} for item_id, (name, _) in ranked]
+
+
+autocomplete_index = AutocompleteIndex()
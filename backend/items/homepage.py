@@ -0,0 +1,73 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.background import run_in_background
+
+'''
+    Shared (non-personalized) part of the homepage: trending items and categories,
+    serialized once into a cached snapshot.
+
+    Requests serve whatever snapshot is cached. Once it is older than
+    HOMEPAGE_SNAPSHOT_STALE_SECONDS, the first request to notice schedules a rebuild
+    in the background and keeps serving the old copy. A cold cache (first hit, cache
+    flushed, restart) has nothing worth serving, so the first request builds the
+    snapshot inline under the same lock; concurrent requests wait briefly for it.
+'''
+
+SNAPSHOT_KEY = 'homepage:snapshot'
+REBUILD_LOCK_KEY = 'homepage:snapshot:rebuilding'
+TRENDING_LIMIT = 10
+
+
+def build_snapshot():
+    from items.models import Item
+    from items.serializers import ItemListSerializer
+
+    snapshot = {
+        'built_at': time.time(),
+        'trending': ItemListSerializer(Item.get_trending_items(TRENDING_LIMIT), many=True).data,
+        'categories': Item.get_all_categories(),
+    }
+    # Stored without a timeout; staleness is decided from built_at so an old copy can still be served
+    cache.set(SNAPSHOT_KEY, snapshot, None)
+    return snapshot
+
+
+def _rebuild():
+    try:
+        build_snapshot()
+    finally:
+        cache.delete(REBUILD_LOCK_KEY)
+
+
+# A request that finds the cold cache already being built waits this long for it
+COLD_WAIT_SECONDS = 5
+
+
+def _build_cold():
+    if cache.add(REBUILD_LOCK_KEY, 1, COLD_WAIT_SECONDS * 2):
+        try:
+            return build_snapshot()
+        finally:
+            cache.delete(REBUILD_LOCK_KEY)
+    deadline = time.monotonic() + COLD_WAIT_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        snapshot = cache.get(SNAPSHOT_KEY)
+        if snapshot is not None:
+            return snapshot
+    # The other build is slow or died; don't leave this visitor with nothing
+    return build_snapshot()
+
+
+def get_snapshot():
+    snapshot = cache.get(SNAPSHOT_KEY)
+    if snapshot is None:
+        return _build_cold()
+    max_age = getattr(settings, 'HOMEPAGE_SNAPSHOT_STALE_SECONDS', 60)
+    # cache.add is atomic, so only one worker schedules the rebuild
+    if time.time() - snapshot['built_at'] > max_age and cache.add(REBUILD_LOCK_KEY, 1, max_age):
+        run_in_background(_rebuild)
+    return snapshot
@@ -0,0 +1,154 @@
+import hashlib
+import logging
+import posixpath
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from core.background import run_in_background
+
+logger = logging.getLogger(__name__)
+
+'''
+    Resized derivatives of uploaded item images.
+
+    Each uploaded ItemImage.image_file is rendered once, off the request path, into
+    DERIVATIVE_SIZES (longest edge in px, never upscaled), each as WebP plus a JPEG
+    fallback, and stored under DERIVATIVES_DIR next to the original. The paths land in
+    ItemImage.derivatives:
+
+        {'thumb': {'width': 160, 'height': 120, 'webp': '<path>', 'jpeg': '<path>'}, ...}
+
+    render_derivatives() only turns bytes into bytes, so the backfill command can run
+    it in a process pool while the parent process does the storage and DB work.
+
+    Identical uploads share one stored file (ItemImage.content_hash), so files and
+    their derivatives are only deleted once no ItemImage refers to them (release_files).
+'''
+
+DERIVATIVE_SIZES = {'thumb': 160, 'card': 480, 'zoom': 1600}
+# (key in ItemImage.derivatives, Pillow format, file extension, save options)
+FORMATS = (
+    ('webp', 'WEBP', 'webp', {'quality': 80, 'method': 4}),
+    ('jpeg', 'JPEG', 'jpg', {'quality': 85, 'optimize': True, 'progressive': True}),
+)
+DERIVATIVES_DIR = 'item_images/derived'
+# Fallback served for items without images; never released
+DEFAULT_IMAGE = 'item_images/default.png'
+
+
+# Flatten transparency onto white: JPEG has no alpha, and product shots expect a light background
+def _to_rgb(image):
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        rgba = image.convert('RGBA')
+        background = Image.new('RGB', rgba.size, (255, 255, 255))
+        background.paste(rgba, mask=rgba.getchannel('A'))
+        return background
+    return image.convert('RGB')
+
+
+# Original image bytes -> {name: {'width', 'height', <format key>: bytes, ...}}
+def render_derivatives(source):
+    with Image.open(BytesIO(source)) as original:
+        image = _to_rgb(ImageOps.exif_transpose(original))
+
+    rendered = {}
+    for name, longest_edge in DERIVATIVE_SIZES.items():
+        resized = image.copy()
+        resized.thumbnail((longest_edge, longest_edge), Image.Resampling.LANCZOS)
+        variant = {'width': resized.width, 'height': resized.height}
+        for key, pil_format, _, options in FORMATS:
+            buffer = BytesIO()
+            resized.save(buffer, pil_format, **options)
+            variant[key] = buffer.getvalue()
+        rendered[name] = variant
+    return rendered
+
+
+def _stem(image_file_name):
+    return posixpath.splitext(posixpath.basename(image_file_name))[0]
+
+
+# Whether image has an uploaded file whose derivatives are missing or were made from another file
+def needs_derivatives(image):
+    if not image.image_file:
+        return False
+    prefix = f'{DERIVATIVES_DIR}/{_stem(image.image_file.name)}-'
+    stored = image.derivatives or {}
+    return set(stored) != set(DERIVATIVE_SIZES) or any(
+        not variant.get(key, '').startswith(prefix)
+        for variant in stored.values() for key, *_ in FORMATS
+    )
+
+
+# Write rendered derivatives next to the original; returns the ItemImage.derivatives value
+def store_derivatives(image_file_name, rendered):
+    stem = _stem(image_file_name)
+    derivatives = {}
+    for name, variant in rendered.items():
+        stored = {'width': variant['width'], 'height': variant['height']}
+        for key, _, extension, _ in FORMATS:
+            path = f'{DERIVATIVES_DIR}/{stem}-{name}.{extension}'
+            # Overwrite a previous rendering instead of piling up suffixed copies
+            if default_storage.exists(path):
+                default_storage.delete(path)
+            stored[key] = default_storage.save(path, ContentFile(variant[key]))
+        derivatives[name] = stored
+    return derivatives
+
+
+def read_source(image):
+    with image.image_file.open('rb') as handle:
+        return handle.read()
+
+
+# Render and store the derivatives of one ItemImage (no-op for URL-only images)
+def process_image(image_id):
+    from items.models.item import ItemImage
+
+    image = ItemImage.objects.filter(pk=image_id).first()
+    if image is None or not image.image_file:
+        return None
+    try:
+        rendered = render_derivatives(read_source(image))
+    except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+        logger.warning('Could not render derivatives for item image %s', image_id, exc_info=True)
+        return None
+
+    derivatives = store_derivatives(image.image_file.name, rendered)
+    # Plain UPDATE: saving the instance would re-trigger the upload signal
+    ItemImage.objects.filter(pk=image_id).update(derivatives=derivatives)
+    return derivatives
+
+
+# Queue processing for once the upload's transaction has committed
+def schedule_derivatives(image_id):
+    transaction.on_commit(lambda: run_in_background(process_image, image_id))
+
+
+# sha256 of an uploaded file, read in chunks
+def content_hash(upload):
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    upload.seek(0)
+    return digest.hexdigest()
+
+
+# Delete a stored original and its derivatives once no ItemImage refers to it any more
+def release_files(image_file_name, derivatives):
+    from items.models.item import ItemImage
+
+    if not image_file_name or image_file_name == DEFAULT_IMAGE:
+        return False
+    if ItemImage.objects.filter(image_file=image_file_name).exists():
+        return False
+    paths = [image_file_name] + [
+        variant[key] for variant in (derivatives or {}).values() for key, *_ in FORMATS if variant.get(key)
+    ]
+    for path in paths:
+        default_storage.delete(path)
+    return True
@@ -0,0 +1,69 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from items.images import needs_derivatives, read_source, render_derivatives, store_derivatives
+from items.models.item import ItemImage
+
+
+# Runs in the worker processes: bytes in, rendered bytes (or None for a broken file) out
+def _render(source):
+    try:
+        return render_derivatives(source)
+    except Exception:
+        return None
+
+
+class Command(BaseCommand):
+    help = "Render the thumb/card/zoom WebP and JPEG derivatives for uploaded item images that don't have them yet, resizing in a process pool."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Resizing processes (1 renders in this process).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Images read into memory and handed to the pool at a time.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Re-render images that already have derivatives.",
+        )
+
+    def handle(self, *args, **options):
+        images = ItemImage.objects.exclude(image_file="").exclude(image_file__isnull=True).order_by("id")
+        pending = [image for image in images.iterator(chunk_size=500) if options["force"] or needs_derivatives(image)]
+
+        executor = ProcessPoolExecutor(max_workers=options["workers"]) if options["workers"] > 1 else None
+        rendered_count = failed = 0
+        try:
+            for start in range(0, len(pending), options["batch_size"]):
+                batch, sources = [], []
+                for image in pending[start:start + options["batch_size"]]:
+                    try:
+                        sources.append(read_source(image))
+                    except OSError:
+                        failed += 1
+                        continue
+                    batch.append(image)
+
+                results = executor.map(_render, sources) if executor else map(_render, sources)
+                for image, rendered in zip(batch, results):
+                    if rendered is None:
+                        failed += 1
+                        continue
+                    derivatives = store_derivatives(image.image_file.name, rendered)
+                    ItemImage.objects.filter(pk=image.pk).update(derivatives=derivatives)
+                    rendered_count += 1
+        finally:
+            if executor:
+                executor.shutdown()
+
+        self.stdout.write(self.style.SUCCESS(f"Image derivatives built ({rendered_count} images, {failed} skipped)."))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from items.analytics import compact_events, prune_events
+
+
+class Command(BaseCommand):
+    help = "Roll new analytics events into the hourly activity buckets and per-item/per-seller daily stats. Run it on a schedule (e.g. every 5 minutes), before recompute_trending."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Events rolled up per transaction.",
+        )
+        parser.add_argument(
+            "--prune-days",
+            type=int,
+            default=90,
+            help="Delete compacted events older than this many days (0 keeps everything).",
+        )
+
+    def handle(self, *args, **options):
+        compacted = compact_events(batch_size=options["batch_size"])
+        pruned = prune_events(options["prune_days"]) if options["prune_days"] > 0 else 0
+        self.stdout.write(self.style.SUCCESS(f"Analytics compacted ({compacted} events rolled up, {pruned} old events pruned)."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from items.models import MediaUpload
+
+
+class Command(BaseCommand):
+    help = "Delete review media uploads (and their stored chunks/files) abandoned for longer than --hours, finished-but-unattached ones included. Run it on a schedule, e.g. hourly."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--hours",
+            type=int,
+            default=24,
+            help="Uploads untouched for this long are dropped.",
+        )
+
+    def handle(self, *args, **options):
+        discarded = MediaUpload.discard_stale(hours=options["hours"])
+        self.stdout.write(self.style.SUCCESS(f"Stale media uploads pruned ({discarded} removed)."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from items.models import CategorySummary
+
+
+class Command(BaseCommand):
+    help = "Recompute the per-category available-item counts behind /api/categories/ and the homepage category list."
+
+    def handle(self, *args, **options):
+        categories = CategorySummary.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Category summary rebuilt ({categories} categories)."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from items.models import ItemNeighbor
+
+
+class Command(BaseCommand):
+    help = "Rebuild the frequently-bought-together neighbour lists from order history. Run it on a schedule (e.g. nightly)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--top-n",
+            type=int,
+            default=ItemNeighbor.TOP_N,
+            help="Neighbours to keep per item.",
+        )
+
+    def handle(self, *args, **options):
+        items = ItemNeighbor.rebuild(top_n=options["top_n"])
+        self.stdout.write(self.style.SUCCESS(f"Item neighbours rebuilt ({items} items with co-purchases)."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from items.models import Item
+
+
+class Command(BaseCommand):
+    help = "Recompute every item's stored review aggregates (count, rating sum, star histogram, media count)."
+
+    def handle(self, *args, **options):
+        reviewed = Item.rebuild_review_aggregates()
+        self.stdout.write(self.style.SUCCESS(f"Review aggregates rebuilt ({reviewed} items with reviews)."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from items.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for all items (e.g. after bulk imports that skip signals)."
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        with transaction.atomic():
+            backend.install()
+            backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt using {type(backend).__name__}."))
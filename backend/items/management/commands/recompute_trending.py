@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from items.models import ItemActivityBucket, TrendingScore
+
+
+class Command(BaseCommand):
+    help = "Recompute the time-decayed trending scores from the hourly activity buckets. Run it on a schedule (e.g. every 10 minutes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--prune-days",
+            type=int,
+            default=30,
+            help="Delete activity buckets older than this many days (0 keeps everything).",
+        )
+
+    def handle(self, *args, **options):
+        scored = TrendingScore.recompute()
+        pruned = ItemActivityBucket.prune(options["prune_days"]) if options["prune_days"] > 0 else 0
+        self.stdout.write(self.style.SUCCESS(f"Trending scores recomputed ({scored} items, {pruned} old buckets pruned)."))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from items.models import Item
+
+
+class Command(BaseCommand):
+    help = "Update stored effective prices and discounts for sales that started or ended. Run it on a schedule (e.g. every few minutes)."
+
+    def handle(self, *args, **options):
+        changed = Item.refresh_sale_prices()
+        self.stdout.write(self.style.SUCCESS(f"Sale prices refreshed ({changed} items changed)."))
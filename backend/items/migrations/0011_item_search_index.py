@@ -0,0 +1,24 @@
+from django.db import migrations
+
+from items.search import get_search_backend
+
+
+def create_search_index(apps, schema_editor):
+    backend = get_search_backend(schema_editor.connection)
+    backend.install()
+    backend.rebuild()
+
+
+def drop_search_index(apps, schema_editor):
+    get_search_backend(schema_editor.connection).uninstall()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0010_alter_itemimage_image_url'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 6.1.2 on 2026-10-18 20:11
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def populate_review_aggregates(apps, schema_editor):
+    Item = apps.get_model('items', 'Item')
+    Review = apps.get_model('items', 'Review')
+
+    star_counts = {f'rating_{i}_count': Count('id', filter=Q(rating=i)) for i in range(1, 6)}
+    rows = Review.objects.values('item_id').annotate(
+        review_count=Count('id'),
+        rating_sum=Sum('rating'),
+        review_media_count=Count('id', filter=Q(media__isnull=False) & ~Q(media='')),
+        **star_counts,
+    ).order_by()
+    for row in rows:
+        Item.objects.filter(id=row.pop('item_id')).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0011_item_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='rating_1_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='rating_2_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='rating_3_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='rating_4_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='rating_5_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='review_media_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_review_aggregates, migrations.RunPython.noop),
+    ]
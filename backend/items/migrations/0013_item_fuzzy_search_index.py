@@ -0,0 +1,21 @@
+from django.db import migrations
+
+from items.search import get_search_backend
+
+
+# install() is idempotent: this adds the trigram index next to the full-text one
+def create_fuzzy_search_index(apps, schema_editor):
+    backend = get_search_backend(schema_editor.connection)
+    backend.install()
+    backend.rebuild()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0012_item_review_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fuzzy_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,61 @@
+# Generated by Django 6.1.2 on 2026-10-18 20:20
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+# Historical models have no methods, so this repeats Item.refresh_pricing
+def populate_effective_price(apps, schema_editor):
+    Item = apps.get_model('items', 'Item')
+    now = timezone.now()
+    items = list(Item.objects.only(
+        'id', 'item_price', 'is_on_sale', 'sale_price', 'sale_start_date', 'sale_end_date',
+    ))
+    for item in items:
+        active = (
+            item.is_on_sale and item.sale_price
+            and not (item.sale_start_date and now < item.sale_start_date)
+            and not (item.sale_end_date and now > item.sale_end_date)
+        )
+        if active:
+            item.effective_price = item.sale_price
+            item.discount_percentage = round((item.item_price - item.sale_price) / item.item_price * 100)
+        else:
+            item.effective_price = item.item_price
+            item.discount_percentage = 0
+    Item.objects.bulk_update(items, ['effective_price', 'discount_percentage'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0013_item_fuzzy_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='item',
+            name='items_item_item_pr_7564fe_idx',
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='discount_percentage',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='effective_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['is_available', 'effective_price'], name='items_item_is_avai_8ab3d8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='item',
+            index=models.Index(fields=['is_available', '-discount_percentage'], name='items_item_is_avai_eafd76_idx'),
+        ),
+        migrations.RunPython(populate_effective_price, migrations.RunPython.noop),
+    ]
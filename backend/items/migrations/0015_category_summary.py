@@ -0,0 +1,43 @@
+# Generated by Django 6.1.2 on 2026-10-18 20:23
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_category_summary(apps, schema_editor):
+    Item = apps.get_model('items', 'Item')
+    CategorySummary = apps.get_model('items', 'CategorySummary')
+
+    counts = {}
+    rows = Item.objects.filter(is_available=True).values('item_category', 'custom_category').annotate(count=Count('id')).order_by()
+    for row in rows:
+        custom = row['custom_category'] if row['item_category'] == 'other' else ''
+        key = (row['item_category'], custom)
+        counts[key] = counts.get(key, 0) + row['count']
+    CategorySummary.objects.bulk_create([
+        CategorySummary(item_category=category, custom_category=custom, item_count=count)
+        for (category, custom), count in counts.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0014_item_effective_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategorySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_category', models.CharField(max_length=50)),
+                ('custom_category', models.CharField(blank=True, max_length=100)),
+                ('item_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('item_category', 'custom_category'), name='unique_category_summary')],
+            },
+        ),
+        migrations.RunPython(populate_category_summary, migrations.RunPython.noop),
+    ]
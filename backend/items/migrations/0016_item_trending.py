@@ -0,0 +1,41 @@
+# Generated by Django 6.1.2 on 2026-10-18 20:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0015_category_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrendingScore',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending', serialize=False, to='items.item')),
+                ('item_category', models.CharField(max_length=50)),
+                ('custom_category', models.CharField(blank=True, max_length=100)),
+                ('score', models.FloatField()),
+                ('computed_at', models.DateTimeField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-score'], name='items_trend_score_0fe002_idx'), models.Index(fields=['item_category', '-score'], name='items_trend_item_ca_61785c_idx'), models.Index(fields=['custom_category', '-score'], name='items_trend_custom__99eb9d_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ItemActivityBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('purchases', models.PositiveIntegerField(default=0)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activity_buckets', to='items.item')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hour'], name='items_itema_hour_ad56a5_idx')],
+                'constraints': [models.UniqueConstraint(fields=('item', 'hour'), name='unique_item_activity_hour')],
+            },
+        ),
+    ]
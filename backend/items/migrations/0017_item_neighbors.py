@@ -0,0 +1,27 @@
+# Generated by Django 6.1.2 on 2026-10-18 20:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0016_item_trending'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemNeighbor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbors', to='items.item')),
+                ('neighbor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbor_of', to='items.item')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['item', '-score'], name='items_itemn_item_id_78a026_idx')],
+                'constraints': [models.UniqueConstraint(fields=('item', 'neighbor'), name='unique_item_neighbor')],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 6.1.2 on 2026-10-18 20:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0018_analytics_events'),
+        ('orders', '0009_order_refund_pending'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['item', '-created_at'], name='items_revie_item_id_8933f6_idx'),
+        ),
+    ]
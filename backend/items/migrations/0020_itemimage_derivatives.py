@@ -0,0 +1,18 @@
+# Generated by Django 6.1.2 on 2026-10-18 20:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0019_review_item_created_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itemimage',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
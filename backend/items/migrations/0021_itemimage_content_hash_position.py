@@ -0,0 +1,55 @@
+# Generated by Django 6.1.2 on 2026-10-18 20:58
+
+import hashlib
+
+from django.db import migrations, models
+
+
+# Hash stored uploads and number each item's images in their current (id) order
+def populate_hash_and_position(apps, schema_editor):
+    ItemImage = apps.get_model('items', 'ItemImage')
+    next_position = {}
+    changed = []
+    for image in ItemImage.objects.order_by('item_id', 'id').iterator(chunk_size=500):
+        image.position = next_position.get(image.item_id, 0)
+        next_position[image.item_id] = image.position + 1
+        if image.image_file:
+            try:
+                digest = hashlib.sha256()
+                with image.image_file.open('rb') as handle:
+                    for chunk in handle.chunks():
+                        digest.update(chunk)
+                image.content_hash = digest.hexdigest()
+            except OSError:
+                pass
+        changed.append(image)
+    ItemImage.objects.bulk_update(changed, ['position', 'content_hash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('items', '0020_itemimage_derivatives'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='itemimage',
+            options={'ordering': ['position', 'id']},
+        ),
+        migrations.AddField(
+            model_name='itemimage',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='itemimage',
+            name='position',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='itemimage',
+            index=models.Index(fields=['item', 'position'], name='items_itemi_item_id_26138d_idx'),
+        ),
+        migrations.RunPython(populate_hash_and_position, migrations.RunPython.noop),
+    ]
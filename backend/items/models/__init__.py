@@ -2,7 +2,17 @@ if __name__ == 'items.models':
 	from .item import Item
 	from .review import Review
 	from .promotion import Promotion
+	from .category import CategorySummary
+	from .trending import ItemActivityBucket, TrendingScore
+	from .neighbor import ItemNeighbor
+	from .analytics import AnalyticsEvent, AnalyticsCheckpoint, ItemDailyStats, SellerDailyStats
+	from .upload import MediaUpload
 
-	__all__ = ['Item', 'Review', 'Promotion']
+	__all__ = [
+		'Item', 'Review', 'Promotion', 'CategorySummary',
+		'ItemActivityBucket', 'TrendingScore', 'ItemNeighbor',
+		'AnalyticsEvent', 'AnalyticsCheckpoint', 'ItemDailyStats', 'SellerDailyStats',
+		'MediaUpload',
+	]
 else:
 	__all__ = []
\ No newline at end of file
@@ -0,0 +1,95 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import models
+from django.db.models.functions import Now
+from django.utils import timezone
+
+
+class AnalyticsEvent(models.Model):
+    ''' Append-only log of shopper actions, written in batches by items/analytics.py.
+        Rows are never updated; compact_events() rolls them into the daily/hourly stats.
+        Item and seller are plain ids (no FK) so logging never locks or cascades. '''
+    EVENT_TYPES = [
+        ('view', 'Item view'),
+        ('cart_add', 'Added to cart'),
+        ('cart_remove', 'Removed from cart'),
+        ('purchase', 'Purchase'),
+        ('cancel', 'Cancellation'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    event_type = models.CharField(max_length=20, choices=EVENT_TYPES)
+    item_id = models.PositiveIntegerField()
+    seller_id = models.PositiveIntegerField()
+    user_id = models.PositiveIntegerField(null=True, blank=True)
+    quantity = models.PositiveIntegerField(default=1)
+    # Line total for purchases and cancellations
+    amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    # When the action happened (buffered in the worker until the batch flush) ...
+    created_at = models.DateTimeField(default=timezone.now)
+    # ... and when the row was written, by the database clock; compaction settles on this
+    inserted_at = models.DateTimeField(db_default=Now(), editable=False)
+
+    class Meta:
+        app_label = 'items'
+
+    def __str__(self):
+        return f'{self.event_type} item={self.item_id} x{self.quantity} @ {self.created_at:%Y-%m-%d %H:%M}'
+
+
+class AnalyticsCheckpoint(models.Model):
+    ''' Last event id a compaction job has rolled up, so each event is counted exactly once '''
+    name = models.CharField(max_length=50, unique=True)
+    last_event_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        app_label = 'items'
+
+    def __str__(self):
+        return f'{self.name}: {self.last_event_id}'
+
+
+class DailyStats(models.Model):
+    ''' Counters shared by the per-item and per-seller daily rollups '''
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    cart_adds = models.PositiveIntegerField(default=0)
+    cart_removes = models.PositiveIntegerField(default=0)
+    orders = models.PositiveIntegerField(default=0)
+    units_sold = models.PositiveIntegerField(default=0)
+    units_cancelled = models.PositiveIntegerField(default=0)
+    # Sales minus cancellations, at the price paid
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+
+    COUNTER_FIELDS = ('views', 'cart_adds', 'cart_removes', 'orders', 'units_sold', 'units_cancelled', 'revenue')
+
+    class Meta:
+        abstract = True
+
+
+class ItemDailyStats(DailyStats):
+    item = models.ForeignKey('Item', on_delete=models.CASCADE, related_name='daily_stats')
+
+    class Meta:
+        app_label = 'items'
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'day'], name='unique_item_daily_stats'),
+        ]
+
+    def __str__(self):
+        return f'item {self.item_id} on {self.day}'
+
+
+class SellerDailyStats(DailyStats):
+    seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_stats')
+
+    class Meta:
+        app_label = 'items'
+        constraints = [
+            models.UniqueConstraint(fields=['seller', 'day'], name='unique_seller_daily_stats'),
+        ]
+
+    def __str__(self):
+        return f'seller {self.seller_id} on {self.day}'
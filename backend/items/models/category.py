@@ -0,0 +1,90 @@
+from django.db import models, transaction
+from django.db.models import Count, F
+
+
+class CategorySummary(models.Model):
+    ''' Available-item count per category, kept in step with Item saves/deletes (see items/signals.py).
+        custom_category is only part of the key for 'other' items, matching Item.display_category. '''
+    item_category = models.CharField(max_length=50)
+    custom_category = models.CharField(max_length=100, blank=True)
+    item_count = models.IntegerField(default=0)
+
+    class Meta:
+        app_label = 'items'
+        constraints = [
+            models.UniqueConstraint(fields=['item_category', 'custom_category'], name='unique_category_summary'),
+        ]
+
+    def __str__(self):
+        return f'{self.label} ({self.item_count})'
+
+    ''' PROPERTIES '''
+    # Value accepted by the item search category filter
+    @property
+    def value(self):
+        return self.custom_category or self.item_category
+
+    @property
+    def label(self):
+        from .item import Item
+
+        if self.custom_category:
+            return self.custom_category.title()
+        return dict(Item.CATEGORY_CHOICES).get(self.item_category, self.item_category)
+
+    ''' INCREMENTAL UPDATES '''
+    # Summary key an item counts towards, or None when it isn't available
+    @staticmethod
+    def key_for(item_category, custom_category, is_available):
+        if not is_available:
+            return None
+        return (item_category, custom_category if item_category == 'other' else '')
+
+    # Move one item between keys (None = not counted), one UPDATE per side
+    @classmethod
+    def apply_change(cls, old_key=None, new_key=None):
+        if old_key == new_key:
+            return
+        if old_key is not None:
+            cls.objects.filter(item_category=old_key[0], custom_category=old_key[1]).update(
+                item_count=F('item_count') - 1
+            )
+        if new_key is not None:
+            # Insert the row if it's the category's first item, then count it atomically
+            cls.objects.bulk_create(
+                [cls(item_category=new_key[0], custom_category=new_key[1])], ignore_conflicts=True
+            )
+            cls.objects.filter(item_category=new_key[0], custom_category=new_key[1]).update(
+                item_count=F('item_count') + 1
+            )
+
+    # Recompute every row from the items table
+    @classmethod
+    def rebuild(cls):
+        from .item import Item
+
+        counts = {}
+        rows = (
+            Item.objects.filter(is_available=True)
+            .values('item_category', 'custom_category')
+            .annotate(count=Count('id'))
+            .order_by()
+        )
+        for row in rows:
+            key = cls.key_for(row['item_category'], row['custom_category'], True)
+            counts[key] = counts.get(key, 0) + row['count']
+
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create([
+                cls(item_category=category, custom_category=custom, item_count=count)
+                for (category, custom), count in counts.items()
+            ])
+        return len(counts)
+
+    ''' DIRECTORY '''
+    # Categories that currently have available items, largest first
+    @classmethod
+    def directory(cls):
+        rows = cls.objects.filter(item_count__gt=0)
+        return sorted(rows, key=lambda row: (-row.item_count, row.label))
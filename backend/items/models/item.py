@@ -4,9 +4,15 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from django.core.exceptions import ValidationError
-from django.db.models import Q
+from django.db.models import Case, Count, F, IntegerField, Max, OuterRef, Q, Subquery, Sum, Value, When, Window
+from django.db.models.functions import Greatest, RowNumber
 from django.db import transaction
+from collections import Counter
 import uuid
+from items.search import get_search_backend
+from items import recently_viewed
+from items.view_counter import view_counter
+from items.analytics import event_log
 
 '''
 CONTENTS:
@@ -15,6 +21,8 @@ CONTENTS:
 ├── Properties              
 ├── Validation & Lifecycle   
 ├── Stock Management       
+├── Pricing
+├── Review Aggregates
 ├── Search & Filtering      
 └── Tracking & Recommendations    
 '''
@@ -22,9 +30,104 @@ class ItemImage(models.Model):
     item = models.ForeignKey('Item', on_delete=models.CASCADE, related_name='item_images')
     image_file = models.ImageField(upload_to='item_images/', null=True, blank=True)
     image_url = models.CharField(max_length=500, blank=True )
+    # Resized WebP/JPEG copies of image_file, written by items/images.py
+    derivatives = models.JSONField(default=dict, blank=True, editable=False)
+    # sha256 of the uploaded file; identical uploads share one stored file
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True, editable=False)
+    # Display order within the item, first image is the primary one
+    position = models.PositiveSmallIntegerField(default=0)
 
     class Meta:
         app_label = 'items'
+        ordering = ['position', 'id']
+        indexes = [
+            models.Index(fields=['item', 'position']),
+        ]
+
+    # Subquery annotations for an item's first image, so list rows don't query it one by one.
+    # item_ref points at the item id from the outer query ('pk' for Item, 'item_id' for cart lines).
+    @classmethod
+    def primary_image_annotations(cls, item_ref='pk'):
+        first = cls.objects.filter(item_id=OuterRef(item_ref)).order_by('position', 'id')
+        return {
+            'primary_image_id': Subquery(first.values('id')[:1]),
+            'primary_image_file': Subquery(first.values('image_file')[:1]),
+            'primary_image_url': Subquery(first.values('image_url')[:1]),
+            'primary_image_derivatives': Subquery(first.values('derivatives')[:1]),
+        }
+
+    # Edit an item's images, writing only the rows that change:
+    #   keep    ids to keep, everything else is removed (None keeps all but `remove`)
+    #   remove  ids to delete
+    #   files, urls  new images, appended in that order
+    #   order   ids in display order; images not listed keep their relative order after them
+    # A new image identical to an existing one (same upload hash or URL) isn't inserted
+    # again: it stays put if kept, or takes the incoming slot if it was being removed.
+    # Uploads already stored for any item reuse that file instead of writing a copy.
+    @classmethod
+    def apply_changes(cls, item, keep=None, remove=(), files=(), urls=(), order=None):
+        from items.images import content_hash, needs_derivatives, schedule_derivatives
+
+        existing = list(cls.objects.filter(item=item))
+        remove = set(remove)
+        keep = None if keep is None else set(keep)
+        kept = [img for img in existing if img.id not in remove and (keep is None or img.id in keep)]
+        dropped = {img.id: img for img in existing if img not in kept}
+
+        by_hash = {img.content_hash: img for img in existing if img.content_hash}
+        by_url = {img.image_url: img for img in existing if img.image_url and not img.image_file}
+        hashed = [(content_hash(f), f) for f in files]
+        stored = {
+            img.content_hash: img
+            for img in cls.objects.filter(content_hash__in={h for h, _ in hashed}).exclude(image_file='')
+        }
+
+        incoming, seen = [], set()
+        candidates = [(('hash', h), by_hash.get(h), f) for h, f in hashed]
+        candidates += [(('url', u), by_url.get(u), u) for u in (str(u).strip() for u in urls) if u]
+        for key, match, value in candidates:
+            if key in seen or (match is not None and match.id not in dropped):
+                continue
+            seen.add(key)
+            if match is not None:
+                dropped.pop(match.id)
+                incoming.append(match)
+            elif key[0] == 'url':
+                incoming.append(cls(item=item, image_url=value))
+            elif key[1] in stored:
+                source = stored[key[1]]
+                incoming.append(cls(
+                    item=item, image_file=source.image_file.name,
+                    derivatives=source.derivatives, content_hash=key[1],
+                ))
+            else:
+                incoming.append(cls(item=item, image_file=value, content_hash=key[1]))
+
+        if order:
+            rank = {image_id: index for index, image_id in enumerate(order)}
+            kept.sort(key=lambda img: rank.get(img.id, len(rank)))
+        final = kept + incoming
+
+        moved, created = [], []
+        for position, img in enumerate(final):
+            if img.pk is None:
+                created.append(img)
+            elif img.position != position:
+                moved.append(img)
+            img.position = position
+
+        with transaction.atomic():
+            if dropped:
+                cls.objects.filter(id__in=dropped).delete()
+            cls.objects.bulk_update(moved, ['position'])
+            cls.objects.bulk_create(created)
+            for img in created:
+                if needs_derivatives(img):
+                    schedule_derivatives(img.pk)
+            # Reorders leave the image ids alone, so mark the item itself as changed
+            if dropped or moved or created:
+                Item.objects.filter(pk=item.pk).update(updated_at=timezone.now())
+        return final
 
 class Item(models.Model):
     ''' FIELDS AND CHOICES '''
@@ -45,12 +148,34 @@ class Item(models.Model):
         ('collectibles', 'Collectibles & Art'),
         ('other', 'Other'),
     ]
+    REVIEW_AGGREGATE_FIELDS = (
+        'review_count', 'rating_sum', 'review_media_count',
+        'rating_1_count', 'rating_2_count', 'rating_3_count', 'rating_4_count', 'rating_5_count',
+    )
+    # Columns only ever changed with F() updates (view_counter flushes, checkout, stock
+    # holds, adjust_stock). A plain save() of an existing item does NOT write them:
+    # setting item.item_quantity and calling save() changes nothing. Change stock with
+    # adjust_stock(delta), or, holding the row lock, save(update_fields=[...]).
+    CONCURRENT_FIELDS = ('view_count', 'times_purchased', 'item_quantity')
     CONDITION_CHOICES = [
         ('new', 'New'),
         ('used', 'Used'),
         ('open_box', 'Open Box'),
         ('refurbished', 'Refurbished'),
     ]
+    # Lower bounds of the price histogram buckets used by get_facets
+    PRICE_BUCKETS = (0, 25, 50, 100, 250, 500, 1000)
+    # Fields effective_price/discount_percentage are derived from
+    PRICING_SOURCE_FIELDS = ('item_price', 'is_on_sale', 'sale_price', 'sale_start_date', 'sale_end_date')
+    PRICING_FIELDS = ('effective_price', 'discount_percentage')
+    # search_items sort options; the keyset paginator adds id as the tie-breaker
+    SORT_ORDERINGS = {
+        'popular': ('-view_count', '-created_at'),
+        'newest': ('-created_at',),
+        'price_asc': ('effective_price',),
+        'price_desc': ('-effective_price',),
+        'discount': ('-discount_percentage', 'effective_price'),
+    }
     
     # Basic fields
     item_name = models.CharField(max_length=100, db_index=True)
@@ -97,10 +222,25 @@ class Item(models.Model):
     sale_start_date = models.DateTimeField(null=True, blank=True)
     sale_end_date = models.DateTimeField(null=True, blank=True)
 
+    # Price the buyer pays right now and its discount, stored so SQL can filter and sort on them.
+    # Recomputed on save and by refresh_sale_prices when a sale starts or ends.
+    effective_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
+    discount_percentage = models.PositiveSmallIntegerField(default=0, editable=False)
+
     # Analytics fields
     view_count = models.PositiveIntegerField(default=0, editable=False)
     times_purchased = models.PositiveIntegerField(default=0, editable=False)
 
+    # Review aggregates, kept in step with Review create/update/delete (see items/signals.py)
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_1_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_2_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_3_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_4_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_5_count = models.PositiveIntegerField(default=0, editable=False)
+    review_media_count = models.PositiveIntegerField(default=0, editable=False)
+
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True, editable=False)
     updated_at = models.DateTimeField(auto_now=True, editable=False)
@@ -116,7 +256,8 @@ class Item(models.Model):
             models.Index(fields=['is_available', '-view_count']),          # Trending items
             models.Index(fields=['is_available', '-times_purchased']),     # Best sellers
             models.Index(fields=['is_on_sale', 'is_available']),           # Sale items
-            models.Index(fields=['item_price']),                           # Price range filtering (within available items)
+            models.Index(fields=['is_available', 'effective_price']),      # Price range filtering and price sorts
+            models.Index(fields=['is_available', '-discount_percentage']), # Biggest discounts
             models.Index(fields=['seller', 'is_available']),               # Seller's available items
         ]
     
@@ -142,10 +283,13 @@ class Item(models.Model):
     # Check the sale status and dates
     @property
     def is_sale_active(self):
+        return self.sale_active_at(timezone.now())
+
+    # Whether the sale applies at the given moment
+    def sale_active_at(self, now):
         if not self.is_on_sale or not self.sale_price:
             return False
         
-        now = timezone.now()
         if self.sale_start_date and now < self.sale_start_date:
             return False 
         if self.sale_end_date and now > self.sale_end_date:
@@ -158,12 +302,21 @@ class Item(models.Model):
     def is_in_stock(self):
         return self.item_quantity > 0 and self.is_available
     
-    # Calculate discount percentage if on sale
+    # Review summary built from the stored aggregates, same shape as Review.get_item_stats
     @property
-    def discount_percentage(self):
-        if self.is_sale_active and self.sale_price:
-            return round(((self.item_price - self.sale_price) / self.item_price) * 100)
-        return 0
+    def review_stats(self):
+        if not self.review_count:
+            return None
+
+        total = self.review_count
+        four_plus_count = self.rating_4_count + self.rating_5_count
+        return {
+            'total_reviews': total,
+            'average_rating': round(self.rating_sum / total, 1),
+            'rating_distribution': {str(i): getattr(self, f'rating_{i}_count') for i in range(5, 0, -1)},
+            'percentage_recommend': round(four_plus_count / total * 100, 1),
+            'reviews_with_media': self.review_media_count,
+        }
     
     ''' VALIDATION AND LIFECYCLE '''
     def __str__(self):
@@ -179,6 +332,21 @@ class Item(models.Model):
         if not self.item_sku:
             self.item_sku = self.generate_sku()
         
+        # Plain saves of an existing item never write the review aggregates or the
+        # CONCURRENT_FIELDS, so a stale instance can't clobber values updated concurrently
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            skipped = set(self.REVIEW_AGGREGATE_FIELDS) | set(self.CONCURRENT_FIELDS)
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in skipped
+            ]
+
+        # Keep the stored price in step, including partial saves that touch a pricing field
+        self.refresh_pricing()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(self.PRICING_SOURCE_FIELDS):
+            kwargs['update_fields'] = set(update_fields) | set(self.PRICING_FIELDS)
+
         self.full_clean()
         super().save(*args, **kwargs)
     
@@ -218,15 +386,24 @@ class Item(models.Model):
                 item.item_quantity -= amount
                 item.times_purchased += amount
                 item.save(update_fields=['item_quantity', 'times_purchased'])
+                event_log.record_on_commit('purchase', item, quantity=amount, amount=item.current_price * amount)
                 return True
             return False
     
-    # Increment view count atomically and return new value
+    # Add delta (negative to remove) to the stock with one F() update, never going below
+    # zero. Seller edits go through here, since a plain save doesn't write item_quantity.
+    def adjust_stock(self, delta):
+        if not delta:
+            return
+        Item.objects.filter(id=self.id).update(
+            item_quantity=Greatest(F('item_quantity') + delta, 0), updated_at=timezone.now(),
+        )
+        self.refresh_from_db(fields=['item_quantity', 'updated_at'])
+    
+    # Count a page view without touching the database (flushed in batches, see items/view_counter.py)
+    # and return the view count including views not yet written
     def increment_view_count(self):
-        Item.objects.filter(id=self.id).update(view_count=models.F('view_count') + 1)
-        # Update the instance's view_count to reflect the change
-        self.refresh_from_db(fields=['view_count'])
-        return self.view_count
+        return self.view_count + view_counter.increment(self.id)
     
     # Generate a unique SKU based on category and random UUID
     def generate_sku(self):
@@ -244,31 +421,144 @@ class Item(models.Model):
             if not Item.objects.filter(item_sku=sku).exists():
                 return sku
     
+    ''' PRICING '''
+    # (sale active, price paid, discount %) at the given moment, from the source fields
+    def pricing_at(self, now):
+        if self.sale_active_at(now) and self.item_price:
+            return True, self.sale_price, round(((self.item_price - self.sale_price) / self.item_price) * 100)
+        return False, self.item_price, 0
+
+    # Recompute effective_price/discount_percentage; returns True if either changed
+    def refresh_pricing(self, now=None):
+        _, price, discount = self.pricing_at(now or timezone.now())
+        changed = (price, discount) != (self.effective_price, self.discount_percentage)
+        self.effective_price, self.discount_percentage = price, discount
+        return changed
+
+    # SQL condition for "the sale applies at now", mirroring sale_active_at
+    @staticmethod
+    def sale_active_q(now):
+        return (
+            Q(is_on_sale=True, sale_price__isnull=False)
+            & (Q(sale_start_date__isnull=True) | Q(sale_start_date__lte=now))
+            & (Q(sale_end_date__isnull=True) | Q(sale_end_date__gte=now))
+        )
+
+    # Flip the stored price of items whose sale started or ended since they were last saved.
+    # Only rows whose stored price disagrees with the sale window are loaded.
+    @classmethod
+    def refresh_sale_prices(cls, now=None, batch_size=500):
+        now = now or timezone.now()
+        active = cls.sale_active_q(now)
+        stale = cls.objects.filter(
+            (active & ~Q(effective_price=F('sale_price'))) |
+            (~active & ~Q(effective_price=F('item_price')))
+        ).only('id', *cls.PRICING_SOURCE_FIELDS, *cls.PRICING_FIELDS)
+
+        changed = [item for item in stale.iterator(chunk_size=batch_size) if item.refresh_pricing(now)]
+        # A price change is a change to the item (detail and cart validators read updated_at)
+        for item in changed:
+            item.updated_at = now
+        cls.objects.bulk_update(changed, [*cls.PRICING_FIELDS, 'updated_at'], batch_size=batch_size)
+        return len(changed)
+
+    ''' REVIEW AGGREGATES '''
+    # Apply a review change to the stored aggregates with a single UPDATE.
+    # old/new are (rating, has_media) tuples, or None for create/delete.
+    @classmethod
+    def apply_review_change(cls, item_id, old=None, new=None):
+        deltas = Counter()
+        for state, sign in ((old, -1), (new, 1)):
+            if state is None:
+                continue
+            rating, has_media = state
+            deltas['review_count'] += sign
+            deltas['rating_sum'] += sign * rating
+            deltas[f'rating_{rating}_count'] += sign
+            deltas['review_media_count'] += sign * int(has_media)
+
+        updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+        if updates:
+            cls.objects.filter(id=item_id).update(**updates)
+
+    # Recompute every item's review aggregates from the reviews table
+    @classmethod
+    def rebuild_review_aggregates(cls):
+        from .review import Review
+
+        star_counts = {
+            f'rating_{i}_count': Count('id', filter=Q(rating=i)) for i in range(1, 6)
+        }
+        rows = Review.objects.values('item_id').annotate(
+            review_count=Count('id'),
+            rating_sum=Sum('rating'),
+            review_media_count=Count('id', filter=Q(media__isnull=False) & ~Q(media='')),
+            **star_counts,
+        ).order_by()
+
+        with transaction.atomic():
+            cls.objects.update(**{field: 0 for field in cls.REVIEW_AGGREGATE_FIELDS})
+            items = []
+            for row in rows:
+                item = cls(id=row.pop('item_id'))
+                for field, value in row.items():
+                    setattr(item, field, value or 0)
+                items.append(item)
+            cls.objects.bulk_update(items, cls.REVIEW_AGGREGATE_FIELDS, batch_size=500)
+        return len(items)
+
+    ''' CONDITIONAL GET '''
+    # Validators for the detail response: (version parts, last modified). Reviews and images
+    # are folded in with one aggregate each. Counters written with UPDATE (stock, sales) are
+    # read off the row; view_count is left out so page views don't invalidate cached copies.
+    def detail_version(self):
+        reviews = self.reviews.aggregate(count=Count('id'), latest=Max('updated_at'))
+        images = self.item_images.aggregate(count=Count('id'), latest=Max('id'))
+        parts = (
+            self.pk, self.updated_at.isoformat(), self.item_quantity, self.times_purchased,
+            self.is_sale_active, reviews['count'], reviews['latest'], images['count'], images['latest'],
+        )
+        last_modified = max(filter(None, (self.updated_at, reviews['latest'])))
+        return parts, last_modified
+
     ''' SEARCH AND FILTERING '''
+    # Attach everything ItemListSerializer needs (primary image) to a queryset,
+    # so serializing a page of items costs no extra queries
+    @classmethod
+    def for_listing(cls, queryset=None):
+        queryset = cls.objects.all() if queryset is None else queryset
+        return queryset.annotate(**ItemImage.primary_image_annotations())
+
+    # Items with at least one review rated min_rating stars or more
+    @staticmethod
+    def rated_at_least(min_rating):
+        condition = Q()
+        for stars in range(max(int(min_rating), 1), 6):
+            condition |= Q(**{f'rating_{stars}_count__gt': 0})
+        return condition if condition else Q(pk__in=[])
+
     # Search items with multiple filters
     @classmethod
     def search_items(cls, query=None, category=None, min_price=None, max_price=None, 
-                    condition=None, is_on_sale=None, min_rating=None):
+                    condition=None, is_on_sale=None, min_rating=None, fuzzy=True, sort=None):
         items = cls.objects.select_related('seller').filter(is_available=True)
 
-        # Text search filter
+        # Full-text search filter, annotates search_rank for relevance ordering.
+        # Nothing found usually means a typo, so fall back to trigram similarity.
         if query:
-            items = items.filter(
-                Q(item_name__icontains=query) | 
-                Q(item_summary__icontains=query) | 
-                Q(item_desc__icontains=query)
-            )
+            backend = get_search_backend()
+            items = backend.search_with_fallback(items, query) if fuzzy else backend.search(items, query)
         
         # Category filter
         if category:
             category = category.lower().strip()
             items = items.filter(Q(item_category=category) | Q(custom_category=category))
         
-        # Price filters
+        # Price filters, on the price the buyer actually pays
         if min_price is not None:
-            items = items.filter(item_price__gte=min_price)
+            items = items.filter(effective_price__gte=min_price)
         if max_price is not None:
-            items = items.filter(item_price__lte=max_price)
+            items = items.filter(effective_price__lte=max_price)
         
         # Boolean filters
         if condition:
@@ -276,50 +566,135 @@ class Item(models.Model):
         if is_on_sale is not None:
             items = items.filter(is_on_sale=is_on_sale)
         
-        # Rating filter (requires subquery)
+        # Has a review rated min_rating or better, read from the stored per-star counts
         if min_rating is not None:
-            from django.db.models import Subquery, OuterRef
-            rated_items = cls.objects.filter(
-                id=OuterRef('id'),
-                reviews__rating__gte=min_rating
-            ).values('id')
-            items = items.filter(id__in=Subquery(rated_items))
+            items = items.filter(cls.rated_at_least(min_rating))
         
-        return items.order_by('-view_count', '-created_at')
+        # Explicit sort first; otherwise most relevant when searching, most popular when browsing
+        if sort in cls.SORT_ORDERINGS:
+            return items.order_by(*cls.SORT_ORDERINGS[sort])
+        if query:
+            return items.order_by('-search_rank', *cls.SORT_ORDERINGS['popular'])
+        return items.order_by(*cls.SORT_ORDERINGS['popular'])
+
+    # Per-facet counts for the items matching the search filters, from one grouped query.
+    # Every facet counts the same filtered result set.
+    @classmethod
+    def get_facets(cls, **filters):
+        buckets = list(enumerate(cls.PRICE_BUCKETS))
+        price_bucket = Case(
+            *[When(effective_price__gte=lower, then=Value(index)) for index, lower in reversed(buckets)],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        # Best star rating the item has received (0 = no reviews yet), so "N & up"
+        # counts exactly the items min_rating=N matches
+        rating_band = Case(
+            *[When(**{f'rating_{band}_count__gt': 0}, then=Value(band)) for band in range(5, 0, -1)],
+            default=Value(0),
+            output_field=IntegerField(),
+        )
+        rows = (
+            cls.search_items(**filters)
+            .order_by()
+            .annotate(price_bucket=price_bucket, rating_band=rating_band)
+            .values('item_category', 'custom_category', 'item_condition', 'is_on_sale', 'price_bucket', 'rating_band')
+            .annotate(count=Count('id'))
+        )
+
+        total = 0
+        categories, conditions, on_sale = Counter(), Counter(), Counter()
+        rating_bands, prices = Counter(), Counter()
+        for row in rows:
+            count = row['count']
+            total += count
+            custom = row['item_category'] == 'other' and row['custom_category']
+            categories[row['custom_category'] if custom else row['item_category']] += count
+            conditions[row['item_condition']] += count
+            on_sale[row['is_on_sale']] += count
+            rating_bands[row['rating_band']] += count
+            prices[row['price_bucket']] += count
 
-    # Return a sorted post of all unique display category names for available items
-    # with custom categories included if not empty
+        category_labels = dict(cls.CATEGORY_CHOICES)
+        condition_labels = dict(cls.CONDITION_CHOICES)
+        return {
+            'total': total,
+            'category': [
+                {'value': key, 'label': category_labels.get(key, key.title()), 'count': count}
+                for key, count in categories.most_common()
+            ],
+            'condition': [
+                {'value': key, 'label': condition_labels.get(key, key), 'count': count}
+                for key, count in conditions.most_common()
+            ],
+            'on_sale': {'true': on_sale[True], 'false': on_sale[False]},
+            # "N & up" bands, matching the min_rating filter
+            'rating': [
+                {'min_rating': band, 'label': f'{band} & up', 'count': sum(rating_bands[b] for b in range(band, 6))}
+                for band in range(4, 0, -1)
+            ],
+            'price': [
+                {
+                    'min': lower,
+                    'max': cls.PRICE_BUCKETS[index + 1] if index + 1 < len(cls.PRICE_BUCKETS) else None,
+                    'count': prices[index],
+                }
+                for index, lower in buckets
+            ],
+        }
+
+    # Return a sorted list of all unique display category names for available items
+    # with custom categories included, read from the category summary table
     @classmethod
     def get_all_categories(cls):
-        # Get all unique internal category keys for available items
-        display_categories = cls.objects.filter(is_available=True).values_list('item_category', flat=True).distinct()
+        from .category import CategorySummary
 
-        # Map internal keys to display names
         display_map = dict(cls.CATEGORY_CHOICES)
-        display_names = {display_map.get(cat, cat) for cat in display_categories}
-
-        # Add non-empty custom categories for 'other' items
-        custom = cls.objects.filter(
-            item_category='other',
-            custom_category__isnull=False,
-            custom_category__gt='',
-            is_available=True
-        ).values_list('custom_category', flat=True).distinct()
-        display_names.update(custom)
+        display_names = set()
+        for category, custom in CategorySummary.objects.filter(item_count__gt=0).values_list('item_category', 'custom_category'):
+            display_names.add(display_map.get(category, category))
+            if custom:
+                display_names.add(custom)
         return sorted(display_names)
     
-    # Return all the trending items based on views and purchases
+    # Return the trending items, read top-K from the precomputed TrendingScore table
+    # (see recompute_trending) on its own (category, -score) indexes, then the listing rows
+    # for those ids. Before the first recompute, fall back to all-time counts.
     @classmethod
-    def get_trending_items(cls, limit=10):
-        return cls.objects.filter(
-            is_available=True
-        ).order_by('-view_count', '-times_purchased')[:limit]
+    def get_trending_items(cls, limit=10, category=None):
+        from .trending import TrendingScore
+
+        scores = TrendingScore.objects.all()
+        category = (category or '').lower().strip()
+        if category:
+            scores = scores.filter(Q(item_category=category) | Q(custom_category=category))
+        ranked_ids = scores.order_by('-score').values_list('item_id', flat=True)
+
+        # Pages of ids with a few spares for items that went unavailable since the last
+        # recompute; further pages are read only while fewer than limit are available
+        page, found, offset, any_scored = limit * 2, [], 0, False
+        while len(found) < limit:
+            top_ids = list(ranked_ids[offset:offset + page])
+            any_scored = any_scored or bool(top_ids)
+            if top_ids:
+                available = cls.for_listing().filter(id__in=top_ids, is_available=True).in_bulk()
+                found.extend(available[item_id] for item_id in top_ids if item_id in available)
+            if len(top_ids) < page:
+                break
+            offset += page
+
+        if any_scored or TrendingScore.objects.exists():
+            return found[:limit]
+
+        items = cls.for_listing().filter(is_available=True)
+        if category:
+            items = items.filter(Q(item_category=category) | Q(custom_category=category))
+        return items.order_by('-view_count', '-times_purchased')[:limit]
     
-    # Return best selling items across some categories
+    # Return best selling items across some categories, {display name: [items]},
+    # numbered per category with ROW_NUMBER() so every category comes back in one query
     @classmethod
     def get_best_sellers_by_category(cls, items_each_category, max_categories):
-        categories = {}
-
         # Popular categories to display as default
         popular_categories = [
             'electronics', 'clothing', 'home_kitchen', 'beauty_personal',
@@ -327,60 +702,70 @@ class Item(models.Model):
             'jewelry_accessories', 'toys_games', 'automotive',
         ][:max_categories]
 
-        for cat in popular_categories:
-            # Get the queryset of best selling items for the category 
-            best_sellers = cls.objects.filter(
-                item_category = cat, 
-                is_available=True
-            ).order_by('-times_purchased', '-view_count')[:items_each_category]
+        ranked = cls.for_listing().filter(
+            item_category__in=popular_categories,
+            is_available=True
+        ).annotate(category_rank=Window(
+            RowNumber(),
+            partition_by=F('item_category'),
+            order_by=[F('times_purchased').desc(), F('view_count').desc(), F('id').asc()],
+        )).filter(category_rank__lte=items_each_category).order_by('item_category', 'category_rank')
 
-            # If there are best sellers, add them to the categories dictionary
-            if best_sellers.exists():
-                # Create a dummy to get the display name then use it as key
-                # Convert the queryset to a list of items store it with the key
-                dummy_item = cls(item_category=cat)
-                display_name = dummy_item.get_item_category_display()
-                categories[display_name] = list(best_sellers)
+        by_category = {}
+        for item in ranked:
+            by_category.setdefault(item.item_category, []).append(item)
 
-        return categories
+        # Keep the popular_categories order and skip categories with no items
+        display_map = dict(cls.CATEGORY_CHOICES)
+        return {display_map[cat]: by_category[cat] for cat in popular_categories if cat in by_category}
+
+    # Best sellers of one category; 'other' items are matched on their custom category when given
+    @classmethod
+    def get_best_sellers_in_category(cls, item_category, custom_category='', limit=8, exclude=()):
+        items = cls.for_listing().filter(item_category=item_category, is_available=True)
+        if item_category == 'other' and custom_category:
+            items = items.filter(custom_category=custom_category.strip().lower())
+        return items.exclude(id__in=exclude).order_by('-times_purchased', '-view_count', 'id')[:limit]
 
     ''' TRACKING & RECOMMENDATIONS '''
-    # Track item view in session
+    # Track item view in the visitor's recently viewed list (cache-backed, see items/recently_viewed.py)
     @classmethod
     def track_view(cls, item_id, request, limit):
-        # Get the viewed items 
-        viewed = request.session.get('viewed_items', [])
-        
-        # Remove duplicate item_id if it exists
-        if item_id in viewed:
-            viewed.remove(item_id)
-        
-        # Simulate stack behavior: insert at the top
-        viewed.insert(0, item_id)
-        request.session['viewed_items'] = viewed[:limit]  
-
-        # RequestFactory tests sometimes use a plain dict for session.
-        if hasattr(request.session, 'modified'):
-            request.session.modified = True
+        recently_viewed.push(request, item_id, limit)
     
-    # Get recently viewed items from session
+    # Get recently viewed items, most recent first
     @classmethod
     def get_recently_viewed(cls, request, limit):
         #  Get the viewed items
-        item_viewed = request.session.get('viewed_items', [])[:limit]
+        item_viewed = recently_viewed.get_ids(request, limit)
         
         # Return empty queryset if no items viewed
         if not item_viewed:
             return cls.objects.none()
         
         # Create a dictionary of items for fast lookup
-        items = {item.id: item for item in cls.objects.filter(
+        items = {item.id: item for item in cls.for_listing().filter(
             id__in=item_viewed, is_available=True
         )}
         
         # Return the items in the order they were viewed
         return [items[item_id] for item_id in item_viewed if item_id in items]
     
+    # Items most often bought together with any of item_ids (see ItemNeighbor), best first.
+    # One query on the neighbour index; scores add up when several seeds share a neighbour.
+    @classmethod
+    def get_bought_together(cls, item_ids, limit, exclude=()):
+        item_ids = list(item_ids)
+        if not item_ids:
+            return cls.objects.none()
+        return (
+            cls.for_listing()
+            .filter(neighbor_of__item_id__in=item_ids, is_available=True)
+            .exclude(id__in=set(item_ids) | set(exclude))
+            .annotate(neighbor_score=Sum('neighbor_of__score'))
+            .order_by('-neighbor_score', 'id')[:limit]
+        )
+
     # Get recommendations based on viewing history
     @classmethod
     def get_recommendations(cls, request, limit):
@@ -391,12 +776,17 @@ class Item(models.Model):
         if not recent:
             return cls.get_trending_items(limit)
 
-        # Get categories of recently viewed items and their IDs for exclusion
-        categories = [item.item_category for item in recent]
+        # Items bought together with the recently viewed ones come first
         viewed_ids = [item.id for item in recent]
-        
-        # Filter items by categories, excluding recently viewed items
-        return cls.objects.filter(
+        recommended = list(cls.get_bought_together(viewed_ids, limit))
+        if len(recommended) >= limit:
+            return recommended
+
+        # Top up with best sellers from the same categories, excluding recently viewed items
+        categories = [item.item_category for item in recent]
+        exclude_ids = viewed_ids + [item.id for item in recommended]
+        recommended += cls.for_listing().filter(
             item_category__in=categories,
             is_available=True
-        ).exclude(id__in=viewed_ids).order_by('-times_purchased')[:limit]
\ No newline at end of file
+        ).exclude(id__in=exclude_ids).order_by('-times_purchased')[:limit - len(recommended)]
+        return recommended
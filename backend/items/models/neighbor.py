@@ -0,0 +1,89 @@
+import heapq
+import math
+from collections import Counter, defaultdict
+
+from django.db import models, transaction
+from django.db.models import Count, F
+
+
+class ItemNeighbor(models.Model):
+    ''' Top-N items most often bought together with an item, scored by cosine similarity
+        of their order vectors. Rebuilt offline from OrderItem (see rebuild). '''
+    # Neighbours kept per item
+    TOP_N = 20
+    # Orders with more distinct items than this are skipped; they add many weak pairs
+    MAX_BASKET_SIZE = 50
+    # Orders aggregated per pair-counting query
+    ORDER_BATCH = 2000
+
+    item = models.ForeignKey('Item', on_delete=models.CASCADE, related_name='neighbors')
+    neighbor = models.ForeignKey('Item', on_delete=models.CASCADE, related_name='neighbor_of')
+    score = models.FloatField()
+
+    class Meta:
+        app_label = 'items'
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'neighbor'], name='unique_item_neighbor'),
+        ]
+        indexes = [
+            models.Index(fields=['item', '-score']),
+        ]
+
+    def __str__(self):
+        return f'{self.item_id} -> {self.neighbor_id} ({self.score:.3f})'
+
+    # Co-purchase counts from every non-cancelled order, normalized as
+    # cosine(i, j) = orders with both / sqrt(orders with i * orders with j).
+    # Orders are read ORDER_BATCH at a time and the database counts each batch's pairs
+    # with an OrderItem self-join grouped by (item, neighbour), so order lines never
+    # reach Python and memory grows with the distinct pairs that occur, not with lines.
+    @classmethod
+    def rebuild(cls, top_n=None, batch_size=None):
+        from orders.models import Order, OrderItem
+
+        top_n = top_n or cls.TOP_N
+        batch_size = batch_size or cls.ORDER_BATCH
+        orders = (
+            Order.objects.exclude(status='cancelled')
+            .annotate(basket=Count('items__item_id', distinct=True))
+            .filter(basket__lte=cls.MAX_BASKET_SIZE)
+            .order_by('id')
+            .values_list('id', flat=True)
+        )
+
+        item_orders = Counter()
+        pair_orders = Counter()
+        last_id = 0
+        while True:
+            batch = list(orders.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1]
+            lines = OrderItem.objects.filter(order_id__in=batch).order_by()
+            item_orders.update(dict(
+                lines.values('item_id').annotate(n=Count('order_id', distinct=True)).values_list('item_id', 'n')
+            ))
+            pairs = (
+                lines.filter(order__items__item_id__gt=F('item_id'))
+                .values('item_id', 'order__items__item_id')
+                .annotate(n=Count('order_id', distinct=True))
+                .values_list('item_id', 'order__items__item_id', 'n')
+            )
+            for a, b, together in pairs:
+                pair_orders[(a, b)] += together
+
+        candidates = defaultdict(list)
+        for (a, b), together in pair_orders.items():
+            score = together / math.sqrt(item_orders[a] * item_orders[b])
+            candidates[a].append((score, b))
+            candidates[b].append((score, a))
+
+        rows = [
+            cls(item_id=item_id, neighbor_id=neighbor_id, score=score)
+            for item_id, scored in candidates.items()
+            for score, neighbor_id in heapq.nlargest(top_n, scored)
+        ]
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(rows, batch_size=1000)
+        return len(candidates)
@@ -3,11 +3,20 @@ from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from django.db import transaction
 from django.db.models import Avg, Count, Q
 # For checking media types
 import mimetypes
 
 class Review(models.Model):
+    # Orderings accepted by the item review listing; the id tie-breaker is added by the paginator
+    SORT_ORDERINGS = {
+        'helpful': ('-helpful_count',),
+        'newest': ('-created_at',),
+        'rating_high': ('-rating',),
+        'rating_low': ('rating',),
+    }
+
     ''' FIELDS'''
     # Relationships
     item = models.ForeignKey('Item', on_delete=models.CASCADE, related_name='reviews')
@@ -62,6 +71,7 @@ class Review(models.Model):
             models.Index(fields=['item', 'rating']),            # Reviews for this item with this rating
             models.Index(fields=['reviewer']),                  # Reviews by this user
             models.Index(fields=['item', '-helpful_count']),    # Reviews for this item sorted by helpfulness
+            models.Index(fields=['item', '-created_at']),       # Reviews for this item, newest first
             models.Index(fields=['order']),                     # Reviews associated with this order
         ]
 
@@ -110,7 +120,9 @@ class Review(models.Model):
             self.is_verified_purchase = True
         
         self.full_clean()  # This calls clean() and validates everything
-        super().save(*args, **kwargs)
+        # Same transaction as the item's review aggregates, updated from the save signals
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     # Increment helpful count
     def mark_helpful(self):
@@ -127,8 +139,14 @@ class Review(models.Model):
             return True
         return False
     
+    # (rating, has_media) as counted by the item's review aggregates
+    @property
+    def aggregate_state(self):
+        return (self.rating, bool(self.media))
+
     ''' CLASS METHODS '''
-    # Get the stats for item reviews for display on item page
+    # Compute the stats for item reviews straight from the reviews table.
+    # Serializers read the stored copy instead (Item.review_stats).
     @classmethod
     def get_item_stats(cls, item):
         reviews = cls.objects.filter(item=item)
@@ -153,7 +171,7 @@ class Review(models.Model):
         # Calculations
         total = stats['total_reviews']
         recommend_percentage = (stats['four_plus_count'] / total * 100) if total > 0 else 0
-        media_count = reviews.filter(media__isnull=False).count()
+        media_count = reviews.exclude(Q(media='') | Q(media__isnull=True)).count()
         
         return {
             'total_reviews': stats['total_reviews'],  
@@ -163,6 +181,28 @@ class Review(models.Model):
             'reviews_with_media': media_count,
         }
     
+    # Reviews of one item for the paginated listing, filtered and in one of SORT_ORDERINGS
+    @classmethod
+    def for_item(cls, item, sort='helpful', rating=None, has_media=None):
+        reviews = cls.objects.filter(item=item).select_related('reviewer')
+        if rating is not None:
+            reviews = reviews.filter(rating=rating)
+        if has_media is not None:
+            no_media = Q(media='') | Q(media__isnull=True)
+            reviews = reviews.exclude(no_media) if has_media else reviews.filter(no_media)
+        return reviews.order_by(*cls.SORT_ORDERINGS.get(sort, cls.SORT_ORDERINGS['helpful']))
+
+    # Ids of the given reviews that user has upvoted, in a single query
+    @classmethod
+    def upvoted_ids(cls, user, reviews):
+        if user is None or not user.is_authenticated:
+            return set()
+        return set(
+            cls.upvoted_by.through.objects.filter(
+                user_id=user.pk, review_id__in=[review.pk for review in reviews]
+            ).values_list('review_id', flat=True)
+        )
+
     # Get reviews with media uploaded, limit for display purposes
     @classmethod
     def get_reviews_with_media(cls, item, limit=None):
@@ -0,0 +1,96 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
+
+
+# Start of the hour a timestamp falls in
+def hour_bucket(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+class ItemActivityBucket(models.Model):
+    ''' Views and purchases of one item during one hour; the raw input of the trending score '''
+    item = models.ForeignKey('Item', on_delete=models.CASCADE, related_name='activity_buckets')
+    hour = models.DateTimeField()
+    views = models.PositiveIntegerField(default=0)
+    purchases = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        app_label = 'items'
+        constraints = [
+            models.UniqueConstraint(fields=['item', 'hour'], name='unique_item_activity_hour'),
+        ]
+        indexes = [
+            models.Index(fields=['hour']),
+        ]
+
+    def __str__(self):
+        return f'{self.item_id} @ {self.hour:%Y-%m-%d %H:00} ({self.views} views, {self.purchases} purchases)'
+
+    # Drop buckets older than the given number of days
+    @classmethod
+    def prune(cls, days, now=None):
+        cutoff = (now or timezone.now()) - timedelta(days=days)
+        return cls.objects.filter(hour__lt=cutoff).delete()[0]
+
+
+class TrendingScore(models.Model):
+    ''' Precomputed, time-decayed trending score per item (see recompute).
+        Category fields are copied from the item so per-category top-K reads use one index. '''
+    # A purchase counts as much as this many views
+    PURCHASE_WEIGHT = 5
+
+    item = models.OneToOneField('Item', on_delete=models.CASCADE, primary_key=True, related_name='trending')
+    item_category = models.CharField(max_length=50)
+    custom_category = models.CharField(max_length=100, blank=True)
+    score = models.FloatField()
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        app_label = 'items'
+        indexes = [
+            models.Index(fields=['-score']),
+            models.Index(fields=['item_category', '-score']),
+            models.Index(fields=['custom_category', '-score']),
+        ]
+
+    def __str__(self):
+        return f'{self.item_id}: {self.score:.2f}'
+
+    # Sum of (views + PURCHASE_WEIGHT * purchases) per bucket, each halved every half_life_hours
+    # of age, over the last window_hours. Replaces the whole table in one transaction.
+    @classmethod
+    def recompute(cls, now=None, half_life_hours=None, window_hours=None):
+        from .item import Item
+
+        now = now or timezone.now()
+        half_life_hours = half_life_hours or getattr(settings, 'TRENDING_HALF_LIFE_HOURS', 24)
+        window_hours = window_hours or getattr(settings, 'TRENDING_WINDOW_HOURS', 168)
+
+        scores = defaultdict(float)
+        buckets = ItemActivityBucket.objects.filter(
+            hour__gte=now - timedelta(hours=window_hours)
+        ).values_list('item_id', 'hour', 'views', 'purchases')
+        for item_id, hour, views, purchases in buckets.iterator(chunk_size=2000):
+            age_hours = max((now - hour).total_seconds() / 3600, 0)
+            scores[item_id] += (views + cls.PURCHASE_WEIGHT * purchases) * 0.5 ** (age_hours / half_life_hours)
+
+        rows = []
+        item_ids = list(scores)
+        for start in range(0, len(item_ids), 500):
+            available = Item.objects.filter(id__in=item_ids[start:start + 500], is_available=True).values_list(
+                'id', 'item_category', 'custom_category'
+            )
+            for item_id, category, custom in available:
+                rows.append(cls(
+                    item_id=item_id, item_category=category, custom_category=custom,
+                    score=scores[item_id], computed_at=now,
+                ))
+
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(rows, batch_size=500)
+        return len(rows)
@@ -0,0 +1,86 @@
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import models
+from django.utils import timezone
+
+from items.uploads import ConcatenatedReader
+
+
+class MediaUpload(models.Model):
+    ''' One resumable upload of review media. Chunks are stored as separate parts and
+        joined into reviews/media/ once the declared size has arrived; the id is the
+        token the client attaches to its review (see items/uploads.py). '''
+    STATUS_CHOICES = [
+        ('uploading', 'Uploading'),
+        ('complete', 'Complete'),
+    ]
+    PARTS_DIR = 'reviews/uploads'
+    MEDIA_DIR = 'reviews/media'
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='media_uploads')
+    filename = models.CharField(max_length=255, blank=True)
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    # Sniffed from the first chunk, never taken from the client
+    content_type = models.CharField(max_length=50, blank=True)
+    extension = models.CharField(max_length=10, blank=True)
+    parts = models.JSONField(default=list, blank=True)
+    # Assembled file, once complete
+    path = models.CharField(max_length=255, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='uploading')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        app_label = 'items'
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.id} ({self.received}/{self.size} bytes, {self.status})'
+
+    # Store one chunk that starts at self.received; joins the parts once the last one is in
+    def append(self, data):
+        part = default_storage.save(f'{self.PARTS_DIR}/{self.id}/{self.received:012d}.part', ContentFile(data))
+        self.parts = [*self.parts, part]
+        self.received += len(data)
+        if self.received >= self.size:
+            self._assemble()
+        self.save()
+
+    def _assemble(self):
+        reader = ConcatenatedReader(default_storage, self.parts)
+        try:
+            self.path = default_storage.save(f'{self.MEDIA_DIR}/{self.id}{self.extension}', File(reader))
+        finally:
+            reader.close()
+        self._delete_parts()
+        self.status = 'complete'
+
+    def _delete_parts(self):
+        for part in self.parts:
+            default_storage.delete(part)
+        self.parts = []
+
+    # Drop the upload and whatever it has stored; keep_file when a review now owns the file
+    def discard(self, keep_file=False):
+        self._delete_parts()
+        if self.path and not keep_file:
+            default_storage.delete(self.path)
+        self.delete()
+
+    # Uploads abandoned for longer than `hours` (unfinished, or finished but never attached)
+    @classmethod
+    def discard_stale(cls, hours=24, now=None):
+        cutoff = (now or timezone.now()) - timedelta(hours=hours)
+        stale = list(cls.objects.filter(updated_at__lt=cutoff))
+        for upload in stale:
+            upload.discard()
+        return len(stale)
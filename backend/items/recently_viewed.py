@@ -0,0 +1,77 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+'''
+    Recently viewed items per visitor, kept in the cache instead of the session.
+
+    Signed-in users are keyed by user id, so the list follows them across devices
+    and JWT clients. Anonymous visitors get a random id in the VISITOR_COOKIE cookie
+    (clients without cookies can send it back in the X-Visitor-Id header instead).
+    Each list is a short ring buffer, newest first; viewing the item that is already
+    at the head doesn't write at all.
+'''
+
+VISITOR_COOKIE = 'visitor_id'
+VISITOR_HEADER = 'HTTP_X_VISITOR_ID'
+MAX_ITEMS = 20
+
+
+def _valid_visitor_id(value):
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        return None
+
+
+# Anonymous id sent by the client, if any
+def get_visitor_id(request):
+    raw = request.META.get(VISITOR_HEADER) or request.COOKIES.get(VISITOR_COOKIE)
+    return _valid_visitor_id(raw) if raw else None
+
+
+# Cache key for the visitor's list. With create=True a new anonymous id is issued
+# (kept on request.new_visitor_id so the view can set the cookie).
+def _storage_key(request, create=False):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'recently-viewed:user:{user.pk}'
+
+    visitor_id = get_visitor_id(request) or getattr(request, 'new_visitor_id', None)
+    if visitor_id is None and create:
+        visitor_id = request.new_visitor_id = str(uuid.uuid4())
+    return f'recently-viewed:visitor:{visitor_id}' if visitor_id else None
+
+
+def get_ids(request, limit=MAX_ITEMS):
+    key = _storage_key(request)
+    if key is None:
+        return []
+    return (cache.get(key) or [])[:limit]
+
+
+def push(request, item_id, limit=MAX_ITEMS):
+    key = _storage_key(request, create=True)
+    viewed = cache.get(key) or []
+    if viewed[:1] == [item_id]:
+        return viewed
+
+    viewed = [item_id] + [i for i in viewed if i != item_id]
+    viewed = viewed[:limit]
+    cache.set(key, viewed, getattr(settings, 'RECENTLY_VIEWED_TTL_SECONDS', 60 * 60 * 24 * 30))
+    return viewed
+
+
+# Give a newly issued anonymous id to the client
+def set_visitor_cookie(request, response):
+    visitor_id = getattr(request, 'new_visitor_id', None)
+    if visitor_id:
+        response.set_cookie(
+            VISITOR_COOKIE, visitor_id,
+            max_age=getattr(settings, 'RECENTLY_VIEWED_TTL_SECONDS', 60 * 60 * 24 * 30),
+            httponly=True,
+            samesite=settings.SESSION_COOKIE_SAMESITE,
+            secure=settings.SESSION_COOKIE_SECURE,
+        )
+    return response
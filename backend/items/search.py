@@ -0,0 +1,362 @@
+import re
+
+from django.db import connection as default_connection
+from django.db.models import BooleanField, Case, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+'''
+CONTENTS:
+├── Query parsing & trigrams
+├── SQLiteSearchBackend     (FTS5 virtual table)
+├── PostgresSearchBackend   (weighted tsvector column + GIN index)
+├── FallbackSearchBackend   (icontains, for any other database)
+└── get_search_backend
+'''
+
+ITEM_TABLE = 'items_item'
+TEXT_FIELDS = ('item_name', 'item_summary', 'item_desc')
+# Short fields covered by the typo-tolerant (trigram) index
+FUZZY_FIELDS = ('item_name', 'custom_category')
+INDEXED_FIELDS = TEXT_FIELDS + FUZZY_FIELDS
+
+# Minimum trigram similarity for a fuzzy match (pg_trgm's default threshold)
+SIMILARITY_THRESHOLD = 0.3
+# Fuzzy candidates scored per query on SQLite
+FUZZY_CANDIDATES = 200
+
+# Longer queries are cut down so a pasted paragraph can't build a huge MATCH expression
+MAX_TERMS = 8
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+''' QUERY PARSING & TRIGRAMS '''
+# Split a raw search string into lowercase word terms
+def parse_terms(query):
+    return _TERM_RE.findall((query or '').lower())[:MAX_TERMS]
+
+
+# Trigrams of a list of words, padded per word the way pg_trgm does ("  w", " wo", "wor", "ord", "rd ")
+def trigrams(words):
+    grams = set()
+    for word in words:
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+# Best trigram similarity (0.0 - 1.0) between the query and any run of as many words in text,
+# so "hedphones" scores well against "Wireless Headphones" (like pg_trgm's word_similarity)
+def word_similarity(query, text):
+    query_words = parse_terms(query)
+    words = _TERM_RE.findall((text or '').lower())
+    if not query_words or not words:
+        return 0.0
+
+    query_grams = trigrams(query_words)
+    size = min(len(query_words), len(words))
+    best = 0.0
+    for start in range(len(words) - size + 1):
+        grams = trigrams(words[start:start + size])
+        best = max(best, len(query_grams & grams) / len(query_grams | grams))
+    return best
+
+
+# Unpadded trigrams of one word, as produced by SQLite's trigram tokenizer
+def _raw_trigrams(word):
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+# Empty result that still carries search_rank, so callers can order by it
+def no_matches(queryset):
+    return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+class SQLiteSearchBackend:
+    ''' SQLite FTS5 index kept in a standalone virtual table, rowid = item id.
+        A second FTS5 table with the trigram tokenizer backs typo-tolerant search. '''
+    table = 'items_item_fts'
+    trigram_table = 'items_item_trigram'
+    # bm25 column weights, same order as TEXT_FIELDS (name > summary > desc)
+    weights = (10.0, 4.0, 1.0)
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def install(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                f"{', '.join(TEXT_FIELDS)}, tokenize='unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.trigram_table} USING fts5("
+                f"{', '.join(FUZZY_FIELDS)}, tokenize='trigram')"
+            )
+
+    def uninstall(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+            cursor.execute(f'DROP TABLE IF EXISTS {self.trigram_table}')
+
+    # Replace the index rows for one item
+    def index(self, item):
+        with self.connection.cursor() as cursor:
+            for table, fields in ((self.table, TEXT_FIELDS), (self.trigram_table, FUZZY_FIELDS)):
+                cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', [item.pk])
+                cursor.execute(
+                    f"INSERT INTO {table} (rowid, {', '.join(fields)}) VALUES (%s{', %s' * len(fields)})",
+                    [item.pk] + [getattr(item, field) or '' for field in fields],
+                )
+
+    def remove(self, item_id):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE rowid = %s', [item_id])
+            cursor.execute(f'DELETE FROM {self.trigram_table} WHERE rowid = %s', [item_id])
+
+    # Re-index every item from scratch
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            for table, fields in ((self.table, TEXT_FIELDS), (self.trigram_table, FUZZY_FIELDS)):
+                columns = ', '.join(fields)
+                cursor.execute(f'DELETE FROM {table}')
+                cursor.execute(f'INSERT INTO {table} (rowid, {columns}) SELECT id, {columns} FROM {ITEM_TABLE}')
+
+    # Every term must match, each one as a prefix ("pho" finds "phone")
+    def _match_expression(self, terms):
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    # (condition, rank, no available item matches) for the prefix search
+    def _exact(self, terms):
+        match = self._match_expression(terms)
+        weights = ', '.join(str(w) for w in self.weights)
+        # bm25() is "lower is better", so negate it to keep -search_rank ordering uniform
+        rank = RawSQL(
+            f'SELECT -bm25({self.table}, {weights}) FROM {self.table} '
+            f'WHERE {self.table} MATCH %s AND rowid = {ITEM_TABLE}.id',
+            [match],
+            output_field=FloatField(),
+        )
+        condition = Q(id__in=RawSQL(f'SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s', [match]))
+        none_available = RawSQL(
+            f'NOT EXISTS (SELECT 1 FROM {self.table} JOIN {ITEM_TABLE} AS available '
+            f'ON available.id = {self.table}.rowid WHERE {self.table} MATCH %s AND available.is_available)',
+            [match],
+            output_field=BooleanField(),
+        )
+        return condition, rank, none_available
+
+    # (condition, rank) for the typo-tolerant match on name/custom category: candidates
+    # sharing any trigram come from the trigram index, then word_similarity() (registered
+    # on each SQLite connection, see items.apps) scores them
+    def _fuzzy(self, query):
+        grams = sorted({gram for term in parse_terms(query) for gram in _raw_trigrams(term)})
+        if not grams:
+            return None
+
+        text = ' '.join(parse_terms(query))
+        match = ' OR '.join(f'"{gram}"' for gram in grams)
+        scores = ', '.join(f"word_similarity(%s, coalesce({ITEM_TABLE}.{field}, ''))" for field in FUZZY_FIELDS)
+        similarity = f'max({scores})'
+        condition = RawSQL(
+            f'{ITEM_TABLE}.id IN (SELECT rowid FROM {self.trigram_table} WHERE {self.trigram_table} MATCH %s '
+            f'ORDER BY rank LIMIT {FUZZY_CANDIDATES}) AND {similarity} >= %s',
+            [match, *[text] * len(FUZZY_FIELDS), SIMILARITY_THRESHOLD],
+            output_field=BooleanField(),
+        )
+        return condition, RawSQL(similarity, [text] * len(FUZZY_FIELDS), output_field=FloatField())
+
+    # Filter to matching items and annotate search_rank (higher is more relevant)
+    def search(self, queryset, query):
+        terms = parse_terms(query)
+        if not terms:
+            return no_matches(queryset)
+        condition, rank, _ = self._exact(terms)
+        return queryset.filter(condition).annotate(search_rank=rank)
+
+    def fuzzy_search(self, queryset, query):
+        fuzzy = self._fuzzy(query)
+        if fuzzy is None:
+            return no_matches(queryset)
+        condition, rank = fuzzy
+        return queryset.filter(condition).annotate(search_rank=rank)
+
+    def search_with_fallback(self, queryset, query):
+        return _search_with_fallback(self, queryset, query)
+
+
+class PostgresSearchBackend:
+    ''' Postgres tsvector column on items_item, weighted A/B/C and indexed with GIN '''
+    column = 'search_vector'
+    index_name = 'items_item_search_vector_gin'
+    config = 'english'
+    trigram_index_names = {field: f'items_item_{field}_trgm' for field in FUZZY_FIELDS}
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    @property
+    def vector_sql(self):
+        weighted = [
+            f"setweight(to_tsvector('{self.config}', coalesce({field}, '')), '{weight}')"
+            for field, weight in zip(TEXT_FIELDS, 'ABC')
+        ]
+        return ' || '.join(weighted)
+
+    def install(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'ALTER TABLE {ITEM_TABLE} ADD COLUMN IF NOT EXISTS {self.column} tsvector')
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {self.index_name} ON {ITEM_TABLE} USING GIN ({self.column})'
+            )
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            for field, index_name in self.trigram_index_names.items():
+                cursor.execute(
+                    f'CREATE INDEX IF NOT EXISTS {index_name} ON {ITEM_TABLE} USING GIN ({field} gin_trgm_ops)'
+                )
+
+    def uninstall(self):
+        with self.connection.cursor() as cursor:
+            for index_name in self.trigram_index_names.values():
+                cursor.execute(f'DROP INDEX IF EXISTS {index_name}')
+            cursor.execute(f'DROP INDEX IF EXISTS {self.index_name}')
+            cursor.execute(f'ALTER TABLE {ITEM_TABLE} DROP COLUMN IF EXISTS {self.column}')
+
+    def index(self, item):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'UPDATE {ITEM_TABLE} SET {self.column} = {self.vector_sql} WHERE id = %s', [item.pk])
+
+    # The vector lives on the item row, so it goes away with it
+    def remove(self, item_id):
+        return None
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'UPDATE {ITEM_TABLE} SET {self.column} = {self.vector_sql}')
+
+    # (condition, rank, no available item matches) for the prefix search
+    def _exact(self, terms):
+        # Prefix match on every term, e.g. "red:* & pho:*"
+        tsquery = ' & '.join(f'{term}:*' for term in terms)
+        condition = RawSQL(
+            f"{ITEM_TABLE}.{self.column} @@ to_tsquery('{self.config}', %s)",
+            [tsquery],
+            output_field=BooleanField(),
+        )
+        # Default ts_rank weights already rank A (name) > B (summary) > C (desc)
+        rank = RawSQL(
+            f"ts_rank({ITEM_TABLE}.{self.column}, to_tsquery('{self.config}', %s))",
+            [tsquery],
+            output_field=FloatField(),
+        )
+        none_available = RawSQL(
+            f"NOT EXISTS (SELECT 1 FROM {ITEM_TABLE} AS available WHERE available.is_available "
+            f"AND available.{self.column} @@ to_tsquery('{self.config}', %s))",
+            [tsquery],
+            output_field=BooleanField(),
+        )
+        return condition, rank, none_available
+
+    # pg_trgm: the <% operator uses the trigram GIN indexes, word_similarity() scores
+    def _fuzzy(self, query):
+        text = ' '.join(parse_terms(query))
+        if not text:
+            return None
+
+        condition = RawSQL(
+            ' OR '.join(f'%s <%% {ITEM_TABLE}.{field}' for field in FUZZY_FIELDS),
+            [text] * len(FUZZY_FIELDS),
+            output_field=BooleanField(),
+        )
+        rank = RawSQL(
+            f"GREATEST({', '.join(f'word_similarity(%s, {ITEM_TABLE}.{field})' for field in FUZZY_FIELDS)})",
+            [text] * len(FUZZY_FIELDS),
+            output_field=FloatField(),
+        )
+        return condition, rank
+
+    def search(self, queryset, query):
+        terms = parse_terms(query)
+        if not terms:
+            return no_matches(queryset)
+        condition, rank, _ = self._exact(terms)
+        return queryset.filter(condition).annotate(search_rank=rank)
+
+    def fuzzy_search(self, queryset, query):
+        fuzzy = self._fuzzy(query)
+        if fuzzy is None:
+            return no_matches(queryset)
+        condition, rank = fuzzy
+        return queryset.filter(condition).annotate(search_rank=rank)
+
+    def search_with_fallback(self, queryset, query):
+        return _search_with_fallback(self, queryset, query)
+
+
+class FallbackSearchBackend:
+    ''' Unranked icontains search for databases without a full-text backend '''
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def install(self):
+        return None
+
+    def uninstall(self):
+        return None
+
+    def index(self, item):
+        return None
+
+    def remove(self, item_id):
+        return None
+
+    def rebuild(self):
+        return None
+
+    def search(self, queryset, query):
+        terms = parse_terms(query)
+        if not terms:
+            return no_matches(queryset)
+
+        for term in terms:
+            queryset = queryset.filter(
+                Q(item_name__icontains=term) |
+                Q(item_summary__icontains=term) |
+                Q(item_desc__icontains=term)
+            )
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    def fuzzy_search(self, queryset, query):
+        return no_matches(queryset)
+
+    def search_with_fallback(self, queryset, query):
+        return self.search(queryset, query)
+
+
+# Exact matches, or fuzzy ones when no available item matches exactly (usually a typo),
+# decided inside the one query instead of with a separate exists() round trip
+def _search_with_fallback(backend, queryset, query):
+    terms = parse_terms(query)
+    if not terms:
+        return no_matches(queryset)
+    exact, exact_rank, none_available = backend._exact(terms)
+    fuzzy = backend._fuzzy(query)
+    if fuzzy is None:
+        return queryset.filter(exact).annotate(search_rank=exact_rank)
+
+    fuzzy_condition, fuzzy_rank = fuzzy
+    rank = Case(When(exact, then=exact_rank), default=fuzzy_rank, output_field=FloatField())
+    return queryset.filter(Q(exact) | (Q(fuzzy_condition) & Q(none_available))).annotate(search_rank=rank)
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+# Pick the search backend for the given (default) database connection
+def get_search_backend(connection=None):
+    connection = connection or default_connection
+    backend_class = BACKENDS.get(connection.vendor, FallbackSearchBackend)
+    return backend_class(connection)
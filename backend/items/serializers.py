@@ -1,13 +1,38 @@
 from rest_framework import serializers
-from .models import Item, Review, Promotion
+from rest_framework.reverse import reverse
+from .models import Item, Review, Promotion, CategorySummary, MediaUpload
 from .models.item import ItemImage
 from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from core.pagination import ReviewPagination
+from .images import FORMATS
+from .view_counter import view_counter
 
 def _default_image_data(context):
     request = context.get('request') if context else None
     default_rel = settings.MEDIA_URL.rstrip('/') + '/item_images/default.png'
     default_url = request.build_absolute_uri(default_rel) if request else default_rel
-    return {'id': None, 'image_file': default_url, 'image_url': ''}
+    return {'id': None, 'image_file': default_url, 'image_url': '', 'position': 0, 'srcset': {}}
+
+# First image of an item for list rows. Uses the primary_image_* annotations from
+# Item.for_listing / ItemImage.primary_image_annotations when present, otherwise queries.
+def primary_image_data(annotated, item, context):
+    if hasattr(annotated, 'primary_image_id'):
+        if annotated.primary_image_id is None:
+            return _default_image_data(context)
+        image = ItemImage(
+            id=annotated.primary_image_id,
+            item_id=item.id,
+            image_file=annotated.primary_image_file or '',
+            image_url=annotated.primary_image_url or '',
+            derivatives=annotated.primary_image_derivatives or {},
+        )
+    else:
+        image = item.item_images.first()
+        if not image:
+            return _default_image_data(context)
+    return ItemImageSerializer(image, context=context).data
 
 class ReviewSerializer(serializers.ModelSerializer):
     reviewer = serializers.CharField(source='reviewer.username', read_only=True)
@@ -22,33 +47,118 @@ class ReviewSerializer(serializers.ModelSerializer):
         ]
 
     def get_is_upvoted(self, obj):
+        # Pages of reviews pass the viewer's upvotes in (see review_page_data)
+        upvoted_ids = self.context.get('upvoted_ids')
+        if upvoted_ids is not None:
+            return obj.id in upvoted_ids
         request = self.context.get('request', None)
         user = getattr(request, 'user', None)
         if user and user.is_authenticated:
             return obj.upvoted_by.filter(id=user.id).exists()
         return False
 
+# Serialize a page of reviews, looking up the viewer's upvotes once for the whole page
+def review_page_data(reviews, context):
+    request = context.get('request')
+    upvoted_ids = Review.upvoted_ids(getattr(request, 'user', None), reviews)
+    return ReviewSerializer(reviews, many=True, context={**context, 'upvoted_ids': upvoted_ids}).data
+
 class ReviewCreateUpdateSerializer(serializers.ModelSerializer):
     item_id = serializers.IntegerField(write_only=True, required=False)
     order_id = serializers.IntegerField(write_only=True, required=False, allow_null=True)
+    # Token of a finished chunked upload (/uploads/review-media/), in place of a multipart `media`
+    media_upload = serializers.UUIDField(write_only=True, required=False)
     class Meta:
         model = Review
-        fields = ['item_id', 'rating', 'content', 'order_id', 'media']
+        fields = ['item_id', 'rating', 'content', 'order_id', 'media', 'media_upload']
+
+    def validate_media_upload(self, value):
+        request = self.context.get('request')
+        upload = MediaUpload.objects.filter(
+            id=value, owner_id=getattr(getattr(request, 'user', None), 'pk', None), status='complete',
+        ).first()
+        if upload is None:
+            raise serializers.ValidationError('No finished upload with this token.')
+        return upload
 
     def create(self, validated_data):
         validated_data.pop('item_id', None)
         validated_data.pop('order_id', None)
-        return super().create(validated_data)
+        upload = self._use_upload(validated_data)
+        review = super().create(validated_data)
+        self._release_upload(upload)
+        return review
 
     def update(self, instance, validated_data):
         validated_data.pop('item_id', None)
         validated_data.pop('order_id', None)
-        return super().update(instance, validated_data)
+        upload = self._use_upload(validated_data)
+        review = super().update(instance, validated_data)
+        self._release_upload(upload)
+        return review
+
+    def _use_upload(self, validated_data):
+        upload = validated_data.pop('media_upload', None)
+        if upload is not None:
+            validated_data['media'] = upload.path
+        return upload
+
+    # The review owns the file now; only the upload record goes
+    def _release_upload(self, upload):
+        if upload is not None:
+            upload.discard(keep_file=True)
+
+class MediaUploadSerializer(serializers.ModelSerializer):
+    token = serializers.UUIDField(source='id', read_only=True)
+    offset = serializers.IntegerField(source='received', read_only=True)
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = MediaUpload
+        fields = ['token', 'filename', 'size', 'offset', 'status', 'content_type', 'chunk_size']
+        read_only_fields = ['status', 'content_type']
+
+    def get_chunk_size(self, obj):
+        return settings.MEDIA_UPLOAD_CHUNK_BYTES
+
+    def validate_size(self, value):
+        if value < 1:
+            raise serializers.ValidationError('The file is empty.')
+        if value > settings.REVIEW_MEDIA_MAX_BYTES:
+            raise serializers.ValidationError(
+                f'File too large. Maximum size is {settings.REVIEW_MEDIA_MAX_BYTES // (1024 * 1024)}MB.'
+            )
+        return value
 
 class ItemImageSerializer(serializers.ModelSerializer):
+    srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = ItemImage
-        fields = ['id', 'image_file', 'image_url']
+        fields = ['id', 'image_file', 'image_url', 'position', 'srcset']
+
+    # {'webp': '<url> 160w, <url> 480w, ...', 'jpeg': ...}; empty until the derivatives exist
+    def get_srcset(self, obj):
+        request = self.context.get('request')
+        variants = sorted((obj.derivatives or {}).values(), key=lambda variant: variant['width'])
+        srcset = {}
+        for key, *_ in FORMATS:
+            urls = []
+            for variant in variants:
+                url = default_storage.url(variant[key])
+                urls.append(f"{request.build_absolute_uri(url) if request else url} {variant['width']}w")
+            if urls:
+                srcset[key] = ', '.join(urls)
+        return srcset
+
+class CategorySummarySerializer(serializers.ModelSerializer):
+    value = serializers.ReadOnlyField()
+    label = serializers.ReadOnlyField()
+    count = serializers.IntegerField(source='item_count', read_only=True)
+
+    class Meta:
+        model = CategorySummary
+        fields = ['value', 'label', 'count']
 
 class ItemListSerializer(serializers.ModelSerializer):
     current_price = serializers.ReadOnlyField()  
@@ -66,16 +176,12 @@ class ItemListSerializer(serializers.ModelSerializer):
         ]
 
     def get_review_stats(self, obj):
-        return Review.get_item_stats(obj)
+        return obj.review_stats
     
     def get_item_image(self, obj):
-        first_image = obj.item_images.first()
-        if first_image:
-            return ItemImageSerializer(first_image, context=self.context).data
-        return _default_image_data(self.context)
+        return primary_image_data(obj, obj, self.context)
 
 class ItemDetailSerializer(serializers.ModelSerializer):
-    reviews = ReviewSerializer(many=True, read_only=True)
     seller_name = serializers.CharField(source='seller.username', read_only=True)
     item_images = serializers.SerializerMethodField()
     current_price = serializers.ReadOnlyField()
@@ -100,11 +206,32 @@ class ItemDetailSerializer(serializers.ModelSerializer):
             'discount_percentage',
             'seller_name', 'view_count', 'times_purchased',
             'review_count', 'created_at', 'updated_at',
-            'reviews', 'review_stats'
+            'review_stats'
         ]
 
+    # Only the first page of reviews (most helpful first) is embedded;
+    # reviews_next continues it at /items/{id}/reviews/
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        # Sale state, price and discount from one live reading, so they always agree;
+        # the stored discount_percentage column only catches up when refresh_sale_prices runs
+        data['is_sale_active'], data['current_price'], data['discount_percentage'] = (
+            instance.pricing_at(timezone.now())
+        )
+        # Views still buffered in this worker (items/view_counter.py) count too
+        data['view_count'] = instance.view_count + view_counter.pending(instance.id)
+        request = self.context.get('request')
+        paginator = ReviewPagination()
+        reviews = paginator.first_page(
+            Review.for_item(instance), request,
+            reverse('item-reviews', args=[instance.pk], request=request),
+        )
+        data['reviews'] = review_page_data(reviews, self.context)
+        data['reviews_next'] = paginator.get_next_link()
+        return data
+
     def get_review_stats(self, obj):
-        return Review.get_item_stats(obj)
+        return obj.review_stats
     
     def get_item_images(self, obj):
         images = list(obj.item_images.all())
@@ -123,16 +250,22 @@ class ItemCreateUpdateSerializer(serializers.ModelSerializer):
             'is_digital', 'sale_price', 'sale_start_date', 'sale_end_date', 'item_sku', 'seller', 'id'
         ]
 
+    # A stock edit applies as the change from the quantity loaded for this request, so
+    # units taken by holds and checkouts between that read and the write aren't handed
+    # back. Changes since the seller's form was rendered are not detected.
+    def update(self, instance, validated_data):
+        shown = instance.item_quantity
+        quantity = validated_data.pop('item_quantity', shown)
+        item = super().update(instance, validated_data)
+        item.adjust_stock(quantity - shown)
+        return item
+
+    # Replace the item's images with images_data; unchanged images keep their rows and files
     def _set_images(self, item, images_data):
-        item.item_images.all().delete()
-
-        if images_data:
-            for image_data in images_data:
-                if not image_data:
-                    continue
-                file_val = image_data.get('image_file')
-                url_val = image_data.get('image_url')
-                if file_val:
-                    ItemImage.objects.create(item=item, image_file=file_val)
-                elif url_val and str(url_val).strip():
-                    ItemImage.objects.create(item=item, image_url=str(url_val).strip())
\ No newline at end of file
+        images_data = [image_data for image_data in images_data or [] if image_data]
+        ItemImage.apply_changes(
+            item,
+            keep=[],
+            files=[d['image_file'] for d in images_data if d.get('image_file')],
+            urls=[d['image_url'] for d in images_data if not d.get('image_file') and d.get('image_url')],
+        )
\ No newline at end of file
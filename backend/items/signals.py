@@ -1,7 +1,12 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
-from .models import Item
+from .autocomplete import autocomplete_index
+from .images import needs_derivatives, release_files, schedule_derivatives
+from .models import CategorySummary, Item, Review
+from .models.item import ItemImage
+from .search import INDEXED_FIELDS, get_search_backend
 
 
 @receiver(post_save, sender=Item)
@@ -23,3 +28,120 @@ def set_profile_is_seller_on_item_create(sender, instance: Item, created: bool,
     if not profile.is_seller:
         profile.is_seller = True
         profile.save(update_fields=['is_seller', 'updated_at'])
+
+
+@receiver(post_save, sender=Item)
+def update_search_index_on_item_save(sender, instance: Item, update_fields=None, **kwargs):
+    # Stock/counter saves pass update_fields without any text field; nothing to re-index.
+    if update_fields is not None and not set(update_fields) & set(INDEXED_FIELDS):
+        return
+    get_search_backend().index(instance)
+
+
+@receiver(post_delete, sender=Item)
+def remove_from_search_index_on_item_delete(sender, instance: Item, **kwargs):
+    get_search_backend().remove(instance.pk)
+
+
+@receiver(post_save, sender=Item)
+def update_autocomplete_on_item_save(sender, instance: Item, **kwargs):
+    # Not loaded yet: the first lookup will read the current rows anyway.
+    if not autocomplete_index.is_loaded:
+        return
+    if instance.is_available:
+        autocomplete_index.add(instance.pk, instance.item_name, instance.view_count)
+    else:
+        autocomplete_index.remove(instance.pk)
+
+
+@receiver(post_delete, sender=Item)
+def remove_from_autocomplete_on_item_delete(sender, instance: Item, **kwargs):
+    autocomplete_index.remove(instance.pk)
+
+
+# Fields of an item that decide which category summary row it counts towards
+CATEGORY_SUMMARY_SOURCES = {'item_category', 'custom_category', 'is_available'}
+# Marks a save whose update_fields can't move the item between categories
+CATEGORY_UNTOUCHED = object()
+
+
+def _category_key(values):
+    return CategorySummary.key_for(values['item_category'], values['custom_category'], values['is_available'])
+
+
+@receiver(pre_save, sender=Item)
+def remember_category_summary_key(sender, instance: Item, update_fields=None, **kwargs):
+    instance._category_previous = None
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & CATEGORY_SUMMARY_SOURCES:
+        instance._category_previous = CATEGORY_UNTOUCHED
+        return
+
+    previous = Item.objects.filter(pk=instance.pk).values(*CATEGORY_SUMMARY_SOURCES).first()
+    if previous:
+        instance._category_previous = _category_key(previous)
+
+
+@receiver(post_save, sender=Item)
+def update_category_summary_on_item_save(sender, instance: Item, created: bool, **kwargs):
+    previous = getattr(instance, '_category_previous', None)
+    if previous is CATEGORY_UNTOUCHED:
+        return
+    current = _category_key({field: getattr(instance, field) for field in CATEGORY_SUMMARY_SOURCES})
+    CategorySummary.apply_change(None if created else previous, current)
+
+
+@receiver(post_delete, sender=Item)
+def update_category_summary_on_item_delete(sender, instance: Item, **kwargs):
+    CategorySummary.apply_change(
+        _category_key({field: getattr(instance, field) for field in CATEGORY_SUMMARY_SOURCES})
+    )
+
+
+# Fields of a review that feed the item's stored review aggregates
+REVIEW_AGGREGATE_SOURCES = {'rating', 'media'}
+
+
+@receiver(pre_save, sender=Review)
+def remember_review_aggregate_state(sender, instance: Review, update_fields=None, **kwargs):
+    instance._aggregate_previous = None
+    if instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & REVIEW_AGGREGATE_SOURCES:
+        return
+
+    previous = Review.objects.filter(pk=instance.pk).values('rating', 'media').first()
+    if previous:
+        instance._aggregate_previous = (previous['rating'], bool(previous['media']))
+
+
+@receiver(post_save, sender=Review)
+def update_item_aggregates_on_review_save(sender, instance: Review, created: bool, **kwargs):
+    if created:
+        Item.apply_review_change(instance.item_id, new=instance.aggregate_state)
+        return
+
+    previous = getattr(instance, '_aggregate_previous', None)
+    if previous is not None and previous != instance.aggregate_state:
+        Item.apply_review_change(instance.item_id, old=previous, new=instance.aggregate_state)
+
+
+@receiver(post_delete, sender=Review)
+def update_item_aggregates_on_review_delete(sender, instance: Review, **kwargs):
+    Item.apply_review_change(instance.item_id, old=instance.aggregate_state)
+
+
+@receiver(post_save, sender=ItemImage)
+def render_derivatives_on_image_save(sender, instance: ItemImage, **kwargs):
+    # New upload (or a replaced file): resize it in the background once committed
+    if needs_derivatives(instance):
+        schedule_derivatives(instance.pk)
+
+
+@receiver(post_delete, sender=ItemImage)
+def release_files_on_image_delete(sender, instance: ItemImage, **kwargs):
+    # Other images may share the file (deduplicated uploads); release_files checks
+    if instance.image_file:
+        name, derivatives = instance.image_file.name, instance.derivatives
+        transaction.on_commit(lambda: release_files(name, derivatives))
@@ -0,0 +1,20 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+
+from items.models import Item
+
+
+class ItemFixtures:
+	''' Shared test fixtures for the items tests: a seller (create_seller, usually from
+		setUp) and a factory for that seller's items. Mix in ahead of TestCase. '''
+
+	def create_seller(self, username='seller'):
+		self.seller = User.objects.create_user(username=username, email=f'{username}@example.com', password='pass')
+		return self.seller
+
+	def make_item(self, name, category='electronics', price='10.00', quantity=3, **kwargs):
+		return Item.objects.create(
+			item_name=name, item_category=category, item_price=Decimal(price),
+			item_quantity=quantity, seller=self.seller, **kwargs,
+		)
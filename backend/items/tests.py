@@ -1,7 +1,7 @@
 from datetime import timedelta
 from django.utils import timezone
 from django.test import TestCase, RequestFactory
-from django.contrib.auth.models import User
+from django.contrib.auth.models import AnonymousUser, User
 from django.core.exceptions import ValidationError
 from decimal import Decimal
 from orders.models import Order, OrderItem
@@ -83,9 +83,9 @@ class ItemModelTest(TestCase):
         # Test view tracking
         factory = RequestFactory()
         request = factory.get('/')
-        request.session = {}
+        request.user = AnonymousUser()
         Item.track_view(self.item.id, request, 5)
-        self.assertEqual(request.session['viewed_items'][0], self.item.id)
+        self.assertEqual(Item.get_recently_viewed(request, 5), [self.item])
 
 # REVIEW MODEL TESTS
 class ReviewModelTest(TestCase):
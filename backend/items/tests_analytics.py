@@ -0,0 +1,87 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from items.analytics import compact_events, event_log
+from items.models import AnalyticsEvent, Item, ItemDailyStats, SellerDailyStats
+from items.view_counter import view_counter
+
+CHECKOUT = {
+	'shipping_address': '123 Main St',
+	'shipping_city': 'City',
+	'shipping_postal_code': '12345',
+	'shipping_country': 'Country',
+}
+
+
+class AnalyticsPipelineTest(TestCase):
+	def setUp(self):
+		event_log.clear()
+		view_counter.clear()
+		self.client = APIClient()
+		self.seller = User.objects.create_user(username='seller', email='s@example.com', password='pass')
+		self.buyer = User.objects.create_user(username='buyer', email='b@example.com', password='pass')
+		self.phone = Item.objects.create(
+			item_name='Phone', item_price=Decimal('50.00'), item_category='electronics',
+			item_quantity=10, seller=self.seller,
+		)
+
+	def tearDown(self):
+		event_log.clear()
+		view_counter.clear()
+
+	def test_events_are_buffered_then_bulk_inserted(self):
+		with self.assertNumQueries(0):
+			for _ in range(3):
+				event_log.record('view', self.phone)
+		with self.assertNumQueries(1):
+			self.assertEqual(event_log.flush(), 3)
+		self.assertEqual(AnalyticsEvent.objects.filter(event_type='view', seller_id=self.seller.id).count(), 3)
+
+	def test_ticker_flushes_only_once_the_oldest_event_is_due(self):
+		event_log.record('view', self.phone)
+		with self.settings(ANALYTICS_FLUSH_SECONDS=60):
+			self.assertEqual(event_log.flush_if_due(), 0)
+		with self.settings(ANALYTICS_FLUSH_SECONDS=0):
+			self.assertEqual(event_log.flush_if_due(), 1)
+		self.assertEqual(AnalyticsEvent.objects.count(), 1)
+
+	def test_compaction_settles_on_insert_time_not_event_time(self):
+		event_log.record('view', self.phone)
+		# Buffered for an hour before a late worker flushed it
+		event_log._buffer[0].created_at = timezone.now() - timedelta(hours=1)
+		event_log.flush()
+		self.assertEqual(compact_events(settle_seconds=60), 0)
+		self.assertEqual(compact_events(settle_seconds=60, now=timezone.now() + timedelta(seconds=61)), 1)
+
+	def test_shopper_actions_roll_up_into_daily_stats_and_seller_dashboard(self):
+		self.client.force_authenticate(user=self.buyer)
+		self.client.get(f'/api/items/{self.phone.id}/')
+		self.client.get(f'/api/items/{self.phone.id}/')
+		self.client.post('/api/cart/items/', {'item_id': self.phone.id, 'quantity': 3}, format='json')
+		self.client.patch(f'/api/cart/items/{self.phone.id}/', {'quantity': 2}, format='json')
+		with self.captureOnCommitCallbacks(execute=True):
+			self.client.post('/api/checkout/', CHECKOUT, format='json')
+
+		event_log.flush()
+		self.assertEqual(compact_events(settle_seconds=0), 5)
+		# Already compacted events are not counted again
+		self.assertEqual(compact_events(settle_seconds=0), 0)
+
+		stats = ItemDailyStats.objects.get(item=self.phone)
+		self.assertEqual(
+			(stats.views, stats.cart_adds, stats.cart_removes, stats.orders, stats.units_sold, stats.revenue),
+			(2, 3, 1, 1, 2, Decimal('100.00')),
+		)
+		self.assertEqual(SellerDailyStats.objects.get(seller=self.seller).revenue, Decimal('100.00'))
+
+		self.client.force_authenticate(user=self.seller)
+		res = self.client.get('/api/seller/analytics/', {'days': 7})
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual(res.data['totals']['units_sold'], 2)
+		self.assertEqual(res.data['funnel']['view_to_order_rate'], 50.0)
+		self.assertEqual(res.data['top_items'][0]['item_name'], 'Phone')
@@ -0,0 +1,82 @@
+from unittest import mock
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from items.autocomplete import AutocompleteIndex, autocomplete_index
+from items.models import Item
+from items.test_utils import ItemFixtures
+
+
+class FuzzySearchTest(ItemFixtures, TestCase):
+	def setUp(self):
+		self.create_seller()
+		self.headphones = self.make_item('Wireless Headphones', price='40.00')
+		self.dice = self.make_item('Dice', 'other', '4.00', custom_category='board games')
+
+	def test_misspelled_query_falls_back_to_trigram_similarity(self):
+		self.assertEqual(list(Item.search_items(query='hedphones')), [self.headphones])
+		self.assertEqual(list(Item.search_items(query='bord gmes')), [self.dice])
+		self.assertEqual(Item.search_items(query='toaster').count(), 0)
+
+	def test_fallback_is_decided_inside_the_search_query(self):
+		self.make_item('Headphone Stand', price='9.00')
+		with self.assertNumQueries(1):
+			self.assertEqual(len(Item.search_items(query='hedphones')), 2)
+		# Exact matches exist, so similar-but-different names stay out
+		with self.assertNumQueries(1):
+			self.assertEqual(list(Item.search_items(query='wireless')), [self.headphones])
+
+	def test_fuzzy_can_be_disabled(self):
+		self.assertEqual(Item.search_items(query='hedphones', fuzzy=False).count(), 0)
+
+
+class AutocompleteApiTest(ItemFixtures, TestCase):
+	def setUp(self):
+		autocomplete_index.clear()
+		self.client = APIClient()
+		self.create_seller()
+		self.phone = self.make_item('Smart Phone')
+		self.case = self.make_item('Phone Case')
+
+	def tearDown(self):
+		autocomplete_index.clear()
+
+	def _suggest(self, q):
+		res = self.client.get('/api/items/autocomplete/', {'q': q})
+		self.assertEqual(res.status_code, 200)
+		return [row['item_name'] for row in res.data['results']]
+
+	def test_prefix_matches_any_word_and_prefers_name_prefix(self):
+		self.assertEqual(self._suggest('pho'), ['Phone Case', 'Smart Phone'])
+		self.assertEqual(self._suggest('sma'), ['Smart Phone'])
+		self.assertEqual(self._suggest(''), [])
+
+	def test_lookups_do_not_touch_the_database_once_loaded(self):
+		self._suggest('pho')
+		with self.assertNumQueries(0):
+			self._suggest('smart')
+
+	def test_index_follows_item_changes(self):
+		self._suggest('pho')
+		self.make_item('Tablet')
+		self.case.is_available = False
+		self.case.save()
+		self.phone.delete()
+
+		self.assertEqual(self._suggest('tab'), ['Tablet'])
+		self.assertEqual(self._suggest('pho'), [])
+
+	def test_popular_names_that_sort_late_are_still_suggested(self):
+		index = AutocompleteIndex()
+		index.load([(i, f'Pad {i:03}', 0) for i in range(300)] + [(999, 'Pz Phone', 50)])
+		self.assertEqual(index.suggest('p', limit=2)[0]['item_name'], 'Pz Phone')
+
+	def test_failed_background_reload_is_retried(self):
+		self._suggest('pho')
+		with self.settings(AUTOCOMPLETE_RELOAD_SECONDS=0, BACKGROUND_TASKS_SYNC=True):
+			with mock.patch.object(autocomplete_index, 'load_from_db', side_effect=RuntimeError) as load:
+				for _ in range(2):
+					with self.assertRaises(RuntimeError):
+						autocomplete_index.ensure_loaded()
+		self.assertEqual(load.call_count, 2)
@@ -0,0 +1,38 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from items.models import Item
+from items.test_utils import ItemFixtures
+
+
+class BestSellersTest(ItemFixtures, TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.create_seller()
+
+	def _item(self, name, category, sold, **kwargs):
+		item = self.make_item(name, category, quantity=5, **kwargs)
+		Item.objects.filter(id=item.id).update(times_purchased=sold)
+		return item
+
+	def test_top_n_per_category_in_one_query(self):
+		self._item('Phone', 'electronics', 9)
+		self._item('Cable', 'electronics', 4)
+		self._item('Charger', 'electronics', 6)
+		self._item('Shirt', 'clothing', 2)
+		self._item('Hidden', 'clothing', 50, is_available=False)
+
+		with self.assertNumQueries(1):
+			result = Item.get_best_sellers_by_category(items_each_category=2, max_categories=3)
+		self.assertEqual(list(result), ['Electronics & Tech', 'Clothing & Fashion'])
+		self.assertEqual([i.item_name for i in result['Electronics & Tech']], ['Phone', 'Charger'])
+		self.assertEqual([i.item_name for i in result['Clothing & Fashion']], ['Shirt'])
+
+	def test_suggestions_use_the_items_own_category(self):
+		dice = self._item('Dice', 'other', 1, custom_category='board games')
+		self._item('Chess', 'other', 7, custom_category='board games')
+		self._item('Poster', 'other', 9, custom_category='wall art')
+		self._item('Phone', 'electronics', 9)
+
+		res = self.client.get(f'/api/items/{dice.id}/suggestions/')
+		self.assertEqual([row['item_name'] for row in res.data['best_sellers_in_category']], ['Chess'])
@@ -0,0 +1,68 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from items.models import CategorySummary, Item
+from items.test_utils import ItemFixtures
+
+
+class CategorySummaryTest(ItemFixtures, TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.create_seller()
+
+	def _counts(self):
+		return {
+			(row.item_category, row.custom_category): row.item_count
+			for row in CategorySummary.objects.filter(item_count__gt=0)
+		}
+
+	def test_counts_follow_item_changes(self):
+		phone = self.make_item('Phone')
+		self.make_item('Cable')
+		dice = self.make_item('Dice', 'other', custom_category='Board Games')
+		self.assertEqual(self._counts(), {('electronics', ''): 2, ('other', 'board games'): 1})
+
+		phone.is_available = False
+		phone.save()
+		dice.item_category = 'toys_games'
+		dice.save()
+		self.assertEqual(self._counts(), {('electronics', ''): 1, ('toys_games', ''): 1})
+
+		phone.is_available = True
+		phone.save(update_fields=['is_available'])
+		dice.delete()
+		self.assertEqual(self._counts(), {('electronics', ''): 2})
+
+	def test_saves_that_dont_touch_category_skip_the_summary(self):
+		phone = self.make_item('Phone')
+		with CaptureQueriesContext(connection) as ctx:
+			phone.save(update_fields=['item_quantity'])
+		sql = ' '.join(query['sql'] for query in ctx.captured_queries)
+		self.assertNotIn('items_categorysummary', sql)
+		self.assertNotIn('"items_item"."is_available"', sql)
+		self.assertEqual(self._counts(), {('electronics', ''): 1})
+
+	def test_rebuild_matches_incremental_counts(self):
+		self.make_item('Phone')
+		self.make_item('Dice', 'other', custom_category='board games')
+		self.make_item('Hidden', is_available=False)
+		expected = self._counts()
+
+		CategorySummary.objects.update(item_count=0)
+		CategorySummary.rebuild()
+		self.assertEqual(self._counts(), expected)
+
+	def test_endpoint_and_homepage_list(self):
+		self.make_item('Phone')
+		self.make_item('Cable')
+		self.make_item('Dice', 'other', custom_category='board games')
+
+		res = self.client.get('/api/categories/')
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual(res.data, [
+			{'value': 'electronics', 'label': 'Electronics & Tech', 'count': 2},
+			{'value': 'board games', 'label': 'Board Games', 'count': 1},
+		])
+		self.assertEqual(Item.get_all_categories(), ['Electronics & Tech', 'Other', 'board games'])
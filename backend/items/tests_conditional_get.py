@@ -0,0 +1,86 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from items.analytics import event_log
+from items.models import Item, Review
+from items.models.item import ItemImage
+from items.view_counter import view_counter
+from orders.models import Order, OrderItem
+
+
+class ItemDetailConditionalGetTest(TestCase):
+	def setUp(self):
+		view_counter.clear()
+		event_log.clear()
+		self.client = APIClient()
+		self.seller = User.objects.create_user(username='seller', email='s@example.com', password='pass')
+		self.item = Item.objects.create(
+			item_name='Lamp', item_price=Decimal('20.00'), item_category='home_kitchen',
+			item_quantity=10, seller=self.seller,
+		)
+		self.url = f'/api/items/{self.item.id}/'
+
+	def tearDown(self):
+		view_counter.clear()
+		event_log.clear()
+
+	def _review(self, username, rating):
+		buyer = User.objects.create_user(username=username, email=f'{username}@example.com', password='pass')
+		order = Order.objects.create(user=buyer, total_price=Decimal('20.00'), status='delivered')
+		OrderItem.objects.create(order=order, item=self.item, quantity=1, price=Decimal('20.00'))
+		return Review.objects.create(item=self.item, reviewer=buyer, rating=rating, order=order)
+
+	def test_unchanged_item_is_304_without_serializing(self):
+		self._review('b1', 5)
+		first = self.client.get(self.url)
+		self.assertEqual(first.status_code, 200)
+		self.assertTrue(first['ETag'].startswith('"'))
+		self.assertIn('Last-Modified', first)
+
+		with CaptureQueriesContext(connection) as ctx:
+			again = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+		self.assertEqual(again.status_code, 304)
+		self.assertEqual(again['ETag'], first['ETag'])
+		# Only the version aggregates touch reviews and images; no rows are loaded
+		row_queries = [
+			q for q in ctx.captured_queries
+			if '"items_review"."content"' in q['sql'] or '"items_itemimage"."image_url"' in q['sql']
+		]
+		self.assertEqual(row_queries, [])
+
+		modified_since = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+		self.assertEqual(modified_since.status_code, 304)
+
+	def test_etag_follows_item_reviews_images_and_stock(self):
+		etag = self.client.get(self.url)['ETag']
+
+		def changed():
+			nonlocal etag
+			res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+			if res.status_code == 200:
+				etag = res['ETag']
+			return res.status_code == 200
+
+		self.assertFalse(changed())
+		review = self._review('b1', 4)
+		self.assertTrue(changed())
+		review.delete()
+		self.assertTrue(changed())
+		ItemImage.objects.create(item=self.item, image_url='https://img.example.com/a.png')
+		self.assertTrue(changed())
+		Item.objects.filter(id=self.item.id).update(item_quantity=3)
+		self.assertTrue(changed())
+		# Page views alone don't invalidate the client's copy
+		self.assertFalse(changed())
+
+	def test_etag_is_per_user(self):
+		anonymous = self.client.get(self.url)['ETag']
+		self.client.force_authenticate(self.seller)
+		res = self.client.get(self.url, HTTP_IF_NONE_MATCH=anonymous)
+		self.assertEqual(res.status_code, 200)
+		self.assertNotEqual(res['ETag'], anonymous)
@@ -0,0 +1,46 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from items.test_utils import ItemFixtures
+
+
+class ItemFacetsApiTest(ItemFixtures, TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client = APIClient()
+		self.create_seller()
+		self.make_item('Phone', 'electronics', '120.00', item_condition='used')
+		self.make_item('Cable', 'electronics', '8.00', is_on_sale=True, sale_price=Decimal('6.00'))
+		self.make_item('Dice Set', 'other', '30.00', custom_category='Board Games')
+		self.make_item('Hidden', 'electronics', '8.00', is_available=False)
+
+	def test_counts_per_facet(self):
+		res = self.client.get('/api/items/facets/')
+		self.assertEqual(res.status_code, 200)
+		data = res.data
+		self.assertEqual(data['total'], 3)
+		self.assertEqual(
+			{row['value']: row['count'] for row in data['category']},
+			{'electronics': 2, 'board games': 1},
+		)
+		self.assertEqual({row['value']: row['count'] for row in data['condition']}, {'new': 2, 'used': 1})
+		self.assertEqual(data['on_sale'], {'true': 1, 'false': 2})
+		self.assertEqual({row['min']: row['count'] for row in data['price'] if row['count']}, {0: 1, 25: 1, 100: 1})
+
+	def test_facets_follow_search_filters(self):
+		data = self.client.get('/api/items/facets/', {'category': 'Electronics', 'max_price': '50'}).data
+		self.assertEqual(data['total'], 1)
+		self.assertEqual(data['category'][0]['label'], 'Electronics & Tech')
+
+	def test_results_are_cached_per_normalized_filters(self):
+		self.client.get('/api/items/facets/', {'category': 'electronics'})
+		with self.assertNumQueries(0):
+			res = self.client.get('/api/items/facets/', {'category': ' ELECTRONICS '})
+		self.assertEqual(res.data['total'], 2)
+
+	def test_invalid_price_is_rejected(self):
+		res = self.client.get('/api/items/facets/', {'min_price': 'cheap'})
+		self.assertEqual(res.status_code, 400)
@@ -0,0 +1,71 @@
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from items import homepage
+from items.test_utils import ItemFixtures
+
+
+class HomepageSnapshotTest(ItemFixtures, TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client = APIClient()
+		self.create_seller()
+		self.phone = self.make_item('Phone', view_count=5)
+
+	def tearDown(self):
+		cache.clear()
+
+	def test_first_request_on_a_cold_cache_gets_a_full_homepage(self):
+		with mock.patch('items.homepage.run_in_background') as background:
+			res = self.client.get('/api/homepage/')
+		background.assert_not_called()
+		self.assertEqual([row['item_name'] for row in res.data['trending']], ['Phone'])
+		self.assertEqual(res.data['categories'], ['Electronics & Tech'])
+		self.assertEqual(res.data['recommended'], res.data['trending'])
+		self.assertIsNotNone(cache.get(homepage.SNAPSHOT_KEY))
+
+	def test_cold_request_waits_for_a_build_already_running(self):
+		cache.add(homepage.REBUILD_LOCK_KEY, 1)
+		built = homepage.build_snapshot()
+		cache.delete(homepage.SNAPSHOT_KEY)
+		with mock.patch('items.homepage.time.sleep', side_effect=lambda _: cache.set(homepage.SNAPSHOT_KEY, built, None)):
+			with mock.patch('items.homepage.build_snapshot') as build:
+				snapshot = homepage.get_snapshot()
+		build.assert_not_called()
+		self.assertEqual(snapshot, built)
+
+	def test_fresh_snapshot_is_served_from_cache(self):
+		homepage.build_snapshot()
+		first = self.client.get('/api/homepage/')
+		self.assertEqual([row['item_name'] for row in first.data['trending']], ['Phone'])
+		self.assertEqual(first.data['categories'], ['Electronics & Tech'])
+
+		self.make_item('Cable', view_count=9)
+		with self.assertNumQueries(0):
+			res = self.client.get('/api/homepage/')
+		self.assertEqual([row['item_name'] for row in res.data['trending']], ['Phone'])
+		# No history yet, so recommendations reuse the snapshot's trending list
+		self.assertEqual(res.data['recommended'], res.data['trending'])
+
+	@override_settings(HOMEPAGE_SNAPSHOT_STALE_SECONDS=60)
+	def test_stale_snapshot_is_served_while_rebuilt_in_background(self):
+		homepage.build_snapshot()
+		self.make_item('Cable', view_count=9)
+		snapshot = cache.get(homepage.SNAPSHOT_KEY)
+		snapshot['built_at'] = time.time() - 120
+		cache.set(homepage.SNAPSHOT_KEY, snapshot, None)
+
+		with mock.patch('items.homepage.run_in_background') as background:
+			res = self.client.get('/api/homepage/')
+			self.client.get('/api/homepage/')
+		self.assertEqual([row['item_name'] for row in res.data['trending']], ['Phone'])
+		# Scheduled once, not by every request that sees the stale copy
+		background.assert_called_once_with(homepage._rebuild)
+
+		homepage._rebuild()
+		res = self.client.get('/api/homepage/')
+		self.assertEqual([row['item_name'] for row in res.data['trending']], ['Cable', 'Phone'])
@@ -0,0 +1,82 @@
+import shutil
+import tempfile
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from items.images import needs_derivatives
+from items.models import Item
+from items.models.item import ItemImage
+from items.serializers import ItemImageSerializer
+
+
+def _png(width, height, mode='RGBA'):
+	buffer = BytesIO()
+	Image.new(mode, (width, height), (200, 40, 40, 128) if mode == 'RGBA' else (200, 40, 40)).save(buffer, 'PNG')
+	return ContentFile(buffer.getvalue(), name='photo.png')
+
+
+class ImageDerivativesTest(TestCase):
+	def setUp(self):
+		self.media_root = tempfile.mkdtemp()
+		self.override = override_settings(MEDIA_ROOT=self.media_root, BACKGROUND_TASKS_SYNC=True)
+		self.override.enable()
+		seller = User.objects.create_user(username='seller', email='s@example.com', password='pass')
+		self.item = Item.objects.create(
+			item_name='Lamp', item_price=Decimal('20.00'), item_category='home_kitchen',
+			item_quantity=10, seller=seller,
+		)
+
+	def tearDown(self):
+		self.override.disable()
+		shutil.rmtree(self.media_root, ignore_errors=True)
+
+	def _upload(self, width, height):
+		with self.captureOnCommitCallbacks(execute=True):
+			image = ItemImage.objects.create(item=self.item, image_file=_png(width, height))
+		image.refresh_from_db()
+		return image
+
+	def test_upload_is_resized_into_webp_and_jpeg(self):
+		image = self._upload(2000, 1000)
+		self.assertEqual(set(image.derivatives), {'thumb', 'card', 'zoom'})
+		self.assertEqual((image.derivatives['thumb']['width'], image.derivatives['thumb']['height']), (160, 80))
+		self.assertEqual(image.derivatives['zoom']['width'], 1600)
+		self.assertFalse(needs_derivatives(image))
+
+		with default_storage.open(image.derivatives['card']['webp']) as handle:
+			with Image.open(handle) as webp:
+				self.assertEqual((webp.format, webp.size), ('WEBP', (480, 240)))
+		with default_storage.open(image.derivatives['card']['jpeg']) as handle:
+			with Image.open(handle) as jpeg:
+				self.assertEqual(jpeg.format, 'JPEG')
+
+	def test_small_images_are_not_upscaled(self):
+		image = self._upload(100, 50)
+		self.assertEqual({v['width'] for v in image.derivatives.values()}, {100})
+
+	def test_serializer_exposes_srcset_per_format(self):
+		data = ItemImageSerializer(self._upload(800, 800)).data
+		self.assertEqual(set(data['srcset']), {'webp', 'jpeg'})
+		widths = [entry.rsplit(' ', 1)[1] for entry in data['srcset']['webp'].split(', ')]
+		self.assertEqual(widths, ['160w', '480w', '800w'])
+		self.assertEqual(ItemImageSerializer(ItemImage(item=self.item, image_url='https://x/y.png')).data['srcset'], {})
+
+	def test_backfill_command_renders_missing_derivatives_in_a_pool(self):
+		image = self._upload(640, 480)
+		ItemImage.objects.filter(pk=image.pk).update(derivatives={})
+		broken = ItemImage.objects.create(item=self.item, image_file=ContentFile(b'not an image', name='broken.png'))
+
+		out = StringIO()
+		call_command('build_image_derivatives', '--workers', '2', stdout=out)
+		self.assertIn('1 images, 1 skipped', out.getvalue())
+		image.refresh_from_db()
+		broken.refresh_from_db()
+		self.assertEqual(image.derivatives['card']['width'], 480)
+		self.assertEqual(broken.derivatives, {})
@@ -0,0 +1,111 @@
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from PIL import Image
+from rest_framework.test import APIClient
+
+from items.models.item import ItemImage
+from items.test_utils import ItemFixtures
+
+
+def _upload(color, name='photo.png'):
+	buffer = BytesIO()
+	Image.new('RGB', (40, 40), color).save(buffer, 'PNG')
+	return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class ItemImageUpdateTest(ItemFixtures, TestCase):
+	def setUp(self):
+		self.media_root = tempfile.mkdtemp()
+		self.override = override_settings(MEDIA_ROOT=self.media_root, BACKGROUND_TASKS_SYNC=True)
+		self.override.enable()
+		self.client = APIClient()
+		self.create_seller()
+		self.client.force_authenticate(self.seller)
+		self.item = self.make_item('Lamp', 'home_kitchen', '20.00', quantity=10)
+
+	def tearDown(self):
+		self.override.disable()
+		shutil.rmtree(self.media_root, ignore_errors=True)
+
+	def _images(self, item=None):
+		return list(ItemImage.objects.filter(item=item or self.item).values_list('id', 'image_url', 'position'))
+
+	def test_item_edit_only_touches_changed_images(self):
+		ItemImage.apply_changes(self.item, urls=['https://img/a.png', 'https://img/b.png'])
+		a, b = self._images()
+
+		with CaptureQueriesContext(connection) as ctx:
+			res = self.client.patch(
+				f'/api/items/{self.item.id}/',
+				{'image_urls': ['https://img/b.png', 'https://img/c.png', 'https://img/d.png']},
+				format='json',
+			)
+		self.assertEqual(res.status_code, 200)
+		inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "items_itemimage"')]
+		self.assertEqual(len(inserts), 1)
+
+		images = self._images()
+		self.assertEqual(images[0], (b[0], 'https://img/b.png', 0))
+		self.assertEqual([(url, pos) for _, url, pos in images[1:]], [('https://img/c.png', 1), ('https://img/d.png', 2)])
+		self.assertFalse(ItemImage.objects.filter(id=a[0]).exists())
+
+	def test_patch_images_keep_remove_order_and_add(self):
+		ItemImage.apply_changes(self.item, urls=['https://img/a.png', 'https://img/b.png', 'https://img/c.png'])
+		a, b, c = [row[0] for row in self._images()]
+
+		res = self.client.patch(
+			f'/api/items/{self.item.id}/images/',
+			{'remove': [a], 'order': [c, b], 'image_urls': ['https://img/d.png', 'https://img/c.png']},
+			format='json',
+		)
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual([row['id'] for row in res.data['item_images']][:2], [c, b])
+		self.assertEqual(
+			[(url, pos) for _, url, pos in self._images()],
+			[('https://img/c.png', 0), ('https://img/b.png', 1), ('https://img/d.png', 2)],
+		)
+
+		other = User.objects.create_user(username='other', email='o@example.com', password='pass')
+		self.client.force_authenticate(other)
+		res = self.client.patch(f'/api/items/{self.item.id}/images/', {'remove': [b]}, format='json')
+		self.assertEqual(res.status_code, 403)
+
+	def test_identical_uploads_share_a_file_until_the_last_reference_goes(self):
+		with self.captureOnCommitCallbacks(execute=True):
+			first = ItemImage.apply_changes(self.item, files=[_upload('red'), _upload('red', 'copy.png')])
+		self.assertEqual(len(first), 1)
+
+		other = self.make_item('Shade', 'home_kitchen', '20.00', quantity=10)
+		with self.captureOnCommitCallbacks(execute=True):
+			second = ItemImage.apply_changes(other, files=[_upload('red', 'again.png')])
+		name = first[0].image_file.name
+		self.assertEqual(second[0].image_file.name, name)
+		self.assertEqual(len(default_storage.listdir('item_images')[1]), 1)
+
+		with self.captureOnCommitCallbacks(execute=True):
+			ItemImage.apply_changes(self.item, keep=[])
+		self.assertTrue(default_storage.exists(name))
+
+		derived = ItemImage.objects.get(item=other).derivatives['thumb']['webp']
+		with self.captureOnCommitCallbacks(execute=True):
+			other.delete()
+		self.assertFalse(default_storage.exists(name))
+		self.assertFalse(default_storage.exists(derived))
+
+	def test_reuploading_an_existing_image_keeps_its_row(self):
+		with self.captureOnCommitCallbacks(execute=True):
+			original = ItemImage.apply_changes(self.item, files=[_upload('blue')])[0]
+			ItemImage.apply_changes(self.item, keep=[], files=[_upload('green'), _upload('blue', 'same.png')])
+
+		images = list(ItemImage.objects.filter(item=self.item))
+		self.assertEqual([img.position for img in images], [0, 1])
+		self.assertEqual(images[1].id, original.id)
+		self.assertEqual(len(default_storage.listdir('item_images')[1]), 2)
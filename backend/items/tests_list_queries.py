@@ -0,0 +1,71 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from items.models import Item
+from items.models.item import ItemImage
+
+
+class ListEndpointQueryCountTest(TestCase):
+	def setUp(self):
+		cache.clear()
+		self.client = APIClient()
+		self.seller = User.objects.create_user(username='seller', email='s@example.com', password='pass')
+		self.buyer = User.objects.create_user(username='buyer', email='b@example.com', password='pass')
+
+	def _add_items(self, count):
+		items = []
+		for n in range(count):
+			item = Item.objects.create(
+				item_name=f'Item {n}', item_price=Decimal('5.00'), item_category='electronics',
+				item_quantity=9, seller=self.seller,
+			)
+			ItemImage.objects.create(item=item, image_url=f'https://img.example.com/{n}-a.png')
+			ItemImage.objects.create(item=item, image_url=f'https://img.example.com/{n}-b.png')
+			items.append(item)
+		return items
+
+	def _count_queries(self, method, url, data=None):
+		with CaptureQueriesContext(connection) as ctx:
+			res = getattr(self.client, method)(url, data, format='json')
+		self.assertIn(res.status_code, (200, 201))
+		return len(ctx.captured_queries), res
+
+	def test_item_list_and_homepage_query_count_is_constant(self):
+		self._add_items(2)
+		few_list, _ = self._count_queries('get', '/api/items/')
+		few_home, _ = self._count_queries('get', '/api/homepage/')
+		self._add_items(6)
+		many_list, res = self._count_queries('get', '/api/items/')
+		# Drop the homepage snapshot so both requests build it
+		cache.clear()
+		many_home, _ = self._count_queries('get', '/api/homepage/')
+
+		self.assertEqual(few_list, many_list)
+		self.assertEqual(few_home, many_home)
+		# The first image of each item is the one that gets listed
+		first_row = res.data['results'][0]
+		self.assertTrue(first_row['item_image']['image_url'].endswith('-a.png'))
+
+	def test_suggestions_query_count_is_constant(self):
+		item = self._add_items(2)[0]
+		few, _ = self._count_queries('get', f'/api/items/{item.id}/suggestions/')
+		self._add_items(6)
+		many, _ = self._count_queries('get', f'/api/items/{item.id}/suggestions/')
+		self.assertEqual(few, many)
+
+	def test_cart_query_count_is_constant(self):
+		items = self._add_items(6)
+		self.client.force_authenticate(user=self.buyer)
+		self.client.post('/api/cart/items/', {'item_id': items[0].id}, format='json')
+		few, _ = self._count_queries('get', '/api/cart/')
+		for item in items[1:]:
+			self.client.post('/api/cart/items/', {'item_id': item.id}, format='json')
+		many, res = self._count_queries('get', '/api/cart/')
+		self.assertEqual(few, many)
+		self.assertEqual(len(res.data['items']), 6)
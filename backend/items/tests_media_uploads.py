@@ -0,0 +1,121 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from items.models import Item, MediaUpload, Review
+from orders.models import Order, OrderItem
+
+PNG = b'\x89PNG\r\n\x1a\n' + bytes(range(256)) * 40
+UPLOADS = '/api/uploads/review-media/'
+
+
+class ReviewMediaUploadTest(TestCase):
+	def setUp(self):
+		self.media_root = tempfile.mkdtemp()
+		self.override = override_settings(MEDIA_ROOT=self.media_root, MEDIA_UPLOAD_CHUNK_BYTES=4096)
+		self.override.enable()
+		self.client = APIClient()
+		self.buyer = User.objects.create_user(username='buyer', email='b@example.com', password='pass')
+		self.client.force_authenticate(self.buyer)
+
+	def tearDown(self):
+		self.override.disable()
+		shutil.rmtree(self.media_root, ignore_errors=True)
+
+	def _start(self, size, filename='clip.png'):
+		res = self.client.post(UPLOADS, {'filename': filename, 'size': size}, format='json')
+		self.assertEqual(res.status_code, 201)
+		return res.data['token']
+
+	def _chunk(self, token, offset, data):
+		return self.client.patch(
+			f'{UPLOADS}{token}/', data, content_type='application/offset+octet-stream',
+			HTTP_UPLOAD_OFFSET=str(offset),
+		)
+
+	def test_chunks_resume_and_assemble(self):
+		token = self._start(len(PNG))
+		self.assertEqual(self._chunk(token, 0, PNG[:4096]).data['offset'], 4096)
+
+		# A retried or out-of-order chunk is refused with the offset to resume from
+		conflict = self._chunk(token, 0, PNG[:4096])
+		self.assertEqual((conflict.status_code, conflict.data['offset']), (409, 4096))
+		self.assertEqual(self.client.get(f'{UPLOADS}{token}/').data['offset'], 4096)
+
+		offset = 4096
+		while offset < len(PNG):
+			res = self._chunk(token, offset, PNG[offset:offset + 4096])
+			self.assertEqual(res.status_code, 200)
+			offset = res.data['offset']
+		self.assertEqual((res.data['status'], res.data['content_type']), ('complete', 'image/png'))
+
+		upload = MediaUpload.objects.get(id=token)
+		with default_storage.open(upload.path) as handle:
+			self.assertEqual(handle.read(), PNG)
+		self.assertTrue(upload.path.endswith('.png'))
+		self.assertEqual(default_storage.listdir(f'{MediaUpload.PARTS_DIR}/{token}')[1], [])
+
+	def test_bad_files_fail_on_the_first_chunk(self):
+		token = self._start(10_000, 'evil.png')
+		res = self._chunk(token, 0, b'MZ\x90\x00' + b'\x00' * 4000)
+		self.assertEqual(res.status_code, 415)
+		self.assertFalse(MediaUpload.objects.filter(id=token).exists())
+
+		too_big = self.client.post(UPLOADS, {'filename': 'huge.mp4', 'size': 200 * 1024 * 1024}, format='json')
+		self.assertEqual(too_big.status_code, 400)
+
+		token = self._start(100)
+		self.assertEqual(self._chunk(token, 0, PNG[:200]).status_code, 413)
+		self.assertFalse(MediaUpload.objects.filter(id=token).exists())
+
+		token = self._start(len(PNG))
+		self.assertEqual(self._chunk(token, 0, PNG[:5000]).status_code, 413)
+
+	def test_other_users_cannot_touch_an_upload(self):
+		token = self._start(len(PNG))
+		other = User.objects.create_user(username='other', email='o@example.com', password='pass')
+		self.client.force_authenticate(other)
+		self.assertEqual(self._chunk(token, 0, PNG[:4096]).status_code, 404)
+
+	def test_finished_upload_is_attached_to_a_review(self):
+		seller = User.objects.create_user(username='seller', email='s@example.com', password='pass')
+		item = Item.objects.create(
+			item_name='Lamp', item_price=Decimal('20.00'), item_category='home_kitchen',
+			item_quantity=10, seller=seller,
+		)
+		order = Order.objects.create(user=self.buyer, total_price=Decimal('20.00'), status='delivered')
+		OrderItem.objects.create(order=order, item=item, quantity=1, price=Decimal('20.00'))
+
+		token = self._start(4000)
+		unfinished = self.client.post('/api/reviews/', {
+			'item_id': item.id, 'order_id': order.id, 'rating': 5, 'media_upload': token,
+		}, format='json')
+		self.assertEqual(unfinished.status_code, 400)
+
+		self._chunk(token, 0, PNG[:4000])
+		res = self.client.post('/api/reviews/', {
+			'item_id': item.id, 'order_id': order.id, 'rating': 5, 'media_upload': token,
+		}, format='json')
+		self.assertEqual(res.status_code, 201)
+		review = Review.objects.get(id=res.data['id'])
+		self.assertTrue(review.media.name.startswith('reviews/media/'))
+		self.assertTrue(default_storage.exists(review.media.name))
+		self.assertFalse(MediaUpload.objects.filter(id=token).exists())
+
+	def test_stale_uploads_are_pruned(self):
+		token = self._start(len(PNG))
+		self._chunk(token, 0, PNG[:4096])
+		MediaUpload.objects.filter(id=token).update(updated_at=timezone.now() - timedelta(days=2))
+
+		call_command('prune_media_uploads', stdout=StringIO())
+		self.assertFalse(MediaUpload.objects.exists())
+		self.assertEqual(default_storage.listdir(f'{MediaUpload.PARTS_DIR}/{token}')[1], [])
@@ -0,0 +1,74 @@
+import math
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from items.models import Item, ItemNeighbor
+from orders.models import Cart, CartItem, Order, OrderItem
+
+
+class ItemNeighborTest(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.seller = User.objects.create_user(username='seller', email='s@example.com', password='pass')
+		self.buyer = User.objects.create_user(username='buyer', email='b@example.com', password='pass')
+		self.phone, self.case, self.charger, self.lamp = [
+			Item.objects.create(
+				item_name=name, item_price=Decimal('10.00'), item_category=category,
+				item_quantity=20, seller=self.seller,
+			)
+			for name, category in (
+				('Phone', 'electronics'), ('Case', 'electronics'),
+				('Charger', 'electronics'), ('Lamp', 'home_kitchen'),
+			)
+		]
+
+	def _order(self, *items, status='delivered'):
+		order = Order.objects.create(user=self.buyer, total_price=Decimal('10.00'), status=status)
+		for item in items:
+			OrderItem.objects.create(order=order, item=item, quantity=1, price=item.item_price)
+		return order
+
+	def test_rebuild_scores_pairs_by_cosine(self):
+		self._order(self.phone, self.case)
+		self._order(self.phone, self.case)
+		self._order(self.phone, self.charger)
+		self._order(self.phone, self.lamp, status='cancelled')
+
+		ItemNeighbor.rebuild()
+		scores = {row.neighbor_id: row.score for row in ItemNeighbor.objects.filter(item=self.phone)}
+		self.assertEqual(set(scores), {self.case.id, self.charger.id})
+		self.assertAlmostEqual(scores[self.case.id], 2 / math.sqrt(3 * 2))
+		self.assertAlmostEqual(scores[self.charger.id], 1 / math.sqrt(3 * 1))
+
+	def test_suggestions_and_cart_read_neighbours(self):
+		self._order(self.phone, self.lamp)
+		self._order(self.phone, self.lamp)
+		ItemNeighbor.rebuild()
+
+		res = self.client.get(f'/api/items/{self.phone.id}/suggestions/')
+		related = [row['item_name'] for row in res.data['related']]
+		# Co-purchased first, then the same category
+		self.assertEqual(related[0], 'Lamp')
+		self.assertEqual(set(related[1:]), {'Case', 'Charger'})
+
+		self.client.force_authenticate(user=self.buyer)
+		cart = Cart.objects.create(user=self.buyer)
+		CartItem.objects.create(cart=cart, item=self.phone, quantity=1)
+		res = self.client.get('/api/cart/bought-together/')
+		self.assertEqual([row['item_name'] for row in res.data], ['Lamp'])
+
+	def test_rebuild_counts_across_order_batches(self):
+		for _ in range(3):
+			self._order(self.phone, self.case)
+		self._order(self.phone, self.charger)
+
+		ItemNeighbor.rebuild(batch_size=1)
+		batched = set(ItemNeighbor.objects.values_list('item_id', 'neighbor_id', 'score'))
+		ItemNeighbor.rebuild()
+		self.assertEqual(batched, set(ItemNeighbor.objects.values_list('item_id', 'neighbor_id', 'score')))
+		self.assertAlmostEqual(
+			ItemNeighbor.objects.get(item=self.phone, neighbor=self.case).score, 3 / math.sqrt(4 * 3),
+		)
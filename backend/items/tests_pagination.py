@@ -0,0 +1,65 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from items.models import Item
+
+
+class ItemKeysetPaginationTest(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.seller = User.objects.create_user(username='shop', email='shop@example.com', password='pass')
+		# Equal view counts force the tie-break on created_at/id
+		self.items = [
+			Item.objects.create(
+				item_name=f'Item {n}',
+				item_price=Decimal('10.00'),
+				item_category='electronics',
+				item_quantity=1,
+				seller=self.seller,
+			)
+			for n in range(7)
+		]
+
+	def _walk(self, url, params=None, direction='next'):
+		ids = []
+		res = self.client.get(url, params)
+		while True:
+			self.assertEqual(res.status_code, 200)
+			ids.extend(row['id'] for row in res.data['results'])
+			if not res.data[direction]:
+				return ids, res
+			res = self.client.get(res.data[direction])
+
+	def test_walks_every_item_once_in_sort_order(self):
+		ids, last = self._walk('/api/items/', {'page_size': 3})
+		expected = list(Item.search_items().order_by('-view_count', '-created_at', '-id').values_list('id', flat=True))
+		self.assertEqual(ids, expected)
+
+		# Walking back from the last page returns to the first one
+		back = self.client.get(last.data['previous'])
+		self.assertEqual([row['id'] for row in back.data['results']], expected[3:6])
+
+	def test_seller_storefront_is_paginated(self):
+		ids, _ = self._walk('/api/items/', {'seller': 'shop', 'page_size': 2})
+		self.assertEqual(ids, sorted((i.id for i in self.items), reverse=True))
+
+	def test_search_results_paginate_on_relevance(self):
+		ids, _ = self._walk('/api/items/', {'search': 'item', 'page_size': 3})
+		self.assertEqual(sorted(ids), sorted(i.id for i in self.items))
+
+	def test_pages_use_no_offset_or_count(self):
+		first = self.client.get('/api/items/', {'page_size': 2})
+		with CaptureQueriesContext(connection) as ctx:
+			self.client.get(first.data['next'])
+		sql = ' '.join(q['sql'].upper() for q in ctx.captured_queries)
+		self.assertNotIn('OFFSET', sql)
+		self.assertNotIn('COUNT(', sql)
+
+	def test_invalid_cursor_is_rejected(self):
+		res = self.client.get('/api/items/', {'cursor': 'not-a-cursor'})
+		self.assertEqual(res.status_code, 404)
@@ -0,0 +1,78 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from items.models import Item
+from items.test_utils import ItemFixtures
+
+
+class EffectivePriceTest(ItemFixtures, TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.create_seller()
+
+	def test_stored_on_save(self):
+		item = self.make_item('Phone', price='100.00')
+		self.assertEqual((item.effective_price, item.discount_percentage), (Decimal('100.00'), 0))
+
+		item.is_on_sale = True
+		item.sale_price = Decimal('75.00')
+		item.save(update_fields=['is_on_sale', 'sale_price'])
+		item.refresh_from_db()
+		self.assertEqual((item.effective_price, item.discount_percentage), (Decimal('75.00'), 25))
+
+	def test_future_sale_is_not_applied_until_it_starts(self):
+		start = timezone.now() + timedelta(hours=1)
+		item = self.make_item('Phone', price='100.00', is_on_sale=True, sale_price=Decimal('60.00'), sale_start_date=start)
+		self.assertEqual(item.effective_price, Decimal('100.00'))
+
+		self.assertEqual(Item.refresh_sale_prices(now=start + timedelta(minutes=1)), 1)
+		item.refresh_from_db()
+		self.assertEqual((item.effective_price, item.discount_percentage), (Decimal('60.00'), 40))
+
+	def test_detail_reads_sale_state_price_and_discount_together(self):
+		item = self.make_item(
+			'Phone', price='100.00', is_on_sale=True, sale_price=Decimal('60.00'),
+			sale_start_date=timezone.now() + timedelta(hours=1),
+		)
+		# The sale starts before the sweep has refreshed the stored discount
+		Item.objects.filter(id=item.id).update(sale_start_date=timezone.now() - timedelta(minutes=1))
+
+		res = self.client.get(f'/api/items/{item.id}/')
+		self.assertTrue(res.data['is_sale_active'])
+		self.assertEqual(Decimal(str(res.data['current_price'])), Decimal('60.00'))
+		self.assertEqual(res.data['discount_percentage'], 40)
+
+	def test_sweep_ends_expired_sales_and_skips_up_to_date_rows(self):
+		end = timezone.now() + timedelta(hours=1)
+		ending = self.make_item('Phone', price='100.00', is_on_sale=True, sale_price=Decimal('90.00'), sale_end_date=end)
+		self.make_item('Cable', price='10.00', is_on_sale=True, sale_price=Decimal('5.00'))
+		self.make_item('Case', price='20.00')
+
+		later = end + timedelta(minutes=1)
+		with self.assertNumQueries(2):
+			self.assertEqual(Item.refresh_sale_prices(now=later), 1)
+		ending.refresh_from_db()
+		self.assertEqual((ending.effective_price, ending.discount_percentage), (Decimal('100.00'), 0))
+		self.assertEqual(Item.refresh_sale_prices(now=later), 0)
+
+	def test_price_filter_and_sorts_use_effective_price(self):
+		self.make_item('Phone', price='100.00', is_on_sale=True, sale_price=Decimal('40.00'))
+		self.make_item('Cable', price='50.00')
+		self.make_item('Case', price='70.00', is_on_sale=True, sale_price=Decimal('63.00'))
+
+		res = self.client.get('/api/items/', {'max_price': '45'})
+		self.assertEqual([row['item_name'] for row in res.data['results']], ['Phone'])
+
+		res = self.client.get('/api/items/', {'sort': 'price_asc'})
+		self.assertEqual([row['item_name'] for row in res.data['results']], ['Phone', 'Cable', 'Case'])
+
+		res = self.client.get('/api/items/deals/')
+		self.assertEqual([row['item_name'] for row in res.data['results']], ['Phone', 'Case'])
+
+	def test_unknown_sort_is_rejected(self):
+		res = self.client.get('/api/items/', {'sort': 'cheapest'})
+		self.assertEqual(res.status_code, 400)
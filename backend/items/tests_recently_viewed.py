@@ -0,0 +1,64 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from items.models import Item
+from items.recently_viewed import VISITOR_COOKIE
+from items.view_counter import view_counter
+
+
+class RecentlyViewedTest(TestCase):
+	def setUp(self):
+		view_counter.clear()
+		cache.clear()
+		self.client = APIClient()
+		self.seller = User.objects.create_user(username='seller', email='s@example.com', password='pass')
+		self.buyer = User.objects.create_user(username='buyer', email='b@example.com', password='pass')
+		self.phone, self.case = [
+			Item.objects.create(
+				item_name=name, item_price=Decimal('10.00'), item_category='electronics',
+				item_quantity=5, seller=self.seller,
+			)
+			for name in ('Phone', 'Case')
+		]
+
+	def tearDown(self):
+		cache.clear()
+		view_counter.clear()
+
+	def _recent(self, **headers):
+		res = self.client.get('/api/homepage/', **headers)
+		return [row['item_name'] for row in res.data['recently_viewed']]
+
+	def test_signed_in_user_list_without_session(self):
+		self.client.force_authenticate(user=self.buyer)
+		self.client.get(f'/api/items/{self.phone.id}/')
+		self.client.get(f'/api/items/{self.case.id}/')
+		self.client.get(f'/api/items/{self.phone.id}/')
+
+		self.assertEqual(self._recent(), ['Phone', 'Case'])
+		self.assertNotIn('sessionid', self.client.cookies)
+
+	def test_anonymous_visitor_gets_an_id_cookie(self):
+		res = self.client.get(f'/api/items/{self.phone.id}/')
+		visitor_id = res.cookies[VISITOR_COOKIE].value
+		self.assertEqual(self._recent(), ['Phone'])
+
+		# Header works for clients that don't keep cookies
+		other = APIClient()
+		self.assertEqual([row['item_name'] for row in other.get(
+			'/api/homepage/', HTTP_X_VISITOR_ID=visitor_id,
+		).data['recently_viewed']], ['Phone'])
+
+	def test_repeat_view_of_the_head_item_skips_the_write(self):
+		self.client.force_authenticate(user=self.buyer)
+		self.client.get(f'/api/items/{self.phone.id}/')
+		with mock.patch('items.recently_viewed.cache.set') as cache_set:
+			self.client.get(f'/api/items/{self.phone.id}/')
+			cache_set.assert_not_called()
+			self.client.get(f'/api/items/{self.case.id}/')
+			cache_set.assert_called_once()
@@ -0,0 +1,79 @@
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from items.models import Item, Review
+from items.serializers import ItemListSerializer
+from orders.models import Order, OrderItem
+
+
+class ItemReviewAggregatesTest(TestCase):
+	def setUp(self):
+		self.seller = User.objects.create_user(username='seller', email='s@example.com', password='pass')
+		self.item = Item.objects.create(
+			item_name='Lamp', item_price=Decimal('20.00'), item_category='home_kitchen',
+			item_quantity=10, seller=self.seller,
+		)
+
+	def _review(self, username, rating):
+		buyer = User.objects.create_user(username=username, email=f'{username}@example.com', password='pass')
+		order = Order.objects.create(user=buyer, total_price=Decimal('20.00'), status='delivered')
+		OrderItem.objects.create(order=order, item=self.item, quantity=1, price=Decimal('20.00'))
+		return Review.objects.create(item=self.item, reviewer=buyer, rating=rating, order=order)
+
+	def test_aggregates_follow_create_update_delete(self):
+		first = self._review('b1', 5)
+		self._review('b2', 3)
+		self.item.refresh_from_db()
+		self.assertEqual(self.item.review_stats, Review.get_item_stats(self.item))
+		self.assertEqual(self.item.review_stats['average_rating'], 4.0)
+
+		first.rating = 1
+		first.save()
+		self.item.refresh_from_db()
+		self.assertEqual((self.item.rating_5_count, self.item.rating_1_count, self.item.rating_sum), (0, 1, 4))
+
+		first.delete()
+		self.item.refresh_from_db()
+		self.assertEqual(self.item.review_stats, Review.get_item_stats(self.item))
+		self.assertEqual(self.item.review_count, 1)
+
+	def test_stale_item_save_keeps_aggregates(self):
+		stale = Item.objects.get(id=self.item.id)
+		self._review('b1', 4)
+		stale.item_name = 'Desk Lamp'
+		stale.save()
+		self.item.refresh_from_db()
+		self.assertEqual(self.item.review_count, 1)
+
+	def test_rebuild_command_recomputes_from_reviews(self):
+		self._review('b1', 2)
+		Item.objects.filter(id=self.item.id).update(review_count=9, rating_sum=0)
+		call_command('rebuild_review_stats', stdout=StringIO())
+		self.item.refresh_from_db()
+		self.assertEqual(self.item.review_stats, Review.get_item_stats(self.item))
+
+	def test_list_serializer_reads_stored_stats(self):
+		self._review('b1', 4)
+		item = Item.objects.get(id=self.item.id)
+		with self.assertNumQueries(1):  # just the first-image lookup
+			data = ItemListSerializer(item).data
+		self.assertEqual(data['review_stats']['total_reviews'], 1)
+
+	def test_min_rating_means_any_review_that_good(self):
+		# Averages 3 stars, but one buyer gave it 5
+		self._review('b1', 5)
+		self._review('b2', 1)
+		matching = lambda stars: list(Item.search_items(min_rating=stars).values_list('item_name', flat=True))
+		self.assertEqual(matching(5), ['Lamp'])
+		self._review('b3', 4)
+		Review.objects.filter(rating=5).delete()
+		self.assertEqual(matching(5), [])
+		self.assertEqual(matching(4), ['Lamp'])
+		cache.clear()
+		bands = {band['min_rating']: band['count'] for band in Item.get_facets()['rating']}
+		self.assertEqual((bands[4], bands[3]), (1, 1))
@@ -0,0 +1,81 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from items.models import Item, Review
+from orders.models import Order, OrderItem
+
+
+class ItemReviewListingTest(TestCase):
+	def setUp(self):
+		self.client = APIClient()
+		self.seller = User.objects.create_user(username='seller', email='s@example.com', password='pass')
+		self.viewer = User.objects.create_user(username='viewer', email='v@example.com', password='pass')
+		self.item = Item.objects.create(
+			item_name='Lamp', item_price=Decimal('20.00'), item_category='home_kitchen',
+			item_quantity=10, seller=self.seller,
+		)
+
+	def _review(self, username, rating, helpful=0):
+		buyer = User.objects.create_user(username=username, email=f'{username}@example.com', password='pass')
+		order = Order.objects.create(user=buyer, total_price=Decimal('20.00'), status='delivered')
+		OrderItem.objects.create(order=order, item=self.item, quantity=1, price=Decimal('20.00'))
+		review = Review.objects.create(item=self.item, reviewer=buyer, rating=rating, order=order)
+		Review.objects.filter(id=review.id).update(helpful_count=helpful)
+		return review
+
+	def _pages(self, url):
+		ids = []
+		while url:
+			res = self.client.get(url)
+			self.assertEqual(res.status_code, 200)
+			ids += [row['id'] for row in res.data['results']]
+			url = res.data['next']
+		return ids
+
+	def test_pages_walk_every_review_most_helpful_first(self):
+		reviews = [self._review(f'b{i}', 1 + i % 5, helpful=i % 4) for i in range(13)]
+		ids = self._pages(f'/api/items/{self.item.id}/reviews/?page_size=5')
+		expected = sorted(reviews, key=lambda r: (-(reviews.index(r) % 4), -r.id))
+		self.assertEqual(ids, [r.id for r in expected])
+
+	def test_sort_and_filters(self):
+		low = self._review('b1', 2)
+		high = self._review('b2', 5)
+		newest = self._review('b3', 4)
+
+		base = f'/api/items/{self.item.id}/reviews/'
+		self.assertEqual(self._pages(base + '?sort=newest'), [newest.id, high.id, low.id])
+		self.assertEqual(self._pages(base + '?sort=rating_low'), [low.id, newest.id, high.id])
+		self.assertEqual(self._pages(base + '?rating=5'), [high.id])
+		self.assertEqual(self._pages(base + '?has_media=true'), [])
+		self.assertEqual(self.client.get(base + '?sort=oldest').status_code, 400)
+		self.assertEqual(self.client.get(base + '?rating=9').status_code, 400)
+
+	def test_upvote_state_is_one_query_per_page(self):
+		reviews = [self._review(f'b{i}', 4) for i in range(6)]
+		reviews[2].upvoted_by.add(self.viewer)
+		self.client.force_authenticate(self.viewer)
+
+		with CaptureQueriesContext(connection) as ctx:
+			res = self.client.get(f'/api/items/{self.item.id}/reviews/')
+		upvote_queries = [q for q in ctx.captured_queries if 'upvoted_by' in q['sql']]
+		self.assertEqual(len(upvote_queries), 1)
+		upvoted = {row['id'] for row in res.data['results'] if row['is_upvoted']}
+		self.assertEqual(upvoted, {reviews[2].id})
+
+	def test_detail_embeds_only_the_first_page(self):
+		for i in range(12):
+			self._review(f'b{i}', 5)
+
+		res = self.client.get(f'/api/items/{self.item.id}/')
+		self.assertEqual(len(res.data['reviews']), 10)
+		self.assertIn(f'/api/items/{self.item.id}/reviews/?cursor=', res.data['reviews_next'])
+
+		rest = self._pages(res.data['reviews_next'])
+		self.assertEqual(len(rest), 2)
+		self.assertFalse({row['id'] for row in res.data['reviews']} & set(rest))
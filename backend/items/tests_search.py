@@ -0,0 +1,36 @@
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from items.models import Item
+from items.test_utils import ItemFixtures
+
+
+class ItemFullTextSearchTest(ItemFixtures, TestCase):
+	def setUp(self):
+		self.create_seller()
+		self.in_desc = self.make_item('Leather Case', item_desc='Fits any phone up to 6 inches')
+		self.in_summary = self.make_item('Charger', item_summary='Fast phone charger')
+		self.in_name = self.make_item('Smart Phone', item_desc='Unlocked')
+
+	def test_results_are_ranked_name_then_summary_then_desc(self):
+		results = list(Item.search_items(query='phone'))
+		self.assertEqual(results, [self.in_name, self.in_summary, self.in_desc])
+
+	def test_prefix_and_multi_term_matching(self):
+		self.assertEqual(list(Item.search_items(query='pho')), [self.in_name, self.in_summary, self.in_desc])
+		self.assertEqual(list(Item.search_items(query='smart pho')), [self.in_name])
+		self.assertEqual(Item.search_items(query='%%%').count(), 0)
+
+	def test_index_follows_item_save_and_delete(self):
+		self.in_desc.item_desc = 'Fits any tablet'
+		self.in_desc.save()
+		self.assertNotIn(self.in_desc, Item.search_items(query='phone'))
+		self.assertIn(self.in_desc, Item.search_items(query='tablet'))
+
+		self.in_name.delete()
+		self.assertEqual(list(Item.search_items(query='phone')), [self.in_summary])
+
+	def test_search_through_item_list_endpoint(self):
+		res = APIClient().get('/api/items/', {'search': 'phone'})
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual([row['id'] for row in res.data['results']], [self.in_name.id, self.in_summary.id, self.in_desc.id])
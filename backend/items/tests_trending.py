@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from items.models import Item, ItemActivityBucket, TrendingScore
+from items.models.trending import hour_bucket
+from items.analytics import compact_events, event_log
+from items.test_utils import ItemFixtures
+
+
+class TrendingScoreTest(ItemFixtures, TestCase):
+	def setUp(self):
+		event_log.clear()
+		self.client = APIClient()
+		self.create_seller()
+		self.now = hour_bucket(timezone.now())
+
+	def tearDown(self):
+		event_log.clear()
+
+	def test_compacted_events_land_in_hourly_buckets(self):
+		item = self.make_item('Phone')
+		event_log.record('view', item)
+		event_log.record('view', item)
+		with self.captureOnCommitCallbacks(execute=True):
+			item.reduce_stock(2)
+		event_log.flush()
+		compact_events(settle_seconds=0)
+
+		bucket = ItemActivityBucket.objects.get(item=item)
+		self.assertEqual((bucket.views, bucket.purchases), (2, 2))
+		self.assertEqual(bucket.hour, hour_bucket(timezone.now()))
+
+	def test_recent_activity_outranks_old_all_time_popularity(self):
+		old = self.make_item('Old Favourite', view_count=1000)
+		new = self.make_item('New Hit')
+		ItemActivityBucket.objects.create(item=old, views=100, hour=hour_bucket(self.now - timedelta(hours=120)))
+		ItemActivityBucket.objects.create(item=new, views=20, hour=hour_bucket(self.now - timedelta(hours=1)))
+
+		TrendingScore.recompute(now=self.now, half_life_hours=24)
+		self.assertEqual([i.id for i in Item.get_trending_items()], [new.id, old.id])
+
+		decayed = TrendingScore.objects.get(item=old).score
+		self.assertAlmostEqual(decayed, 100 * 0.5 ** 5)
+
+	def test_endpoint_filters_by_category_and_skips_unavailable(self):
+		phone = self.make_item('Phone')
+		dice = self.make_item('Dice', 'other', custom_category='board games')
+		gone = self.make_item('Gone')
+		for item, views in ((phone, 5), (dice, 9), (gone, 50)):
+			ItemActivityBucket.objects.create(item=item, views=views, hour=hour_bucket(self.now))
+		TrendingScore.recompute(now=self.now)
+		gone.is_available = False
+		gone.save()
+
+		res = self.client.get('/api/items/trending/')
+		self.assertEqual([row['item_name'] for row in res.data], ['Dice', 'Phone'])
+		with CaptureQueriesContext(connection) as ctx:
+			res = self.client.get('/api/items/trending/', {'category': 'Board Games'})
+		self.assertEqual([row['item_name'] for row in res.data], ['Dice'])
+		# Top-K comes off the score table alone, not a join sorted on the item side
+		score_reads = [q['sql'] for q in ctx.captured_queries if 'items_trendingscore' in q['sql']]
+		self.assertEqual(len(score_reads), 1)
+		self.assertNotIn('JOIN', score_reads[0])
+
+	def test_reads_further_pages_when_the_top_ids_went_unavailable(self):
+		items = [self.make_item(f'Item {views}') for views in range(1, 6)]
+		for views, item in enumerate(items, start=1):
+			ItemActivityBucket.objects.create(item=item, views=views, hour=hour_bucket(self.now))
+		TrendingScore.recompute(now=self.now)
+		# The top four by score sell out: more than the first page of limit * 2 ids
+		Item.objects.filter(id__in=[item.id for item in items[1:]]).update(is_available=False)
+
+		self.assertEqual([item.item_name for item in Item.get_trending_items(limit=1)], ['Item 1'])
+		self.assertEqual([item.item_name for item in Item.get_trending_items(limit=2)], ['Item 1'])
@@ -0,0 +1,65 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from items.models import Item
+from items.view_counter import view_counter
+
+
+class BufferedViewCounterTest(TestCase):
+	def setUp(self):
+		view_counter.clear()
+		self.client = APIClient()
+		self.seller = User.objects.create_user(username='seller', email='s@example.com', password='pass')
+		self.phone, self.case, self.cable = [
+			Item.objects.create(
+				item_name=name, item_price=Decimal('10.00'), item_category='electronics',
+				item_quantity=5, seller=self.seller, view_count=7,
+			)
+			for name in ('Phone', 'Case', 'Cable')
+		]
+
+	def tearDown(self):
+		view_counter.clear()
+
+	def test_page_views_write_nothing_until_flushed(self):
+		with self.assertNumQueries(0):
+			self.phone.increment_view_count()
+		self.client.get(f'/api/items/{self.phone.id}/')
+		res = self.client.get(f'/api/items/{self.phone.id}/')
+		# Readers see stored + pending
+		self.assertEqual(res.data['view_count'], 10)
+		self.phone.refresh_from_db()
+		self.assertEqual(self.phone.view_count, 7)
+
+	def test_flush_groups_updates_by_delta(self):
+		for item, views in ((self.phone, 3), (self.case, 3), (self.cable, 1)):
+			for _ in range(views):
+				view_counter.increment(item.id)
+
+		# Two distinct deltas -> two UPDATEs
+		with self.assertNumQueries(2):
+			self.assertEqual(view_counter.flush(), 3)
+		counts = dict(Item.objects.values_list('item_name', 'view_count'))
+		self.assertEqual(counts, {'Phone': 10, 'Case': 10, 'Cable': 8})
+		self.assertEqual(view_counter.pending(self.phone.id), 0)
+
+	def test_stale_save_keeps_flushed_views(self):
+		stale = Item.objects.get(id=self.phone.id)
+		view_counter.increment(self.phone.id, 5)
+		view_counter.flush()
+		stale.item_name = 'Phone 2'
+		stale.save()
+		self.phone.refresh_from_db()
+		self.assertEqual((self.phone.item_name, self.phone.view_count), ('Phone 2', 12))
+
+	def test_ticker_flushes_only_once_the_oldest_view_is_due(self):
+		view_counter.increment(self.phone.id)
+		with self.settings(VIEW_COUNT_FLUSH_SECONDS=60):
+			self.assertEqual(view_counter.flush_if_due(), 0)
+		with self.settings(VIEW_COUNT_FLUSH_SECONDS=0):
+			self.assertEqual(view_counter.flush_if_due(), 1)
+		self.phone.refresh_from_db()
+		self.assertEqual(self.phone.view_count, 8)
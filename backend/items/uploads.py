@@ -0,0 +1,88 @@
+import io
+
+'''
+    Resumable chunked uploads for review media (see items.models.MediaUpload).
+
+    The client declares the file size up front, then PATCHes raw byte ranges in order
+    with an Upload-Offset header, resuming from the offset GET reports after a
+    dropped connection. Each request carries at most MEDIA_UPLOAD_CHUNK_BYTES, so a
+    worker is only held for one chunk, never for the whole transfer. The first chunk
+    is sniffed from its first SNIFF_BYTES before anything else is read, so
+    non-image/video files and oversized uploads fail immediately instead of after
+    100MB has been buffered.
+'''
+
+SNIFF_BYTES = 4096
+
+# (magic bytes at offset 0, content type, extension)
+_SIGNATURES = (
+    (b'\xff\xd8\xff', 'image/jpeg', '.jpg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png', '.png'),
+    (b'GIF87a', 'image/gif', '.gif'),
+    (b'GIF89a', 'image/gif', '.gif'),
+    (b'\x1a\x45\xdf\xa3', 'video/webm', '.webm'),
+)
+# ISO base media brands (bytes 8-12, after 'ftyp') that are still images
+_IMAGE_BRANDS = {b'heic': ('image/heic', '.heic'), b'heix': ('image/heic', '.heic'),
+                 b'mif1': ('image/heif', '.heif'), b'avif': ('image/avif', '.avif')}
+
+
+# (content type, extension) of an image/video from its first bytes, or None
+def sniff_media_type(head):
+    for magic, content_type, extension in _SIGNATURES:
+        if head.startswith(magic):
+            return content_type, extension
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'image/webp', '.webp'
+    if head[:4] == b'RIFF' and head[8:12] == b'AVI ':
+        return 'video/x-msvideo', '.avi'
+    if head[4:8] == b'ftyp':
+        brand = head[8:12]
+        if brand in _IMAGE_BRANDS:
+            return _IMAGE_BRANDS[brand]
+        if brand == b'qt  ':
+            return 'video/quicktime', '.mov'
+        return 'video/mp4', '.mp4'
+    return None
+
+
+def read_exactly(stream, size):
+    buffer = io.BytesIO()
+    while buffer.tell() < size:
+        piece = stream.read(min(size - buffer.tell(), 64 * 1024))
+        if not piece:
+            break
+        buffer.write(piece)
+    return buffer.getvalue()
+
+
+class ConcatenatedReader(io.RawIOBase):
+    ''' Read-only stream over several stored files in sequence, for assembling chunks
+        without holding the whole upload in memory '''
+
+    def __init__(self, storage, names):
+        self._storage = storage
+        self._names = list(names)
+        self._current = None
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while True:
+            if self._current is None:
+                if not self._names:
+                    return 0
+                self._current = self._storage.open(self._names.pop(0), 'rb')
+            data = self._current.read(len(buffer))
+            if data:
+                buffer[:len(data)] = data
+                return len(data)
+            self._current.close()
+            self._current = None
+
+    def close(self):
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+        super().close()
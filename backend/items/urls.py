@@ -2,7 +2,8 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     HomepageView, ItemViewSet, ReviewView, 
-    MyReviewableItemsView
+    MyReviewableItemsView, CategoryListView, SellerAnalyticsView,
+    ReviewMediaUploadView, ReviewMediaUploadDetailView,
 )
 
 router = DefaultRouter()
@@ -16,5 +17,12 @@ urlpatterns = [
     path('my-reviewable-items/', MyReviewableItemsView.as_view(), name='my-reviewable-items'),
     # Homepage
     path('homepage/', HomepageView.as_view(), name='homepage'),
+    # Category directory with item counts
+    path('categories/', CategoryListView.as_view(), name='categories'),
+    # Seller dashboard analytics
+    path('seller/analytics/', SellerAnalyticsView.as_view(), name='seller-analytics'),
+    # Resumable chunked uploads for review media
+    path('uploads/review-media/', ReviewMediaUploadView.as_view(), name='review-media-upload'),
+    path('uploads/review-media/<uuid:token>/', ReviewMediaUploadDetailView.as_view(), name='review-media-upload-detail'),
 
 ]
\ No newline at end of file
@@ -0,0 +1,98 @@
+import atexit
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db.models import F
+
+from core.background import register_periodic
+
+'''
+    In-process buffer for item page views.
+
+    A view only bumps an in-memory counter. In serving processes a ticker thread
+    (core.background.start_periodic_tasks) checks every second and writes pending views
+    out once the oldest is VIEW_COUNT_FLUSH_SECONDS old; anything left is written at
+    exit. A flush is one UPDATE per distinct delta rather than one per view, so a hot
+    item's row is no longer written on every page view. Readers add pending(item_id) to
+    the stored value; Item.save never writes view_count, so a stale instance can't undo
+    a flush.
+'''
+
+
+class ViewCounter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = Counter()
+        self._pending_since = None
+        self._flushing = False
+
+    def increment(self, item_id, amount=1):
+        with self._lock:
+            if self._pending_since is None:
+                self._pending_since = time.monotonic()
+            self._pending[item_id] += amount
+            return self._pending[item_id]
+
+    # Ticker entry point: flush once the oldest pending view is due
+    def flush_if_due(self):
+        max_age = getattr(settings, 'VIEW_COUNT_FLUSH_SECONDS', 10)
+        with self._lock:
+            due = (
+                not self._flushing and self._pending_since is not None
+                and time.monotonic() - self._pending_since >= max_age
+            )
+            if due:
+                self._flushing = True
+        return self.flush() if due else 0
+
+    # Views counted here but not yet written to the database
+    def pending(self, item_id):
+        return self._pending.get(item_id, 0)
+
+    # Write every pending view: one UPDATE per distinct delta
+    def flush(self):
+        from items.models import Item
+
+        with self._lock:
+            pending, self._pending = self._pending, Counter()
+            self._pending_since = None
+
+        try:
+            by_delta = defaultdict(list)
+            for item_id, delta in pending.items():
+                by_delta[delta].append(item_id)
+            for delta, item_ids in by_delta.items():
+                Item.objects.filter(id__in=item_ids).update(view_count=F('view_count') + delta)
+        except Exception:
+            # Keep the views for the next flush rather than dropping them
+            with self._lock:
+                self._pending.update(pending)
+                self._pending_since = self._pending_since or time.monotonic()
+            raise
+        finally:
+            with self._lock:
+                self._flushing = False
+        return len(pending)
+
+    def clear(self):
+        with self._lock:
+            self._pending = Counter()
+            self._pending_since = None
+            self._flushing = False
+
+
+view_counter = ViewCounter()
+register_periodic(view_counter.flush_if_due, 1)
+
+
+def _flush_at_exit():
+    if view_counter._pending:
+        try:
+            view_counter.flush()
+        except Exception:
+            pass
+
+
+atexit.register(_flush_at_exit)
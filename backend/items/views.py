@@ -1,48 +1,172 @@
+import hashlib
+import json
+from decimal import Decimal, InvalidOperation
+
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 from django.apps import apps
 from .models.item import ItemImage
-from .models import Item, Review
+from .models import Item, Review, CategorySummary, MediaUpload
 from orders.models import Order  
 from .serializers import (
-    ItemListSerializer, ItemDetailSerializer, ItemCreateUpdateSerializer,
-    ReviewSerializer, ReviewCreateUpdateSerializer, ItemImageSerializer
+    ItemListSerializer, ItemDetailSerializer, ItemCreateUpdateSerializer, review_page_data, MediaUploadSerializer,
+    ReviewSerializer, ReviewCreateUpdateSerializer, ItemImageSerializer,
+    CategorySummarySerializer
 )
 from .permissions import IsSellerOrReadOnly
+from .analytics import event_log, seller_summary
+from .autocomplete import autocomplete_index
+from .homepage import get_snapshot as get_homepage_snapshot
+from .recently_viewed import set_visitor_cookie
+from .uploads import SNIFF_BYTES, read_exactly, sniff_media_type
+from core.conditional import make_etag, not_modified, set_validators
+from core.pagination import KeysetPagination, ReviewPagination
 
 '''
 PAGE-SPECIFIC ENDPOINTS:
 ├── HomepageView
+├── CategoryListView
 ├── ItemViewSet
 ├── ReviewView
-└── MyReviewableItemsView
+├── MyReviewableItemsView
+├── SellerAnalyticsView
+└── ReviewMediaUploadView / ReviewMediaUploadDetailView
 '''
 
+# Parse the item search query params into Item.search_items kwargs.
+# Normalized (trimmed, lowercased, typed) so equal filter sets share a facets cache entry.
+def _search_filters(params):
+    filters = {}
+
+    query = (params.get('search') or '').strip()
+    if query:
+        filters['query'] = query
+
+    category = (params.get('category') or '').strip().lower()
+    if category:
+        filters['category'] = category
+
+    for key in ('min_price', 'max_price'):
+        raw = (params.get(key) or '').strip()
+        if raw:
+            try:
+                filters[key] = Decimal(raw)
+            except InvalidOperation:
+                raise ValidationError({key: ['A valid number is required.']})
+
+    condition = (params.get('condition') or '').strip().lower()
+    if condition:
+        filters['condition'] = condition
+
+    is_on_sale = (params.get('is_on_sale') or '').strip().lower()
+    if is_on_sale in ('true', '1'):
+        filters['is_on_sale'] = True
+    elif is_on_sale in ('false', '0'):
+        filters['is_on_sale'] = False
+
+    min_rating = (params.get('min_rating') or '').strip()
+    if min_rating:
+        try:
+            filters['min_rating'] = min(max(int(min_rating), 1), 5)
+        except ValueError:
+            raise ValidationError({'min_rating': ['A whole number from 1 to 5 is required.']})
+
+    sort = (params.get('sort') or '').strip().lower()
+    if sort:
+        if sort not in Item.SORT_ORDERINGS:
+            raise ValidationError({'sort': [f"Choose one of: {', '.join(Item.SORT_ORDERINGS)}."]})
+        filters['sort'] = sort
+
+    return filters
+
+# Parse the item review listing query params into Review.for_item kwargs
+def _review_filters(params):
+    filters = {}
+
+    sort = (params.get('sort') or '').strip().lower()
+    if sort:
+        if sort not in Review.SORT_ORDERINGS:
+            raise ValidationError({'sort': [f"Choose one of: {', '.join(Review.SORT_ORDERINGS)}."]})
+        filters['sort'] = sort
+
+    rating = (params.get('rating') or '').strip()
+    if rating:
+        if rating not in ('1', '2', '3', '4', '5'):
+            raise ValidationError({'rating': ['A whole number from 1 to 5 is required.']})
+        filters['rating'] = int(rating)
+
+    has_media = (params.get('has_media') or '').strip().lower()
+    if has_media in ('true', '1'):
+        filters['has_media'] = True
+    elif has_media in ('false', '0'):
+        filters['has_media'] = False
+
+    return filters
+
+# List from repeated form fields or a JSON list; None when the key wasn't sent
+def _list_param(data, key):
+    if key not in data:
+        return None
+    if hasattr(data, 'getlist'):
+        return data.getlist(key)
+    values = data.get(key)
+    if values is None:
+        return []
+    return values if isinstance(values, list) else [values]
+
+def _id_list_param(data, key):
+    values = _list_param(data, key)
+    if values is None:
+        return None
+    try:
+        return [int(value) for value in values if str(value).strip()]
+    except (TypeError, ValueError):
+        raise ValidationError({key: ['A list of image ids is required.']})
+
 # Homepage view
 class HomepageView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request):
-        trending = Item.get_trending_items()
+        # Trending and categories come from the shared cached snapshot
+        snapshot = get_homepage_snapshot()
+
+        # Personalized sections are built per request; with no history the
+        # recommendations are just trending, which the snapshot already has
         recently_viewed = Item.get_recently_viewed(request, limit=10)
-        recommendations = Item.get_recommendations(request, limit=10)
+        if recently_viewed:
+            recommended = ItemListSerializer(Item.get_recommendations(request, limit=10), many=True).data
+        else:
+            recommended = snapshot['trending']
 
         return Response({
-            'trending': ItemListSerializer(trending, many=True).data,
+            'trending': snapshot['trending'],
             'recently_viewed': ItemListSerializer(recently_viewed, many=True).data,
-            'recommended': ItemListSerializer(recommendations, many=True).data,
-            'categories': Item.get_all_categories(),
+            'recommended': recommended,
+            'categories': snapshot['categories'],
         })
 
+class CategoryListView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        """GET /categories/ - Categories with available items and their item counts"""
+        return Response(CategorySummarySerializer(CategorySummary.directory(), many=True).data)
+
 class ItemViewSet(viewsets.ModelViewSet):
     queryset = Item.objects.all()
 
     permission_classes = [IsSellerOrReadOnly]
+    pagination_class = KeysetPagination
     
     def get_serializer_class(self):
         if self.action == 'list':
@@ -54,12 +178,7 @@ class ItemViewSet(viewsets.ModelViewSet):
     
     def create(self, request, *args, **kwargs):
         images = request.FILES.getlist('images')
-        if hasattr(request.data, 'getlist'):
-            image_urls = request.data.getlist('image_urls')
-        else:
-            image_urls = request.data.get('image_urls') or []
-            if not isinstance(image_urls, list):
-                image_urls = [image_urls]
+        image_urls = _list_param(request.data, 'image_urls') or []
 
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -78,12 +197,7 @@ class ItemViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
 
         images = request.FILES.getlist('images')
-        if hasattr(request.data, 'getlist'):
-            image_urls = request.data.getlist('image_urls')
-        else:
-            image_urls = request.data.get('image_urls') or []
-            if not isinstance(image_urls, list):
-                image_urls = [image_urls]
+        image_urls = _list_param(request.data, 'image_urls') or []
 
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         serializer.is_valid(raise_exception=True)
@@ -104,6 +218,7 @@ class ItemViewSet(viewsets.ModelViewSet):
         # Track views for trending + recently viewed/recommendations.
         try:
             instance.increment_view_count()
+            event_log.record('view', instance, request.user)
         except Exception:
             # Never block product pages due to analytics counters.
             pass
@@ -111,13 +226,27 @@ class ItemViewSet(viewsets.ModelViewSet):
         try:
             Item.track_view(instance.id, request, limit=20)
         except Exception:
-            # Session might not be available in some edge environments.
+            # The recently viewed store is best-effort too.
             pass
 
+        # Unchanged since the client's copy: skip the serializer and its review/image queries
+        parts, last_modified = instance.detail_version()
+        etag = make_etag(*parts, request.user.pk)
+        cached = not_modified(request, etag, last_modified)
+        if cached is not None:
+            return set_visitor_cookie(request, cached)
+
         serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        return set_visitor_cookie(request, set_validators(Response(serializer.data), etag, last_modified))
 
     def get_queryset(self):
+        queryset = self._get_base_queryset()
+        # List rows get their primary image attached up front (see Item.for_listing)
+        if self.action == 'list':
+            return Item.for_listing(queryset)
+        return queryset
+
+    def _get_base_queryset(self):
         # Special case: user's own items
         seller_param = self.request.query_params.get('seller')
         if seller_param == 'me' and self.request.user.is_authenticated:
@@ -133,41 +262,104 @@ class ItemViewSet(viewsets.ModelViewSet):
             ):
                 qs = qs.filter(is_available=True)
             return qs
+        # The review listing's sort/rating params are not item search filters
+        if self.action == 'reviews':
+            return Item.search_items()
         # Use model method for everything else
-        return Item.search_items(
-            query=self.request.query_params.get('search'),
-            category=self.request.query_params.get('category'),
-            min_price=self.request.query_params.get('min_price'),
-            max_price=self.request.query_params.get('max_price'),
-            condition=self.request.query_params.get('condition'),
-            is_on_sale=self.request.query_params.get('is_on_sale'),
-            min_rating=self.request.query_params.get('min_rating')
+        return Item.search_items(**_search_filters(self.request.query_params))
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """GET /items/facets/ - Counts per category, condition, sale status, rating band and price bucket"""
+        filters = _search_filters(request.query_params)
+        # Ordering doesn't change the counts
+        filters.pop('sort', None)
+        digest = hashlib.sha1(json.dumps(filters, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+        cache_key = f'items:facets:{digest}'
+
+        facets = cache.get(cache_key)
+        if facets is None:
+            facets = Item.get_facets(**filters)
+            cache.set(cache_key, facets, settings.ITEM_FACETS_CACHE_SECONDS)
+        return Response(facets)
+
+    @action(detail=False, methods=['get'])
+    def deals(self, request):
+        """GET /items/deals/ - Items with an active sale, biggest discount first (accepts the search filters)"""
+        filters = _search_filters(request.query_params)
+        filters['sort'] = 'discount'
+        queryset = Item.for_listing(Item.search_items(**filters).filter(discount_percentage__gt=0))
+
+        page = self.paginate_queryset(queryset)
+        serializer = ItemListSerializer(page, many=True, context={'request': request})
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=['get'])
+    def trending(self, request):
+        """GET /items/trending/?category= - Top trending items by time-decayed score"""
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 50)
+        except ValueError:
+            limit = 20
+
+        items = Item.get_trending_items(limit=limit, category=request.query_params.get('category'))
+        return Response(ItemListSerializer(items, many=True, context={'request': request}).data)
+
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """GET /items/autocomplete/?q= - Item name suggestions from the in-memory prefix index"""
+        query = (request.query_params.get('q') or '').strip()
+        try:
+            limit = min(max(int(request.query_params.get('limit', 8)), 1), 20)
+        except ValueError:
+            limit = 8
+
+        autocomplete_index.ensure_loaded()
+        return Response({'query': query, 'results': autocomplete_index.suggest(query, limit=limit)})
+
+    @action(detail=True, methods=['get'])
+    def reviews(self, request, pk=None):
+        """GET /items/{id}/reviews/?sort=helpful|newest|rating_high|rating_low&rating=&has_media= - Cursor-paginated reviews"""
+        item = self.get_object()
+        queryset = Review.for_item(item, **_review_filters(request.query_params))
+
+        paginator = ReviewPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        return paginator.get_paginated_response(review_page_data(page, {'request': request}))
+
+    @action(detail=True, methods=['patch'])
+    def images(self, request, pk=None):
+        """PATCH /items/{id}/images/ - keep/remove/order image ids, add `images` files and `image_urls`"""
+        item = self.get_object()
+        images = ItemImage.apply_changes(
+            item,
+            keep=_id_list_param(request.data, 'keep'),
+            remove=_id_list_param(request.data, 'remove') or (),
+            files=request.FILES.getlist('images'),
+            urls=_list_param(request.data, 'image_urls') or (),
+            order=_id_list_param(request.data, 'order'),
         )
+        return Response({'item_images': ItemImageSerializer(images, many=True, context={'request': request}).data})
 
     @action(detail=True, methods=['get'])
     def suggestions(self, request, pk=None):
         """GET /items/{id}/suggestions/ - Get recommendations, related, seller's other items, and best sellers in category"""
         item = self.get_object()
 
-        # Other items in the same category (excluding current item)
-        related = Item.objects.filter(
-            item_category=item.item_category
-        ).exclude(id=item.id)[:8]
+        # Items bought together with this one, topped up with others from the same category
+        related = list(Item.get_bought_together([item.id], 8))
+        if len(related) < 8:
+            related += Item.for_listing().filter(
+                item_category=item.item_category
+            ).exclude(id__in=[item.id] + [i.id for i in related])[:8 - len(related)]
         # Other items from the same seller (excluding current item)
-        seller_items = Item.objects.filter(
+        seller_items = Item.for_listing().filter(
             seller=item.seller
         ).exclude(id=item.id)[:8]
         # Best sellers in the same category (excluding current item)
-        best_sellers_by_category = Item.get_best_sellers_by_category(
-            items_each_category=8,
-            max_categories=1
+        best_sellers = Item.get_best_sellers_in_category(
+            item.item_category, item.custom_category, limit=8, exclude=[item.id]
         )
-        best_sellers_key = item.get_item_category_display()
-        if item.item_category == 'other' and item.custom_category:
-            best_sellers_key = item.custom_category.title()
-
-        best_sellers = best_sellers_by_category.get(best_sellers_key, [])
-        best_sellers = [i for i in best_sellers if i.id != item.id]
     
         return Response({
             'related': ItemListSerializer(related, many=True, context={'request': request}).data,
@@ -257,4 +449,90 @@ class MyReviewableItemsView(APIView):
                         'order_id': order.id,
                         'order_date': order.created_at,
                     })
-        return Response(reviewable_items)
\ No newline at end of file
+        return Response(reviewable_items)
+
+class SellerAnalyticsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        """GET /seller/analytics/?days=30 - Sales, traffic and funnel for the signed-in seller, from the daily rollups"""
+        try:
+            days = min(max(int(request.query_params.get('days', 30)), 1), 365)
+        except ValueError:
+            raise ValidationError({'days': ['A whole number of days is required.']})
+        return Response(seller_summary(request.user, days=days))
+
+# ==================== CHUNKED REVIEW MEDIA UPLOADS ====================
+
+class ReviewMediaUploadView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        """POST /uploads/review-media/ {filename, size} - Start a resumable upload; returns its token"""
+        serializer = MediaUploadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(owner=request.user)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+class ReviewMediaUploadDetailView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, token):
+        """GET /uploads/review-media/{token}/ - Progress; resume from `offset`"""
+        upload = get_object_or_404(MediaUpload, id=token, owner=request.user)
+        return Response(MediaUploadSerializer(upload).data)
+
+    def patch(self, request, token):
+        """PATCH /uploads/review-media/{token}/ - Raw chunk body written at the Upload-Offset header"""
+        upload = get_object_or_404(MediaUpload, id=token, owner=request.user)
+        try:
+            offset = int(request.META.get('HTTP_UPLOAD_OFFSET', ''))
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            raise ValidationError({'Upload-Offset': ['A byte offset is required.']})
+
+        # Everything that can be refused is refused before the body is read
+        if offset != upload.received or upload.status != 'uploading':
+            return Response(
+                {**MediaUploadSerializer(upload).data, 'detail': 'Resume from the current offset.'},
+                status=status.HTTP_409_CONFLICT,
+            )
+        if length < 1:
+            raise ValidationError({'detail': ['The chunk is empty.']})
+        if length > settings.MEDIA_UPLOAD_CHUNK_BYTES:
+            return Response(
+                {'detail': f'Chunks can be at most {settings.MEDIA_UPLOAD_CHUNK_BYTES} bytes.'},
+                status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            )
+        if offset + length > upload.size:
+            upload.discard()
+            return Response({'detail': 'Upload is larger than its declared size.'}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        data = b''
+        sniffed = None
+        if offset == 0:
+            data = read_exactly(request.stream, min(length, SNIFF_BYTES))
+            sniffed = sniff_media_type(data)
+            if sniffed is None:
+                upload.discard()
+                return Response({'detail': 'Only image or video files are allowed'}, status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+        data += read_exactly(request.stream, length - len(data))
+        if len(data) != length:
+            raise ValidationError({'detail': ['The chunk was cut short; resume from the current offset.']})
+
+        with transaction.atomic():
+            upload = get_object_or_404(MediaUpload.objects.select_for_update(), id=token, owner=request.user)
+            if upload.received != offset:
+                return Response(
+                    {**MediaUploadSerializer(upload).data, 'detail': 'Resume from the current offset.'},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            if sniffed:
+                upload.content_type, upload.extension = sniffed
+            upload.append(data)
+        return Response(MediaUploadSerializer(upload).data)
+
+    def delete(self, request, token):
+        """DELETE /uploads/review-media/{token}/ - Abort and drop what was stored"""
+        get_object_or_404(MediaUpload, id=token, owner=request.user).discard()
+        return Response(status=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,135 @@
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+'''
+    Carts for shoppers who are not logged in.
+
+    A guest cart is a {item_id: quantity} dict in the cache, keyed by an anonymous
+    token the client keeps and sends back as the X-Cart-Token header, so browsing
+    never writes Cart/CartItem rows. Entries expire GUEST_CART_TTL_SECONDS after their
+    last change. The cache alias is GUEST_CART_CACHE; tests run on the in-process
+    LocMem cache. On login merge_into() moves the lines into the user's Cart with one
+    upsert (Cart.apply_operations) and drops the guest entry.
+
+    The cache has no compare-and-set, so changes to one guest cart are serialized with
+    a short lock entry taken by cache.add (atomic on every backend); a cart holds at
+    most GUEST_CART_MAX_LINES distinct items.
+'''
+
+TOKEN_HEADER = 'X-Cart-Token'
+# How long a change waits for another change to the same cart, and the lock's expiry
+# in case its holder dies
+LOCK_WAIT_SECONDS = 2
+LOCK_TIMEOUT_SECONDS = 10
+
+
+class GuestCartError(Exception):
+    def __init__(self, detail, status_code):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+
+
+class GuestCartStore:
+    def _cache(self):
+        return caches[getattr(settings, 'GUEST_CART_CACHE', 'default')]
+
+    def _key(self, token):
+        return f'guest-cart:{token}'
+
+    def new_token(self):
+        return uuid.uuid4().hex
+
+    # Normalized token from a request header/body value, or None if it isn't one of ours
+    def parse_token(self, value):
+        try:
+            return uuid.UUID(str(value)).hex
+        except (TypeError, ValueError):
+            return None
+
+    # {'lines': {item_id: quantity}, 'updated_at': datetime}; an empty cart if unknown or expired
+    def get(self, token):
+        cart = self._cache().get(self._key(token)) if token else None
+        return cart or {'lines': {}, 'updated_at': None}
+
+    def save(self, token, lines):
+        cart = {'lines': dict(lines), 'updated_at': timezone.now()}
+        self._cache().set(self._key(token), cart, settings.GUEST_CART_TTL_SECONDS)
+        return cart
+
+    def delete(self, token):
+        self._cache().delete(self._key(token))
+
+    # Hold the cart's lock entry for the duration of a read-modify-write
+    @contextmanager
+    def _locked(self, token):
+        cache, key = self._cache(), f'{self._key(token)}:lock'
+        deadline = time.monotonic() + LOCK_WAIT_SECONDS
+        while not cache.add(key, 1, LOCK_TIMEOUT_SECONDS):
+            if time.monotonic() > deadline:
+                raise GuestCartError({'detail': 'The cart is being updated, try again'}, 409)
+            time.sleep(0.02)
+        try:
+            yield
+        finally:
+            cache.delete(key)
+
+    # Apply (op, item_id, quantity) operations like Cart.apply_operations, with one
+    # availability query, under the cart's lock. Returns (cart, changes, unavailable);
+    # nothing is saved when anything is unavailable. Raises GuestCartError when the
+    # cart would exceed GUEST_CART_MAX_LINES or stays locked by another change.
+    def apply_operations(self, token, operations):
+        with self._locked(token):
+            return self._apply_operations(token, operations)
+
+    def _apply_operations(self, token, operations):
+        from items.models import Item
+
+        lines = self.get(token)['lines']
+        wanted = {item_id for op, item_id, _ in operations if op != 'remove'}
+        needed = wanted | {item_id for op, item_id, _ in operations if op == 'remove' and item_id in lines}
+        items = Item.objects.filter(id__in=needed).in_bulk() if needed else {}
+        unavailable = sorted(item_id for item_id in wanted if item_id not in items or not items[item_id].is_available)
+        if unavailable:
+            return None, [], unavailable
+
+        quantities = dict(lines)
+        for op, item_id, quantity in operations:
+            if op == 'remove':
+                quantities.pop(item_id, None)
+            else:
+                quantities[item_id] = quantity + (quantities.get(item_id, 0) if op == 'add' else 0)
+        max_lines = settings.GUEST_CART_MAX_LINES
+        if len(quantities) > max_lines:
+            raise GuestCartError({'detail': f'A cart can hold at most {max_lines} different items'}, 400)
+
+        changes = [
+            (items[item_id], quantities.get(item_id, 0) - lines.get(item_id, 0))
+            for item_id in set(lines) | set(quantities)
+            if item_id in items and quantities.get(item_id, 0) != lines.get(item_id, 0)
+        ]
+        return self.save(token, quantities), changes, []
+
+    # Move the guest lines into user's Cart (quantities add up) and forget the guest cart.
+    # Returns the item ids that could not be merged because they are no longer available.
+    def merge_into(self, token, user):
+        from orders.models import Cart
+
+        with self._locked(token):
+            lines = self.get(token)['lines']
+            if not lines:
+                return []
+            cart, _ = Cart.objects.get_or_create(user=user)
+            _, skipped = cart.apply_operations(
+                [('add', item_id, quantity) for item_id, quantity in lines.items()], skip_unavailable=True,
+            )
+            self.delete(token)
+        return skipped
+
+
+guest_carts = GuestCartStore()
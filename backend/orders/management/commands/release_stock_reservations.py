@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from orders.reservations import release_expired
+
+
+class Command(BaseCommand):
+    help = "Return the stock of expired cart holds (STOCK_RESERVATIONS) to their items, in batches. Run it on a schedule, e.g. every minute during a sale."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Holds released per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        released = release_expired(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Expired stock reservations released ({released} holds)."))
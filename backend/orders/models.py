@@ -1,8 +1,11 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Max
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from decimal import Decimal
+from dataclasses import dataclass
+from datetime import datetime
 
 '''
 CONTENTS: 
@@ -53,6 +56,26 @@ class Order(models.Model):
 
     def __str__(self):
         return f"Order #{self.id} by {self.user.username} - {self.status}"
+
+    # Validators for the order response: (version parts, last modified). Cancellation
+    # requests are created and decided without saving the order, so they are aggregated in.
+    def version(self):
+        lines = self.items.aggregate(
+            count=Count('id'),
+            item_updated=Max('item__updated_at'),
+            cancellations=Count('cancellation_request'),
+            requested=Max('cancellation_request__requested_at'),
+            decided=Max('cancellation_request__decided_at'),
+        )
+        order_level = self.cancellation_requests.aggregate(
+            count=Count('id'), requested=Max('requested_at'), decided=Max('decided_at'),
+        )
+        parts = (self.pk, self.updated_at.isoformat(), *lines.values(), *order_level.values())
+        changes = (
+            self.updated_at, lines['requested'], lines['decided'],
+            order_level['requested'], order_level['decided'],
+        )
+        return parts, max(filter(None, changes))
     
     def apply_multiple_promos(self):
         # # Helper method to apply promo_type 'item' or 'seller' to the order_item
@@ -185,6 +208,108 @@ class Cart(models.Model):
     def __str__(self):
         return f"Cart for {self.user.username}"
 
+    # Mark the cart as changed; line edits save CartItem rows, not the cart itself
+    def touch(self):
+        self.updated_at = timezone.now()
+        Cart.objects.filter(pk=self.pk).update(updated_at=self.updated_at)
+
+    # Hold the cart row lock until the surrounding transaction ends, so concurrent
+    # changes to its lines (and their stock holds) apply one after another
+    def lock(self):
+        Cart.objects.select_for_update().filter(pk=self.pk).exists()
+
+    # Validators for the cart response: the cart's own updated_at (see touch) plus its
+    # items', since line names and prices come from them. The line count catches lines
+    # removed by an item being deleted.
+    def version(self):
+        lines = self.items.aggregate(count=Count('id'), item_updated=Max('item__updated_at'))
+        parts = (self.pk, self.updated_at.isoformat(), lines['count'], lines['item_updated'])
+        return parts, max(filter(None, (self.updated_at, lines['item_updated'])))
+
+    # Cart lines with their items and primary images, ready for CartItemSerializer
+    def lines(self):
+        from items.models.item import ItemImage
+
+        return (
+            self.items
+            .select_related('item')
+            .annotate(**ItemImage.primary_image_annotations('item_id'))
+            .order_by('id')
+        )
+
+    # Everything the cart response shows: lines (one query, see lines()) and the
+    # quantity/price totals summed from them in the same pass
+    def read_model(self):
+        return CartReadModel.from_lines(list(self.lines()), self.updated_at)
+
+    # Apply (op, item_id, quantity) operations, op being 'add', 'set' or 'remove', in one
+    # transaction: one query for the current lines, one for availability, then a bulk
+    # upsert and a bulk delete. Operations on the same item apply in order.
+    # Returns (changes, unavailable): (item, quantity delta) pairs for the analytics log
+    # and the ids of items that can't be bought (or, with STOCK_RESERVATIONS, held).
+    # Nothing is written while anything is unavailable, unless skip_unavailable, which
+    # drops those operations instead.
+    def apply_operations(self, operations, skip_unavailable=False):
+        from items.models import Item
+        from orders import reservations
+
+        with transaction.atomic():
+            # Each batch computes from the current lines
+            self.lock()
+            lines = {line.item_id: line for line in self.items.select_related('item')}
+            wanted = {item_id for op, item_id, _ in operations if op != 'remove'}
+            items = Item.objects.filter(id__in=wanted, is_available=True).in_bulk() if wanted else {}
+            unavailable = sorted(wanted - set(items))
+            if unavailable and not skip_unavailable:
+                return [], unavailable
+
+            quantities = {item_id: line.quantity for item_id, line in lines.items()}
+            for op, item_id, quantity in operations:
+                if op == 'remove':
+                    quantities.pop(item_id, None)
+                elif item_id in items:
+                    quantities[item_id] = quantity + (quantities.get(item_id, 0) if op == 'add' else 0)
+
+            current = {item_id: line.quantity for item_id, line in lines.items()}
+            short = reservations.sync(self, {
+                item_id: quantities.get(item_id, 0)
+                for item_id in set(current) | set(quantities)
+                if quantities.get(item_id, 0) != current.get(item_id, 0)
+            })
+            if short and not skip_unavailable:
+                transaction.set_rollback(True)
+                return [], short
+            for item_id in short:
+                if item_id in current:
+                    quantities[item_id] = current[item_id]
+                else:
+                    quantities.pop(item_id)
+            unavailable = sorted(set(unavailable) | set(short))
+
+            upserts = [
+                CartItem(cart=self, item_id=item_id, quantity=quantity)
+                for item_id, quantity in quantities.items()
+                if item_id not in lines or lines[item_id].quantity != quantity
+            ]
+            removed = [item_id for item_id in lines if item_id not in quantities]
+            if upserts:
+                CartItem.objects.bulk_create(
+                    upserts, update_conflicts=True,
+                    unique_fields=['cart', 'item'], update_fields=['quantity', 'updated_at'],
+                )
+            if removed:
+                CartItem.objects.filter(cart=self, item_id__in=removed).delete()
+            if upserts or removed:
+                self.touch()
+
+        changes = [
+            (items[row.item_id] if row.item_id in items else lines[row.item_id].item,
+             row.quantity - (lines[row.item_id].quantity if row.item_id in lines else 0))
+            for row in upserts
+        ]
+        changes += [(lines[item_id].item, -lines[item_id].quantity) for item_id in removed]
+        return changes, unavailable
+
     @property
     def total_quantity(self):
         return sum(ci.quantity for ci in self.items.all())
@@ -197,6 +322,40 @@ class Cart(models.Model):
         return total
 
 
+@dataclass
+class CartReadModel:
+    lines: list
+    total_quantity: int
+    total_price: Decimal
+    updated_at: datetime
+
+    @classmethod
+    def from_lines(cls, lines, updated_at=None):
+        total_quantity, total_price = 0, Decimal('0.00')
+        for line in lines:
+            total_quantity += line.quantity
+            total_price += Decimal(str(line.item.current_price)) * line.quantity
+        return cls(lines, total_quantity, total_price, updated_at)
+
+    # Same shape for lines held as {item_id: quantity} outside the database (guest
+    # carts): unsaved CartItems carrying the primary image columns Cart.lines() adds.
+    # Items no longer available are left out.
+    @classmethod
+    def from_quantities(cls, quantities, updated_at=None):
+        from items.models import Item
+        from items.models.item import ItemImage
+
+        annotations = ItemImage.primary_image_annotations('pk')
+        items = Item.objects.filter(id__in=quantities, is_available=True).annotate(**annotations).order_by('id')
+        lines = []
+        for item in items:
+            line = CartItem(item=item, quantity=quantities[item.id])
+            for name in annotations:
+                setattr(line, name, getattr(item, name))
+            lines.append(line)
+        return cls.from_lines(lines, updated_at)
+
+
 class CartItem(models.Model):
     cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='items')
     item = models.ForeignKey('items.Item', on_delete=models.CASCADE, related_name='cart_items')
@@ -208,4 +367,20 @@ class CartItem(models.Model):
         unique_together = ('cart', 'item')
 
     def __str__(self):
-        return f"x{self.quantity} {self.item.item_name} in {self.cart}"
\ No newline at end of file
+        return f"x{self.quantity} {self.item.item_name} in {self.cart}"
+
+class StockReservation(models.Model):
+    ''' Stock held for a cart line while STOCK_RESERVATIONS is on (see orders/reservations.py).
+        The quantity is already off Item.item_quantity; it goes back when the hold is
+        released or swept after expires_at, or becomes an order line at checkout. '''
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='reservations')
+    item = models.ForeignKey('items.Item', on_delete=models.CASCADE, related_name='reservations')
+    quantity = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('cart', 'item')
+
+    def __str__(self):
+        return f"x{self.quantity} of item {self.item_id} held for {self.cart_id} until {self.expires_at:%H:%M}"
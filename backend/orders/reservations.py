@@ -0,0 +1,142 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+'''
+    Optional stock holds for flash sales (STOCK_RESERVATIONS).
+
+    With the setting on, a logged-in cart's lines hold their stock: putting an item in
+    the cart takes the quantity off Item.item_quantity at once with one guarded UPDATE
+    and records a StockReservation expiring STOCK_RESERVATION_SECONDS later. Every
+    change to the line re-syncs the hold and renews it. Buyers therefore compete at the
+    cheap add-to-cart step, and checkout turns holds into order lines without taking
+    stock again (it only counts them as purchased); only quantity not covered by a
+    hold is decremented there.
+
+    A hold counts until release_expired() (the release_stock_reservations command,
+    run on a schedule) gives it back, so checkout may still use one that has just
+    expired. Guest carts never hold stock.
+'''
+
+
+def enabled():
+    return getattr(settings, 'STOCK_RESERVATIONS', False)
+
+
+# Take quantity off an item's stock if it is available with that much left
+def _take(item_id, quantity, now):
+    from items.models import Item
+
+    return Item.objects.filter(id=item_id, is_available=True, item_quantity__gte=quantity).update(
+        item_quantity=F('item_quantity') - quantity, updated_at=now,
+    ) == 1
+
+
+# Put {item_id: quantity} back on the items' stock, one UPDATE per distinct quantity
+def _give_back(quantities, now):
+    from items.models import Item
+
+    by_quantity = defaultdict(list)
+    for item_id, quantity in quantities.items():
+        if quantity:
+            by_quantity[quantity].append(item_id)
+    for quantity, item_ids in by_quantity.items():
+        Item.objects.filter(id__in=item_ids).update(item_quantity=F('item_quantity') + quantity, updated_at=now)
+
+
+# Make the cart's holds match {item_id: line quantity} (0 releases the hold), renewing
+# their expiry. Returns the ids of items whose extra quantity couldn't be held; their
+# holds are left as they were.
+def sync(cart, targets):
+    from orders.models import StockReservation
+
+    if not enabled() or not targets:
+        return []
+    now = timezone.now()
+    expires_at = now + timedelta(seconds=settings.STOCK_RESERVATION_SECONDS)
+    with transaction.atomic():
+        held = {
+            hold.item_id: hold
+            for hold in StockReservation.objects.select_for_update().filter(cart=cart, item_id__in=targets)
+        }
+        short, returned, kept, released = [], {}, [], []
+        # Item id order, so concurrent syncs lock item rows in the same order
+        for item_id, target in sorted(targets.items()):
+            current = held[item_id].quantity if item_id in held else 0
+            if target > current and not _take(item_id, target - current, now):
+                short.append(item_id)
+                continue
+            returned[item_id] = max(current - target, 0)
+            if target:
+                kept.append(StockReservation(cart=cart, item_id=item_id, quantity=target, expires_at=expires_at))
+            elif item_id in held:
+                released.append(item_id)
+
+        _give_back(returned, now)
+        if kept:
+            StockReservation.objects.bulk_create(
+                kept, update_conflicts=True,
+                unique_fields=['cart', 'item'], update_fields=['quantity', 'expires_at'],
+            )
+        if released:
+            StockReservation.objects.filter(cart=cart, item_id__in=released).delete()
+    return short
+
+
+# {item_id: held quantity} for the cart, without locking
+def held_quantities(cart):
+    from orders.models import StockReservation
+
+    if not enabled():
+        return {}
+    return dict(StockReservation.objects.filter(cart=cart).values_list('item_id', 'quantity'))
+
+
+# Consume the cart's holds at checkout, inside its transaction. Returns
+# {item_id: quantity covered by a hold}; any surplus is given back. The checkout's
+# _decrement_stock counts the covered quantity as purchased.
+def convert(cart, cart_items):
+    from orders.models import StockReservation
+
+    if not enabled():
+        return {}
+    now = timezone.now()
+    holds = {hold.item_id: hold for hold in StockReservation.objects.select_for_update().filter(cart=cart)}
+    if not holds:
+        return {}
+
+    covered, surplus = {}, {}
+    lines = {ci.item_id: ci.quantity for ci in cart_items}
+    for item_id, hold in holds.items():
+        covered[item_id] = min(hold.quantity, lines.get(item_id, 0))
+        surplus[item_id] = hold.quantity - covered[item_id]
+    _give_back(surplus, now)
+    StockReservation.objects.filter(id__in=[hold.id for hold in holds.values()]).delete()
+    return {item_id: quantity for item_id, quantity in covered.items() if quantity}
+
+
+# Give expired holds back to stock, batch by batch; rows a checkout is converting are skipped
+def release_expired(batch_size=500, now=None):
+    from orders.models import StockReservation
+
+    now = now or timezone.now()
+    released = 0
+    while True:
+        with transaction.atomic():
+            holds = list(
+                StockReservation.objects.select_for_update(skip_locked=True)
+                .filter(expires_at__lte=now)
+                .order_by('id')[:batch_size]
+            )
+            if not holds:
+                return released
+            quantities = defaultdict(int)
+            for hold in holds:
+                quantities[hold.item_id] += hold.quantity
+            StockReservation.objects.filter(id__in=[hold.id for hold in holds]).delete()
+            _give_back(quantities, now)
+        released += len(holds)
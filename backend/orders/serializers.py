@@ -1,8 +1,7 @@
 from rest_framework import serializers
 
 from .models import Order, OrderItem, Cart, CartItem, OrderCancellation, OrderItemCancellation
-from items.serializers import ItemImageSerializer
-from django.conf import settings
+from items.serializers import primary_image_data
 
 
 ITEM_ID_SOURCE = 'item.id'
@@ -165,13 +164,6 @@ class SellerOrderSerializer(serializers.ModelSerializer):
 		return OrderItemCancellationSerializer(qs, many=True, context=self.context).data
 
 
-def _default_image_data(context):
-	request = context.get('request') if context else None
-	default_rel = settings.MEDIA_URL.rstrip('/') + '/item_images/default.png'
-	default_url = request.build_absolute_uri(default_rel) if request else default_rel
-	return {'id': None, 'image_file': default_url, 'image_url': ''}
-
-
 class CartItemSerializer(serializers.ModelSerializer):
 	item_id = serializers.IntegerField(source='item.id', read_only=True)
 	item_name = serializers.CharField(source='item.item_name', read_only=True)
@@ -187,20 +179,38 @@ class CartItemSerializer(serializers.ModelSerializer):
 		return str(obj.item.current_price * obj.quantity)
 
 	def get_item_image(self, obj):
-		first_image = obj.item.item_images.first()
-		if first_image:
-			return ItemImageSerializer(first_image, context=self.context).data
-		return _default_image_data(self.context)
+		return primary_image_data(obj, obj.item, self.context)
+
 
+class CartSerializer(serializers.Serializer):
+	"""Serializes Cart.read_model(); a Cart passed in is converted first."""
 
-class CartSerializer(serializers.ModelSerializer):
-	items = CartItemSerializer(many=True, read_only=True)
+	items = CartItemSerializer(many=True, read_only=True, source='lines')
 	total_quantity = serializers.IntegerField(read_only=True)
-	total_price = serializers.SerializerMethodField()
+	total_price = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+	updated_at = serializers.DateTimeField(read_only=True)
 
-	class Meta:
-		model = Cart
-		fields = ['items', 'total_quantity', 'total_price', 'updated_at']
+	def to_representation(self, instance):
+		if isinstance(instance, Cart):
+			instance = instance.read_model()
+		return super().to_representation(instance)
+
+
+class CartOperationSerializer(serializers.Serializer):
+	op = serializers.ChoiceField(choices=['add', 'set', 'remove'])
+	item_id = serializers.IntegerField()
+	quantity = serializers.IntegerField(min_value=1, required=False)
+
+	def validate(self, attrs):
+		if attrs['op'] == 'set' and 'quantity' not in attrs:
+			raise serializers.ValidationError({'quantity': 'Required for set.'})
+		attrs.setdefault('quantity', 1)
+		return attrs
+
+
+class CartBatchSerializer(serializers.Serializer):
+	operations = CartOperationSerializer(many=True, allow_empty=False, max_length=100)
 
-	def get_total_price(self, obj):
-		return str(obj.total_price)
+	# (op, item_id, quantity) tuples for Cart.apply_operations
+	def operation_tuples(self):
+		return [(o['op'], o['item_id'], o['quantity']) for o in self.validated_data['operations']]
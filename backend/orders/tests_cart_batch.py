@@ -0,0 +1,104 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from items.analytics import event_log
+from items.models import Item
+from orders.models import Cart, CartItem, Order, OrderItem
+
+
+class CartBatchTest(TestCase):
+	def setUp(self):
+		cache.clear()
+		event_log.clear()
+		self.client = APIClient()
+		self.user = User.objects.create_user(username='buyer', email='buyer@example.com', password='pass')
+		self.seller = User.objects.create_user(username='seller', email='seller@example.com', password='pass')
+		self.client.force_authenticate(user=self.user)
+		self.items = [
+			Item.objects.create(
+				item_name=f'Item {i}', item_price=Decimal('5.00'), item_category='electronics',
+				item_quantity=20, seller=self.seller,
+			)
+			for i in range(4)
+		]
+		self.cart = Cart.objects.create(user=self.user)
+
+	def tearDown(self):
+		cache.clear()
+		event_log.clear()
+
+	def _quantities(self):
+		return dict(CartItem.objects.filter(cart=self.cart).values_list('item_id', 'quantity'))
+
+	def test_operations_apply_in_order_with_bulk_writes(self):
+		a, b, c, d = self.items
+		CartItem.objects.create(cart=self.cart, item=a, quantity=2)
+		CartItem.objects.create(cart=self.cart, item=b, quantity=1)
+		CartItem.objects.create(cart=self.cart, item=d, quantity=4)
+
+		operations = [
+			{'op': 'add', 'item_id': a.id, 'quantity': 3},
+			{'op': 'set', 'item_id': b.id, 'quantity': 7},
+			{'op': 'add', 'item_id': c.id},
+			{'op': 'add', 'item_id': c.id, 'quantity': 2},
+			{'op': 'remove', 'item_id': d.id},
+		]
+		with CaptureQueriesContext(connection) as ctx:
+			res = self.client.post('/api/cart/batch/', {'operations': operations}, format='json')
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual(self._quantities(), {a.id: 5, b.id: 7, c.id: 3})
+		self.assertEqual(res.data['total_quantity'], 15)
+
+		writes = [q['sql'] for q in ctx.captured_queries if 'orders_cartitem' in q['sql'].split(' WHERE')[0]]
+		self.assertEqual(len([sql for sql in writes if sql.startswith('INSERT')]), 1)
+		self.assertEqual(len([sql for sql in writes if sql.startswith('DELETE')]), 1)
+
+		events = {(e.event_type, e.item_id, e.quantity) for e in event_log._buffer}
+		self.assertEqual(events, {
+			('cart_add', a.id, 3), ('cart_add', b.id, 6), ('cart_add', c.id, 3), ('cart_remove', d.id, 4),
+		})
+
+	def test_unavailable_item_rejects_the_whole_batch(self):
+		a, b = self.items[:2]
+		Item.objects.filter(id=b.id).update(is_available=False)
+		operations = [{'op': 'add', 'item_id': a.id}, {'op': 'add', 'item_id': b.id}, {'op': 'add', 'item_id': 9999}]
+
+		res = self.client.post('/api/cart/batch/', {'operations': operations}, format='json')
+		self.assertEqual(res.status_code, 400)
+		self.assertEqual(res.data['unavailable_item_ids'], [b.id, 9999])
+		self.assertEqual(self._quantities(), {})
+
+	def test_invalid_operations(self):
+		item_id = self.items[0].id
+		for operations in (
+			[],
+			[{'op': 'set', 'item_id': item_id}],
+			[{'op': 'add', 'item_id': item_id, 'quantity': 0}],
+			[{'op': 'swap', 'item_id': item_id}],
+		):
+			res = self.client.post('/api/cart/batch/', {'operations': operations}, format='json')
+			self.assertEqual(res.status_code, 400, operations)
+
+	def test_reorder_adds_the_order_lines_and_skips_unavailable_items(self):
+		a, b, c = self.items[:3]
+		order = Order.objects.create(user=self.user, total_price=Decimal('30.00'), status='delivered')
+		OrderItem.objects.create(order=order, item=a, quantity=2, price=Decimal('5.00'))
+		OrderItem.objects.create(order=order, item=b, quantity=3, price=Decimal('5.00'))
+		OrderItem.objects.create(order=order, item=c, quantity=1, price=Decimal('5.00'))
+		CartItem.objects.create(cart=self.cart, item=a, quantity=1)
+		Item.objects.filter(id=c.id).update(is_available=False)
+
+		res = self.client.post(f'/api/orders/{order.id}/reorder/')
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual(res.data['skipped_item_ids'], [c.id])
+		self.assertEqual(self._quantities(), {a.id: 3, b.id: 3})
+
+		other = User.objects.create_user(username='other', email='other@example.com', password='pass')
+		self.client.force_authenticate(user=other)
+		self.assertEqual(self.client.post(f'/api/orders/{order.id}/reorder/').status_code, 404)
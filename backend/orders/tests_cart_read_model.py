@@ -0,0 +1,83 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from items.analytics import event_log
+from items.models import Item
+from items.models.item import ItemImage
+from orders.models import Cart, CartItem
+
+
+class CartReadModelTest(TestCase):
+	def setUp(self):
+		cache.clear()
+		event_log.clear()
+		self.client = APIClient()
+		self.user = User.objects.create_user(username='buyer', email='buyer@example.com', password='pass')
+		self.seller = User.objects.create_user(username='seller', email='seller@example.com', password='pass')
+		self.client.force_authenticate(user=self.user)
+		self.cart = Cart.objects.create(user=self.user)
+
+	def tearDown(self):
+		cache.clear()
+		event_log.clear()
+
+	def _add_lines(self, count):
+		for i in range(count):
+			item = Item.objects.create(
+				item_name=f'Item {i}', item_price=Decimal('10.50'), item_category='electronics',
+				item_quantity=20, seller=self.seller,
+			)
+			ItemImage.objects.create(item=item, image_url=f'https://cdn.example.com/{i}-a.jpg')
+			ItemImage.objects.create(item=item, image_url=f'https://cdn.example.com/{i}-b.jpg')
+			CartItem.objects.create(cart=self.cart, item=item, quantity=i + 1)
+
+	def _line_queries(self):
+		with CaptureQueriesContext(connection) as ctx:
+			res = self.client.get('/api/cart/')
+		self.assertEqual(res.status_code, 200)
+		return res, [q for q in ctx.captured_queries if 'primary_image_id' in q['sql']]
+
+	def test_query_count_does_not_grow_with_lines(self):
+		self._add_lines(1)
+		with CaptureQueriesContext(connection) as one:
+			self.client.get('/api/cart/')
+		cache.clear()
+		self._add_lines(4)
+		with CaptureQueriesContext(connection) as five:
+			res = self.client.get('/api/cart/')
+
+		self.assertEqual(len(one), len(five))
+		self.assertEqual(len(res.data['items']), 5)
+		self.assertTrue(all(line['item_image']['image_url'].endswith('-a.jpg') for line in res.data['items']))
+
+	def test_totals_come_from_the_same_pass(self):
+		self._add_lines(3)
+		res = self.client.get('/api/cart/')
+		self.assertEqual(res.data['total_quantity'], 6)
+		self.assertEqual(Decimal(res.data['total_price']), Decimal('63.00'))
+		self.assertEqual(res.data['total_quantity'], self.cart.total_quantity)
+		self.assertEqual(Decimal(res.data['total_price']), self.cart.total_price)
+
+	def test_repeat_get_is_served_from_cache_until_the_cart_changes(self):
+		self._add_lines(2)
+		first, queries = self._line_queries()
+		self.assertEqual(len(queries), 1)
+
+		again, queries = self._line_queries()
+		self.assertEqual(queries, [])
+		self.assertEqual(again.data, first.data)
+
+		item = Item.objects.get(item_name='Item 0')
+		res = self.client.patch(f'/api/cart/items/{item.id}/', {'quantity': 5}, format='json')
+		self.assertEqual(res.data['total_quantity'], 7)
+
+		# The mutation response left the new version cached
+		res, queries = self._line_queries()
+		self.assertEqual(queries, [])
+		self.assertEqual(res.data['total_quantity'], 7)
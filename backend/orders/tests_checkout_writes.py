@@ -0,0 +1,112 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from items.analytics import event_log
+from items.autocomplete import autocomplete_index
+from items.models import CategorySummary, Item
+from orders import views
+from orders.models import Cart, CartItem, Order, OrderItem
+
+SHIPPING = {
+	'shipping_address': '123 Main St',
+	'shipping_city': 'City',
+	'shipping_postal_code': '12345',
+	'shipping_country': 'Country',
+}
+
+
+class CheckoutWritePathTest(TestCase):
+	def setUp(self):
+		cache.clear()
+		event_log.clear()
+		autocomplete_index.clear()
+		self.client = APIClient()
+		self.user = User.objects.create_user(username='buyer', email='buyer@example.com', password='pass')
+		self.seller = User.objects.create_user(username='seller', email='seller@example.com', password='pass')
+		self.client.force_authenticate(user=self.user)
+		self.cart = Cart.objects.create(user=self.user)
+
+	def tearDown(self):
+		cache.clear()
+		event_log.clear()
+		autocomplete_index.clear()
+
+	def _item(self, name, quantity, category='electronics'):
+		return Item.objects.create(
+			item_name=name, item_price=Decimal('10.00'), item_category=category,
+			item_quantity=quantity, seller=self.seller,
+		)
+
+	def _fill_cart(self, lines):
+		for item, quantity in lines:
+			CartItem.objects.create(cart=self.cart, item=item, quantity=quantity)
+
+	def test_order_lines_are_one_insert_and_nothing_is_locked_up_front(self):
+		items = [self._item(f'Item {i}', 10) for i in range(5)]
+		self._fill_cart((item, 2) for item in items)
+
+		with CaptureQueriesContext(connection) as ctx:
+			res = self.client.post('/api/checkout/', SHIPPING, format='json')
+		self.assertEqual(res.status_code, 201)
+
+		sql = [q['sql'] for q in ctx.captured_queries]
+		self.assertEqual(len([s for s in sql if s.startswith('INSERT INTO "orders_orderitem"')]), 1)
+		self.assertEqual(len([s for s in sql if s.startswith('UPDATE "items_item"')]), 5)
+		self.assertFalse([s for s in sql if 'FOR UPDATE' in s])
+
+		order = Order.objects.get(user=self.user)
+		self.assertEqual(order.total_price, Decimal('100.00'))
+		self.assertEqual(order.items.count(), 5)
+		self.assertEqual(set(Item.objects.values_list('item_quantity', 'times_purchased')), {(8, 2)})
+		self.assertFalse(self.cart.items.exists())
+
+	def test_shortfall_after_the_snapshot_rolls_everything_back(self):
+		plenty = self._item('Plenty', 10)
+		scarce = self._item('Scarce', 5)
+		self._fill_cart([(plenty, 2), (scarce, 3)])
+
+		original = views._calculate_total_for_cart_items
+
+		# Another checkout takes the stock between the unlocked read and the guarded UPDATE
+		def race(*args):
+			total = original(*args)
+			Item.objects.filter(id=scarce.id).update(item_quantity=1)
+			return total
+
+		with mock.patch('orders.views._calculate_total_for_cart_items', side_effect=race):
+			res = self.client.post('/api/checkout/', SHIPPING, format='json')
+		self.assertEqual(res.status_code, 400)
+		self.assertIn('Not enough stock', res.data['detail'])
+
+		self.assertFalse(Order.objects.exists())
+		self.assertFalse(OrderItem.objects.exists())
+		self.assertEqual(Item.objects.get(id=plenty.id).item_quantity, 10)
+		self.assertEqual(self.cart.items.count(), 2)
+
+	def test_selling_out_updates_availability_categories_and_autocomplete(self):
+		last = self._item('Last Lamp', 2, category='home_kitchen')
+		self._item('Other Lamp', 4, category='home_kitchen')
+		self._fill_cart([(last, 2)])
+		autocomplete_index.load_from_db()
+		self.assertEqual(
+			CategorySummary.objects.get(item_category='home_kitchen').item_count, 2,
+		)
+
+		with self.captureOnCommitCallbacks(execute=True):
+			res = self.client.post('/api/checkout/', SHIPPING, format='json')
+		self.assertEqual(res.status_code, 201)
+
+		last.refresh_from_db()
+		self.assertEqual((last.item_quantity, last.is_available), (0, False))
+		self.assertEqual(CategorySummary.objects.get(item_category='home_kitchen').item_count, 1)
+		self.assertEqual([s['id'] for s in autocomplete_index.suggest('lamp')], [
+			Item.objects.get(item_name='Other Lamp').id,
+		])
+		self.assertEqual([(e.event_type, e.item_id, e.quantity) for e in event_log._buffer], [('purchase', last.id, 2)])
@@ -0,0 +1,60 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from items.analytics import event_log
+from items.models import Item
+from orders.models import Order, OrderItem, OrderItemCancellation
+
+
+class CartAndOrderConditionalGetTest(TestCase):
+	def setUp(self):
+		event_log.clear()
+		self.client = APIClient()
+		self.user = User.objects.create_user(username='buyer', email='buyer@example.com', password='pass')
+		self.seller = User.objects.create_user(username='seller', email='seller@example.com', password='pass')
+		self.item = Item.objects.create(
+			item_name='Test Item', item_price=Decimal('50.00'), item_category='electronics',
+			item_quantity=5, seller=self.seller,
+		)
+		self.client.force_authenticate(user=self.user)
+
+	def tearDown(self):
+		event_log.clear()
+
+	def test_cart_304_until_a_line_or_item_changes(self):
+		etag = self.client.get('/api/cart/')['ETag']
+		self.assertEqual(self.client.get('/api/cart/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+		self.client.post('/api/cart/items/', {'item_id': self.item.id, 'quantity': 1}, format='json')
+		res = self.client.get('/api/cart/', HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(res.status_code, 200)
+		etag = res['ETag']
+
+		self.client.patch(f'/api/cart/items/{self.item.id}/', {'quantity': 2}, format='json')
+		res = self.client.get('/api/cart/', HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(res.status_code, 200)
+		etag = res['ETag']
+
+		self.item.item_name = 'Renamed'
+		self.item.save()
+		res = self.client.get('/api/cart/', HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual(res.data['items'][0]['item_name'], 'Renamed')
+		self.assertEqual(self.client.get('/api/cart/', HTTP_IF_NONE_MATCH=res['ETag']).status_code, 304)
+
+	def test_order_304_until_a_cancellation_request(self):
+		order = Order.objects.create(user=self.user, total_price=Decimal('50.00'))
+		line = OrderItem.objects.create(order=order, item=self.item, quantity=1, price=Decimal('50.00'))
+		url = f'/api/orders/{order.id}/'
+
+		etag = self.client.get(url)['ETag']
+		with self.assertNumQueries(3):
+			self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+		OrderItemCancellation.objects.create(order_item=line, seller=self.seller)
+		res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual(res.data['items'][0]['cancellation_status'], 'pending')
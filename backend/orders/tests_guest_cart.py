@@ -0,0 +1,125 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from items.analytics import event_log
+from items.models import Item
+from orders.models import Cart, CartItem
+
+
+class GuestCartTest(TestCase):
+	def setUp(self):
+		cache.clear()
+		event_log.clear()
+		self.client = APIClient()
+		self.seller = User.objects.create_user(username='seller', email='seller@example.com', password='pass')
+		self.user = User.objects.create_user(username='buyer', email='buyer@example.com', password='pass')
+		self.items = [
+			Item.objects.create(
+				item_name=f'Item {i}', item_price=Decimal('4.00'), item_category='electronics',
+				item_quantity=20, seller=self.seller,
+			)
+			for i in range(3)
+		]
+
+	def tearDown(self):
+		cache.clear()
+		event_log.clear()
+
+	def _batch(self, operations, token=None):
+		headers = {'HTTP_X_CART_TOKEN': token} if token else {}
+		return self.client.post('/api/cart/guest/batch/', {'operations': operations}, format='json', **headers)
+
+	def test_guest_cart_lives_in_the_cache_only(self):
+		a, b, _ = self.items
+		with CaptureQueriesContext(connection) as ctx:
+			res = self._batch([{'op': 'add', 'item_id': a.id, 'quantity': 2}])
+		self.assertEqual(res.status_code, 200)
+		token = res['X-Cart-Token']
+		self.assertFalse([q for q in ctx.captured_queries if q['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))])
+
+		res = self._batch([{'op': 'add', 'item_id': b.id}, {'op': 'add', 'item_id': a.id}], token)
+		self.assertEqual(res['X-Cart-Token'], token)
+		self.assertEqual(res.data['total_quantity'], 4)
+		self.assertEqual(Decimal(res.data['total_price']), Decimal('16.00'))
+
+		res = self.client.get('/api/cart/guest/', HTTP_X_CART_TOKEN=token)
+		self.assertEqual({line['item_id']: line['quantity'] for line in res.data['items']}, {a.id: 3, b.id: 1})
+		self.assertFalse(Cart.objects.exists())
+		self.assertFalse(CartItem.objects.exists())
+
+	@override_settings(GUEST_CART_MAX_LINES=2)
+	def test_guest_cart_line_count_is_capped(self):
+		res = self._batch([{'op': 'add', 'item_id': item.id, 'quantity': 1} for item in self.items[:2]])
+		token = res['X-Cart-Token']
+		res = self._batch([{'op': 'add', 'item_id': self.items[2].id, 'quantity': 1}], token)
+		self.assertEqual(res.status_code, 400)
+		self.assertEqual(len(self.client.get('/api/cart/guest/', HTTP_X_CART_TOKEN=token).data['items']), 2)
+
+	def test_changes_to_one_guest_cart_are_serialized(self):
+		token = self._batch([{'op': 'add', 'item_id': self.items[0].id, 'quantity': 1}])['X-Cart-Token']
+		# Another request is mid-update and never lets go within the wait
+		cache.add(f'guest-cart:{token}:lock', 1)
+		with mock.patch('orders.guest_carts.LOCK_WAIT_SECONDS', 0):
+			res = self._batch([{'op': 'add', 'item_id': self.items[1].id, 'quantity': 1}], token)
+		self.assertEqual(res.status_code, 409)
+		cache.delete(f'guest-cart:{token}:lock')
+		res = self._batch([{'op': 'add', 'item_id': self.items[1].id, 'quantity': 1}], token)
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual(len(res.data['items']), 2)
+
+	def test_unknown_or_malformed_token_is_an_empty_cart(self):
+		self.assertEqual(self.client.get('/api/cart/guest/', HTTP_X_CART_TOKEN='nope').data['items'], [])
+		res = self._batch([{'op': 'add', 'item_id': self.items[0].id}], token='nope')
+		self.assertNotEqual(res['X-Cart-Token'], 'nope')
+
+	def test_guest_cart_expires(self):
+		with override_settings(GUEST_CART_TTL_SECONDS=-1):
+			token = self._batch([{'op': 'add', 'item_id': self.items[0].id}])['X-Cart-Token']
+		self.assertEqual(self.client.get('/api/cart/guest/', HTTP_X_CART_TOKEN=token).data['items'], [])
+
+	def test_login_merges_the_guest_cart_in_one_upsert(self):
+		a, b, c = self.items
+		token = self._batch([
+			{'op': 'add', 'item_id': a.id, 'quantity': 2},
+			{'op': 'add', 'item_id': b.id},
+			{'op': 'add', 'item_id': c.id},
+		])['X-Cart-Token']
+		cart = Cart.objects.create(user=self.user)
+		CartItem.objects.create(cart=cart, item=a, quantity=1)
+		Item.objects.filter(id=c.id).update(is_available=False)
+
+		with CaptureQueriesContext(connection) as ctx:
+			res = self.client.post(
+				'/api/token/', {'username': 'buyer', 'password': 'pass'}, format='json', HTTP_X_CART_TOKEN=token,
+			)
+		self.assertEqual(res.status_code, 200)
+		self.assertIn('access', res.data)
+		inserts = [q for q in ctx.captured_queries if q['sql'].startswith('INSERT INTO "orders_cartitem"')]
+		self.assertEqual(len(inserts), 1)
+		self.assertEqual(
+			dict(CartItem.objects.filter(cart=cart).values_list('item_id', 'quantity')), {a.id: 3, b.id: 1},
+		)
+		self.assertEqual(self.client.get('/api/cart/guest/', HTTP_X_CART_TOKEN=token).data['items'], [])
+
+	def test_bad_login_leaves_the_guest_cart_alone(self):
+		token = self._batch([{'op': 'add', 'item_id': self.items[0].id}])['X-Cart-Token']
+		res = self.client.post(
+			'/api/token/', {'username': 'buyer', 'password': 'wrong'}, format='json', HTTP_X_CART_TOKEN=token,
+		)
+		self.assertEqual(res.status_code, 401)
+		self.assertEqual(len(self.client.get('/api/cart/guest/', HTTP_X_CART_TOKEN=token).data['items']), 1)
+
+	def test_reading_the_cart_does_not_create_it(self):
+		self.client.force_authenticate(user=self.user)
+		res = self.client.get('/api/cart/')
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual(res.data['items'], [])
+		self.assertEqual(self.client.get('/api/cart/bought-together/').status_code, 200)
+		self.assertFalse(Cart.objects.filter(user=self.user).exists())
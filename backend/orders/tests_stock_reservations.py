@@ -0,0 +1,144 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from items.analytics import event_log
+from items.models import Item
+from orders.models import Order, StockReservation
+from orders.reservations import release_expired
+
+SHIPPING = {
+	'shipping_address': '123 Main St',
+	'shipping_city': 'City',
+	'shipping_postal_code': '12345',
+	'shipping_country': 'Country',
+}
+
+
+@override_settings(STOCK_RESERVATIONS=True, STOCK_RESERVATION_SECONDS=600)
+class StockReservationTest(TestCase):
+	def setUp(self):
+		cache.clear()
+		event_log.clear()
+		self.seller = User.objects.create_user(username='seller', email='seller@example.com', password='pass')
+		self.item = Item.objects.create(
+			item_name='Flash Deal', item_price=Decimal('9.00'), item_category='electronics',
+			item_quantity=3, seller=self.seller,
+		)
+		self.buyers = [self._client(f'buyer{i}') for i in range(2)]
+
+	def tearDown(self):
+		cache.clear()
+		event_log.clear()
+
+	def _client(self, username):
+		client = APIClient()
+		client.force_authenticate(User.objects.create_user(username=username, email=f'{username}@example.com', password='pass'))
+		return client
+
+	def _add(self, client, quantity):
+		return client.post('/api/cart/items/', {'item_id': self.item.id, 'quantity': quantity}, format='json')
+
+	def _stock(self):
+		self.item.refresh_from_db()
+		return self.item.item_quantity
+
+	def test_adding_to_cart_holds_stock_and_losers_fail_there(self):
+		first, second = self.buyers
+		self.assertEqual(self._add(first, 2).status_code, 200)
+		self.assertEqual(self._stock(), 1)
+
+		res = self._add(second, 2)
+		self.assertEqual(res.status_code, 400)
+		self.assertIn('Not enough stock', res.data['detail'])
+		self.assertEqual(self._stock(), 1)
+
+		# Changing and removing lines moves the hold with them
+		self.assertEqual(first.patch(f'/api/cart/items/{self.item.id}/', {'quantity': 3}, format='json').status_code, 200)
+		self.assertEqual(self._stock(), 0)
+		first.delete(f'/api/cart/items/{self.item.id}/')
+		self.assertEqual(self._stock(), 3)
+		self.assertFalse(StockReservation.objects.exists())
+
+	def test_seller_edits_never_hand_held_stock_back(self):
+		stale = Item.objects.get(id=self.item.id)
+		self._add(self.buyers[0], 2)
+		stale.item_name = 'Flash Deal!'
+		stale.save()
+		self.assertEqual(self._stock(), 1)
+
+		# A stock edit is applied as a change from what the seller was shown
+		seller = APIClient()
+		seller.force_authenticate(self.seller)
+		res = seller.patch(f'/api/items/{self.item.id}/', {'item_quantity': 5}, format='json')
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual(self._stock(), 5)
+
+	def test_checkout_converts_holds_without_taking_stock_again(self):
+		client = self.buyers[0]
+		self._add(client, 3)
+
+		with CaptureQueriesContext(connection) as ctx:
+			res = client.post('/api/checkout/', SHIPPING, format='json')
+		self.assertEqual(res.status_code, 201)
+		# The purchase count and the sold-out flag are written, never the stock
+		item_updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE "items_item"')]
+		self.assertEqual(len(item_updates), 2)
+		self.assertTrue(all('item_quantity' not in sql for sql in item_updates))
+
+		self.item.refresh_from_db()
+		self.assertEqual((self.item.item_quantity, self.item.times_purchased, self.item.is_available), (0, 3, False))
+		self.assertEqual(Order.objects.get().items.get().quantity, 3)
+		self.assertFalse(StockReservation.objects.exists())
+
+	def test_other_carts_holds_keep_a_sold_out_item_available(self):
+		first, second = self.buyers
+		self._add(first, 2)
+		self._add(second, 1)
+		self.assertEqual(first.post('/api/checkout/', SHIPPING, format='json').status_code, 201)
+		self.item.refresh_from_db()
+		self.assertEqual((self.item.item_quantity, self.item.is_available), (0, True))
+
+	def test_expired_holds_are_swept_back_and_checkout_falls_back_to_stock(self):
+		first, second = self.buyers
+		self._add(first, 2)
+		StockReservation.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+
+		self.assertEqual(release_expired(batch_size=1), 1)
+		self.assertEqual(self._stock(), 3)
+		self.assertFalse(StockReservation.objects.exists())
+
+		# The line outlives its hold: checkout takes the stock the usual way
+		self.assertEqual(first.post('/api/checkout/', SHIPPING, format='json').status_code, 201)
+		self.assertEqual(self._stock(), 1)
+
+		self._add(second, 1)
+		StockReservation.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+		call_command('release_stock_reservations', stdout=open('/dev/null', 'w'))
+		self.assertEqual(self._stock(), 1)
+
+	def test_batch_rejects_what_cannot_be_held(self):
+		client = self.buyers[0]
+		res = client.post('/api/cart/batch/', {'operations': [{'op': 'add', 'item_id': self.item.id, 'quantity': 4}]}, format='json')
+		self.assertEqual(res.status_code, 400)
+		self.assertEqual(res.data['unavailable_item_ids'], [self.item.id])
+		self.assertEqual(self._stock(), 3)
+
+		res = client.post('/api/cart/batch/', {'operations': [{'op': 'set', 'item_id': self.item.id, 'quantity': 2}]}, format='json')
+		self.assertEqual(res.status_code, 200)
+		self.assertEqual(self._stock(), 1)
+		self.assertEqual(StockReservation.objects.get().quantity, 2)
+
+	@override_settings(STOCK_RESERVATIONS=False)
+	def test_off_by_default_path_does_not_hold(self):
+		self._add(self.buyers[0], 2)
+		self.assertEqual(self._stock(), 3)
+		self.assertFalse(StockReservation.objects.exists())
@@ -6,6 +6,10 @@ from .views import (
 	CartView,
 	CartItemsView,
 	CartItemDetailView,
+	CartBatchView,
+	GuestCartView,
+	GuestCartBatchView,
+	CartBoughtTogetherView,
 	CheckoutView,
 	OrderShippingUpdateView,
 	OrderCancelRequestView,
@@ -24,6 +28,10 @@ urlpatterns = [
 	path('cart/', CartView.as_view(), name='cart'),
 	path('cart/items/', CartItemsView.as_view(), name='cart-items'),
 	path('cart/items/<int:item_id>/', CartItemDetailView.as_view(), name='cart-item-detail'),
+	path('cart/batch/', CartBatchView.as_view(), name='cart-batch'),
+	path('cart/guest/', GuestCartView.as_view(), name='guest-cart'),
+	path('cart/guest/batch/', GuestCartBatchView.as_view(), name='guest-cart-batch'),
+	path('cart/bought-together/', CartBoughtTogetherView.as_view(), name='cart-bought-together'),
 	path('checkout/', CheckoutView.as_view(), name='checkout'),
 	path('orders/<int:order_id>/shipping/', OrderShippingUpdateView.as_view(), name='order-shipping-update'),
 	path('orders/<int:order_id>/cancel-request/', OrderCancelRequestView.as_view(), name='order-cancel-request'),
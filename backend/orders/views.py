@@ -1,37 +1,74 @@
 from decimal import Decimal
 
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
+from django.db.models import F, prefetch_related_objects
 from django.utils import timezone
 from django.shortcuts import get_object_or_404
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.views import APIView
 from rest_framework.viewsets import ReadOnlyModelViewSet
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.views import TokenObtainPairView
 
-from items.models import Item
-from .models import Order, OrderItem, Cart, CartItem, OrderCancellation, OrderItemCancellation
-from .serializers import OrderSerializer, CartSerializer, SellerOrderSerializer
+from core.conditional import make_etag, not_modified, set_validators
+
+from items.analytics import event_log
+from items.autocomplete import autocomplete_index
+from items.models import CategorySummary, Item
+from . import reservations
+from .guest_carts import TOKEN_HEADER, GuestCartError, guest_carts
+from .models import (
+	Order, OrderItem, Cart, CartItem, CartReadModel, OrderCancellation, OrderItemCancellation, StockReservation,
+)
+from items.serializers import ItemListSerializer
+from .serializers import OrderSerializer, CartSerializer, CartBatchSerializer, SellerOrderSerializer
 
 
 class OrderViewSet(ReadOnlyModelViewSet):
 	serializer_class = OrderSerializer
 	permission_classes = [IsAuthenticated]
+	prefetch = (
+		'items',
+		'items__item',
+		'items__cancellation_request',
+		'cancellation_requests',
+		'cancellation_requests__seller',
+		'cancellation_requests__decided_by',
+	)
 
 	def get_queryset(self):
-		return (
-			Order.objects
-			.filter(user=self.request.user)
-			.prefetch_related(
-				'items',
-				'items__item',
-				'items__cancellation_request',
-				'cancellation_requests',
-				'cancellation_requests__seller',
-				'cancellation_requests__decided_by',
-			)
-			.order_by('-created_at')
-		)
+		queryset = Order.objects.filter(user=self.request.user).order_by('-created_at')
+		# retrieve prefetches itself, only once the conditional check has passed
+		if self.action in ('retrieve', 'reorder'):
+			return queryset
+		return queryset.prefetch_related(*self.prefetch)
+
+	def retrieve(self, request, *args, **kwargs):
+		order = self.get_object()
+		parts, last_modified = order.version()
+		etag = make_etag(*parts)
+		cached = not_modified(request, etag, last_modified)
+		if cached is not None:
+			return cached
+
+		prefetch_related_objects([order], *self.prefetch)
+		serializer = self.get_serializer(order)
+		return set_validators(Response(serializer.data), etag, last_modified)
+
+	@action(detail=True, methods=['post'])
+	def reorder(self, request, pk=None):
+		"""Add this order's lines to the cart again; unavailable items are skipped."""
+		order = self.get_object()
+		operations = [('add', line.item_id, line.quantity) for line in order.items.all()]
+		cart = _get_or_create_cart(request.user)
+		changes, skipped = cart.apply_operations(operations, skip_unavailable=True)
+		_record_cart_changes(changes, request.user)
+		return Response({**_cart_data(cart, request), 'skipped_item_ids': skipped})
 
 
 def _order_is_editable(order: Order) -> bool:
@@ -213,6 +250,10 @@ def _approve_item_cancellation(order_item: OrderItem) -> None:
 	if item.item_quantity > 0:
 		item.is_available = True
 	item.save(update_fields=['item_quantity', 'is_available', 'updated_at'])
+	event_log.record_on_commit(
+		'cancel', item, user_id=order.user_id,
+		quantity=order_item.quantity, amount=order_item.price * order_item.quantity,
+	)
 
 	order_item.delete()
 
@@ -344,19 +385,57 @@ def _get_or_create_cart(user):
 	return cart
 
 
+def _cart_data(cart, request, version=None):
+	"""Serialized cart, cached under its version so unchanged carts skip the line query.
+
+	Mutations call this too, which leaves the new version cached for the next GET.
+	"""
+	parts = version or cart.version()[0]
+	# Image URLs are absolute, so the host is part of the key
+	key = f"cart:{cart.pk}:{make_etag(*parts, request.build_absolute_uri('/'))}"
+	data = cache.get(key)
+	if data is None:
+		data = CartSerializer(cart, context={'request': request}).data
+		cache.set(key, data, settings.CART_CACHE_SECONDS)
+	return data
+
+
+def _record_cart_changes(changes, user):
+	for item, change in changes:
+		if change:
+			event_log.record('cart_add' if change > 0 else 'cart_remove', item, user, abs(change))
+
+
+def _not_enough_stock(item):
+	return Response({'detail': f"Not enough stock for {item.item_name}"}, status=status.HTTP_400_BAD_REQUEST)
+
+
 class CartView(APIView):
 	permission_classes = [IsAuthenticated]
 
 	def get(self, request):
-		cart = _get_or_create_cart(request.user)
-		serializer = CartSerializer(cart, context={'request': request})
-		return Response(serializer.data)
+		# Reading doesn't create the cart row; the first mutation does
+		cart = Cart.objects.filter(user=request.user).first()
+		parts, last_modified = cart.version() if cart else (('empty', request.user.pk), None)
+		etag = make_etag(*parts)
+		cached = not_modified(request, etag, last_modified)
+		if cached is not None:
+			return cached
+
+		data = _cart_data(cart, request, parts) if cart else CartSerializer(CartReadModel.from_lines([])).data
+		return set_validators(Response(data), etag, last_modified)
 
 	def delete(self, request):
 		cart = _get_or_create_cart(request.user)
-		cart.items.all().delete()
-		serializer = CartSerializer(cart, context={'request': request})
-		return Response(serializer.data)
+		with transaction.atomic():
+			cart.lock()
+			cart_items = list(cart.items.select_related('item'))
+			reservations.sync(cart, {ci.item_id: 0 for ci in cart_items})
+			cart.items.all().delete()
+			cart.touch()
+		for ci in cart_items:
+			event_log.record('cart_remove', ci.item, request.user, ci.quantity)
+		return Response(_cart_data(cart, request))
 
 
 class CartItemsView(APIView):
@@ -379,13 +458,22 @@ class CartItemsView(APIView):
 			return Response({'detail': 'Item not found'}, status=status.HTTP_404_NOT_FOUND)
 
 		cart = _get_or_create_cart(request.user)
-		cart_item, created = CartItem.objects.get_or_create(cart=cart, item=item, defaults={'quantity': quantity})
-		if not created:
-			cart_item.quantity += quantity
-			cart_item.save(update_fields=['quantity', 'updated_at'])
-
-		serializer = CartSerializer(cart, context={'request': request})
-		return Response(serializer.data, status=status.HTTP_200_OK)
+		# The line and its stock hold change together, one request per cart at a time
+		with transaction.atomic():
+			cart.lock()
+			cart_item = CartItem.objects.filter(cart=cart, item=item).first()
+			in_cart = cart_item.quantity if cart_item else 0
+			if reservations.sync(cart, {item.id: in_cart + quantity}):
+				return _not_enough_stock(item)
+			if cart_item:
+				cart_item.quantity += quantity
+				cart_item.save(update_fields=['quantity', 'updated_at'])
+			else:
+				CartItem.objects.create(cart=cart, item=item, quantity=quantity)
+			cart.touch()
+		event_log.record('cart_add', item, request.user, quantity)
+
+		return Response(_cart_data(cart, request), status=status.HTTP_200_OK)
 
 
 class CartItemDetailView(APIView):
@@ -402,22 +490,130 @@ class CartItemDetailView(APIView):
 			return Response({'detail': 'Quantity must be at least 1'}, status=status.HTTP_400_BAD_REQUEST)
 
 		cart = _get_or_create_cart(request.user)
-		cart_item = CartItem.objects.filter(cart=cart, item_id=item_id).select_related('item').first()
-		if not cart_item:
-			return Response({'detail': 'Item not in cart'}, status=status.HTTP_404_NOT_FOUND)
+		with transaction.atomic():
+			cart.lock()
+			cart_item = CartItem.objects.filter(cart=cart, item_id=item_id).select_related('item').first()
+			if not cart_item:
+				return Response({'detail': 'Item not in cart'}, status=status.HTTP_404_NOT_FOUND)
+
+			if reservations.sync(cart, {cart_item.item_id: quantity}):
+				return _not_enough_stock(cart_item.item)
 
-		cart_item.quantity = quantity
-		cart_item.save(update_fields=['quantity', 'updated_at'])
-		serializer = CartSerializer(cart, context={'request': request})
-		return Response(serializer.data, status=status.HTTP_200_OK)
+			change = quantity - cart_item.quantity
+			cart_item.quantity = quantity
+			cart_item.save(update_fields=['quantity', 'updated_at'])
+			cart.touch()
+		if change:
+			event_log.record('cart_add' if change > 0 else 'cart_remove', cart_item.item, request.user, abs(change))
+		return Response(_cart_data(cart, request), status=status.HTTP_200_OK)
 
 	def delete(self, request, item_id: int):
 		cart = _get_or_create_cart(request.user)
-		deleted, _ = CartItem.objects.filter(cart=cart, item_id=item_id).delete()
-		if deleted == 0:
-			return Response({'detail': 'Item not in cart'}, status=status.HTTP_404_NOT_FOUND)
-		serializer = CartSerializer(cart, context={'request': request})
-		return Response(serializer.data, status=status.HTTP_200_OK)
+		with transaction.atomic():
+			cart.lock()
+			cart_item = CartItem.objects.filter(cart=cart, item_id=item_id).select_related('item').first()
+			if not cart_item:
+				return Response({'detail': 'Item not in cart'}, status=status.HTTP_404_NOT_FOUND)
+			reservations.sync(cart, {cart_item.item_id: 0})
+			cart_item.delete()
+			cart.touch()
+		event_log.record('cart_remove', cart_item.item, request.user, cart_item.quantity)
+		return Response(_cart_data(cart, request), status=status.HTTP_200_OK)
+
+
+class CartBatchView(APIView):
+	permission_classes = [IsAuthenticated]
+
+	def post(self, request):
+		"""Apply several add/set/remove operations at once and return the cart."""
+		serializer = CartBatchSerializer(data=request.data)
+		serializer.is_valid(raise_exception=True)
+
+		cart = _get_or_create_cart(request.user)
+		changes, unavailable = cart.apply_operations(serializer.operation_tuples())
+		if unavailable:
+			return Response(
+				{'detail': 'Some items are unavailable', 'unavailable_item_ids': unavailable},
+				status=status.HTTP_400_BAD_REQUEST,
+			)
+		_record_cart_changes(changes, request.user)
+		return Response(_cart_data(cart, request), status=status.HTTP_200_OK)
+
+
+class CartBoughtTogetherView(APIView):
+	permission_classes = [IsAuthenticated]
+
+	def get(self, request):
+		"""Items frequently bought together with what is in the cart."""
+		cart_item_ids = list(CartItem.objects.filter(cart__user=request.user).values_list('item_id', flat=True))
+		items = Item.get_bought_together(cart_item_ids, 8)
+		return Response(ItemListSerializer(items, many=True, context={'request': request}).data)
+
+
+def _guest_cart_response(request, token, cart):
+	read_model = CartReadModel.from_quantities(cart['lines'], cart['updated_at'])
+	response = Response(CartSerializer(read_model, context={'request': request}).data)
+	response[TOKEN_HEADER] = token
+	return response
+
+
+class GuestCartView(APIView):
+	"""Cart of a shopper who isn't logged in, identified by the X-Cart-Token header."""
+	permission_classes = [AllowAny]
+
+	def get(self, request):
+		token = guest_carts.parse_token(request.headers.get(TOKEN_HEADER))
+		if token is None:
+			return Response(CartSerializer(CartReadModel.from_lines([])).data)
+		return _guest_cart_response(request, token, guest_carts.get(token))
+
+	def delete(self, request):
+		token = guest_carts.parse_token(request.headers.get(TOKEN_HEADER))
+		if token is not None:
+			guest_carts.delete(token)
+		return Response(CartSerializer(CartReadModel.from_lines([])).data)
+
+
+class GuestCartBatchView(APIView):
+	"""Same operations as CartBatchView; a new token is issued when none is sent."""
+	permission_classes = [AllowAny]
+
+	def post(self, request):
+		serializer = CartBatchSerializer(data=request.data)
+		serializer.is_valid(raise_exception=True)
+
+		token = guest_carts.parse_token(request.headers.get(TOKEN_HEADER)) or guest_carts.new_token()
+		try:
+			cart, changes, unavailable = guest_carts.apply_operations(token, serializer.operation_tuples())
+		except GuestCartError as e:
+			return Response(e.detail, status=e.status_code)
+		if unavailable:
+			return Response(
+				{'detail': 'Some items are unavailable', 'unavailable_item_ids': unavailable},
+				status=status.HTTP_400_BAD_REQUEST,
+			)
+		_record_cart_changes(changes, request.user)
+		return _guest_cart_response(request, token, cart)
+
+
+class CartMergingTokenObtainPairView(TokenObtainPairView):
+	"""Login that also moves the guest cart (X-Cart-Token header) into the user's cart."""
+
+	def post(self, request, *args, **kwargs):
+		serializer = self.get_serializer(data=request.data)
+		try:
+			serializer.is_valid(raise_exception=True)
+		except TokenError as e:
+			raise InvalidToken(e.args[0]) from e
+
+		token = guest_carts.parse_token(request.headers.get(TOKEN_HEADER))
+		if token is not None:
+			try:
+				guest_carts.merge_into(token, serializer.user)
+			except GuestCartError:
+				# Logging in matters more; the guest cart is left for a later merge
+				pass
+		return Response(serializer.validated_data, status=status.HTTP_200_OK)
 
 
 class CheckoutError(Exception):
@@ -458,21 +654,17 @@ def _get_cart_and_items(user):
 	return cart, cart_items
 
 
-def _lock_items_for_cart_items(cart_items):
-	item_ids = [ci.item_id for ci in cart_items]
-	return {i.id: i for i in Item.objects.select_for_update().filter(id__in=item_ids)}
-
-
-def _calculate_total_for_cart_items(cart_items, locked_items):
+# Fail fast on the unlocked snapshot; _decrement_stock re-checks under the row locks.
+# held: {item_id: quantity} already taken off stock for this cart (reservations)
+def _calculate_total_for_cart_items(cart_items, held=None):
+	held = held or {}
 	total = Decimal('0.00')
 	for ci in cart_items:
-		item = locked_items.get(ci.item_id)
-		if not item or not item.is_available:
+		if not ci.item.is_available:
 			raise CheckoutError({'detail': f"Item {ci.item_id} is not available"})
-		if item.item_quantity < ci.quantity:
-			raise CheckoutError({'detail': f"Not enough stock for {item.item_name}"})
-		unit_price = Decimal(str(item.current_price))
-		total += unit_price * ci.quantity
+		if ci.item.item_quantity + held.get(ci.item_id, 0) < ci.quantity:
+			raise CheckoutError({'detail': f"Not enough stock for {ci.item.item_name}"})
+		total += Decimal(str(ci.item.current_price)) * ci.quantity
 	return total
 
 
@@ -491,17 +683,59 @@ def _create_order_from_payload(user, total, payload):
 	)
 
 
-def _create_order_items_and_update_stock(order, cart_items, locked_items):
+def _create_order_items(order, cart_items):
+	lines = []
 	for ci in cart_items:
-		item = locked_items[ci.item_id]
-		unit_price = Decimal(str(item.current_price))
-		OrderItem.objects.create(order=order, item=item, quantity=ci.quantity, price=unit_price)
-		item.item_quantity -= ci.quantity
-		item.times_purchased += ci.quantity
-		if item.item_quantity <= 0:
-			item.item_quantity = 0
-			item.is_available = False
-		item.save(update_fields=['item_quantity', 'times_purchased', 'is_available', 'updated_at'])
+		unit_price = Decimal(str(ci.item.current_price))
+		lines.append(OrderItem(order=order, item=ci.item, quantity=ci.quantity, price=unit_price))
+		event_log.record_on_commit('purchase', ci.item, user_id=order.user_id, quantity=ci.quantity, amount=unit_price * ci.quantity)
+	OrderItem.objects.bulk_create(lines)
+
+
+def _decrement_stock(cart_items, covered=None):
+	"""Take each line's quantity off its item with one guarded UPDATE.
+
+	The UPDATE only matches while the item is available with enough stock, so a line
+	that lost the race updates no row and the whole checkout rolls back. Rows are
+	locked from their UPDATE to the commit, in item id order so concurrent checkouts
+	can't deadlock; nothing is locked before that. Quantity covered by a stock hold
+	(reservations.convert) is already off the stock, so it only counts as purchased.
+	"""
+	covered = covered or {}
+	now = timezone.now()
+	for ci in sorted(cart_items, key=lambda ci: ci.item_id):
+		quantity = ci.quantity - covered.get(ci.item_id, 0)
+		if not quantity:
+			Item.objects.filter(id=ci.item_id).update(
+				times_purchased=F('times_purchased') + ci.quantity, updated_at=now,
+			)
+			continue
+		updated = Item.objects.filter(id=ci.item_id, is_available=True, item_quantity__gte=quantity).update(
+			item_quantity=F('item_quantity') - quantity,
+			times_purchased=F('times_purchased') + ci.quantity,
+			updated_at=now,
+		)
+		if not updated:
+			raise CheckoutError({'detail': f"Not enough stock for {ci.item.item_name}"})
+
+	# Items this checkout sold out: one UPDATE, plus what Item.save's signals would have done.
+	# Stock still held for other carts isn't sold yet, so those items stay available.
+	sold_out = list(
+		Item.objects.filter(id__in=[ci.item_id for ci in cart_items], item_quantity=0, is_available=True)
+		.exclude(id__in=StockReservation.objects.values('item_id'))
+		.values('id', 'item_category', 'custom_category')
+	)
+	if not sold_out:
+		return
+	Item.objects.filter(id__in=[row['id'] for row in sold_out]).update(is_available=False)
+	for row in sold_out:
+		CategorySummary.apply_change(CategorySummary.key_for(row['item_category'], row['custom_category'], True), None)
+
+	def remove_from_autocomplete():
+		for row in sold_out:
+			autocomplete_index.remove(row['id'])
+
+	transaction.on_commit(remove_from_autocomplete)
 
 
 class CheckoutView(APIView):
@@ -512,12 +746,15 @@ class CheckoutView(APIView):
 		try:
 			_validate_required_shipping_fields(payload)
 			cart, cart_items = _get_cart_and_items(request.user)
+			total = _calculate_total_for_cart_items(cart_items, reservations.held_quantities(cart))
 			with transaction.atomic():
-				locked_items = _lock_items_for_cart_items(cart_items)
-				total = _calculate_total_for_cart_items(cart_items, locked_items)
 				order = _create_order_from_payload(request.user, total, payload)
-				_create_order_items_and_update_stock(order, cart_items, locked_items)
+				_create_order_items(order, cart_items)
 				cart.items.all().delete()
+				cart.touch()
+				covered = reservations.convert(cart, cart_items)
+				# Last, so the hot item rows stay locked for as short a time as possible
+				_decrement_stock(cart_items, covered)
 		except CheckoutError as e:
 			return Response(e.detail, status=e.status_code)
 
@@ -104,7 +104,7 @@ const Profile = () => {
     if (!isOwnProfile && !profile?.is_seller) return;
     api
       .get(`items/?seller=${encodeURIComponent(username)}`)
-      .then((res) => setSellerItems(res.data))
+      .then((res) => setSellerItems(res.data.results ?? res.data))
       .catch(() => setSellerItems([]));
   }, [isOwnProfile, profile?.is_seller, username]);
 